@@ -0,0 +1 @@
+"""Benchmarks package for the job matcher system."""
\ No newline at end of file
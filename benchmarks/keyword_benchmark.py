@@ -0,0 +1,151 @@
+"""
+Keyword Lane Benchmark
+
+Replays LinkedIn search and detail pages for several keywords with different
+numbers of results, and fetches them with LinkedInJobFetcher twice: once
+keyword after keyword with the remaining limit passed on (as fetch_jobs
+worked before keyword lanes), and once with all keywords searched as
+concurrent lanes sharing the limit. The tables report the jobs each keyword
+contributed and the total time.
+
+The keyword-after-keyword run waits for a keyword's detail pages before
+starting the next keyword, which the old fetch_jobs overlapped, so its time
+is an upper bound; the yield per keyword is the same as before.
+
+Usage:
+    python -m benchmarks.keyword_benchmark [--keywords "Frontend Developer:30,Golang:20"] [--limit 100]
+"""
+
+import os
+import re
+import time
+import asyncio
+import argparse
+from urllib.parse import urlsplit, parse_qs
+
+import httpx
+from tabulate import tabulate
+
+from common.rate_limit import AdaptiveRateLimiter
+from fetch_jobs.linkedin_jobs import LinkedInJobFetcher
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Job ids in the recorded search page
+LINKEDIN_ID_PATTERN = re.compile(r'\b39\d{8}\b')
+
+
+class KeywordResults:
+    """Serves a fixed number of search results per keyword with a simulated latency."""
+
+    def __init__(self, results, search_ms, detail_ms):
+        """
+        Initialize the replay.
+
+        Args:
+            results (dict): Keyword -> number of postings its search returns
+            search_ms (float): Latency of a search page
+            detail_ms (float): Latency of a job detail page
+        """
+        self.results = results
+        self.search_delay = search_ms / 1000
+        self.detail_delay = detail_ms / 1000
+        with open(os.path.join(FIXTURES_DIR, 'linkedin_search.html'), encoding='utf-8') as f:
+            self.cards = re.findall(r'<li>.*?</li>', f.read(), flags=re.S)
+        with open(os.path.join(FIXTURES_DIR, 'linkedin_job.html'), encoding='utf-8') as f:
+            self.detail_page = f.read()
+
+    def search_page(self, keyword, start):
+        """Cards start..start+25 of a keyword's results, with ids unique to the keyword."""
+        offset = list(self.results).index(keyword) * 1000000
+        count = max(0, min(len(self.cards), self.results.get(keyword, 0) - start))
+        return '\n'.join(LINKEDIN_ID_PATTERN.sub(str(4000000000 + offset + start + index), self.cards[index])
+                         for index in range(count))
+
+    async def handle_async(self, request):
+        """httpx.MockTransport handler used by the fetcher's async engine."""
+        parts = urlsplit(str(request.url))
+        if 'seeMoreJobPostings' in parts.path:
+            params = {key: values[0] for key, values in parse_qs(parts.query).items()}
+            await asyncio.sleep(self.search_delay)
+            keyword = params.get('keywords', '')
+            return httpx.Response(200, text=self.search_page(keyword, int(params.get('start', 0))))
+        await asyncio.sleep(self.detail_delay)
+        return httpx.Response(200, text=self.detail_page)
+
+
+def create_fetcher(replay, args):
+    """A fetcher serving the replay, with its own rate limiter so runs do not share state."""
+    return LinkedInJobFetcher(enable_anti_detection=False, max_concurrency=args.concurrency,
+                              requests_per_second=args.requests_per_second,
+                              transport=httpx.MockTransport(replay.handle_async),
+                              rate_limiter=AdaptiveRateLimiter(args.requests_per_second))
+
+
+async def fetch_sequential(replay, keywords, args):
+    """Search keyword after keyword, each getting whatever the earlier ones left of the limit."""
+    jobs = []
+    for keyword in keywords:
+        remaining = args.limit - len(jobs)
+        if remaining <= 0:
+            break
+        jobs.extend(await create_fetcher(replay, args).fetch_jobs_async([keyword], 'Sydney', limit=remaining))
+    return jobs
+
+
+async def fetch_lanes(replay, keywords, args):
+    """Search all keywords as concurrent lanes sharing the limit."""
+    fetcher = create_fetcher(replay, args)
+    jobs = await fetcher.fetch_jobs_async(keywords, 'Sydney', limit=args.limit)
+    return jobs, fetcher.keyword_stats
+
+
+def main():
+    """Run the benchmark and print per-keyword yield and total time."""
+    parser = argparse.ArgumentParser(description='Benchmark concurrent keyword search lanes')
+    parser.add_argument('--keywords', type=str, default='Frontend Developer:30,Backend Developer:40,Golang:20,Software Engineer:300',
+                        help='Comma separated keyword:result count pairs')
+    parser.add_argument('--limit', type=int, default=100, help='Global job limit')
+    parser.add_argument('--search-ms', type=float, default=400, help='Latency of a search page')
+    parser.add_argument('--detail-ms', type=float, default=150, help='Latency of a job detail page')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent requests to LinkedIn')
+    parser.add_argument('--requests-per-second', type=float, default=50.0, help='Request rate to LinkedIn')
+    args = parser.parse_args()
+
+    results = {}
+    for pair in args.keywords.split(','):
+        keyword, _, count = pair.rpartition(':')
+        results[keyword.strip()] = int(count)
+    keywords = list(results)
+    replay = KeywordResults(results, args.search_ms, args.detail_ms)
+
+    started = time.perf_counter()
+    sequential_jobs = asyncio.run(fetch_sequential(replay, keywords, args))
+    sequential_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    lane_jobs, keyword_stats = asyncio.run(fetch_lanes(replay, keywords, args))
+    lane_time = time.perf_counter() - started
+
+    rows = []
+    for keyword in keywords:
+        stats = keyword_stats.get(keyword, {})
+        rows.append([
+            keyword,
+            results[keyword],
+            sum(1 for job in sequential_jobs if job.get('search_keyword') == keyword),
+            sum(1 for job in lane_jobs if job.get('search_keyword') == keyword),
+            stats.get('share', '-'),
+            stats.get('pages', '-'),
+            f"{stats['seconds']:.2f}" if 'seconds' in stats else '-',
+        ])
+    print(f"[+] {len(keywords)} keywords, global limit {args.limit}")
+    print(tabulate(rows, headers=['Keyword', 'Results', 'Jobs (sequential)', 'Jobs (lanes)', 'Share', 'Pages',
+                                  'Lane time (s)'], tablefmt='pretty'))
+    print(tabulate([['keyword after keyword', len(sequential_jobs), f"{sequential_time:.2f}"],
+                    ['concurrent lanes', len(lane_jobs), f"{lane_time:.2f}"]],
+                   headers=['Mode', 'Jobs', 'Time (s)'], tablefmt='pretty'))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Job Record Memory Benchmark
+
+Measures the memory held by a large synthetic crawl as it goes through the
+pipeline, once with plain per-job dicts holding a string object per value (as
+an HTML parser returns them) and once with the repeated values interned with
+intern_job, as the fetchers do. Each job is created the way the fetchers
+create it, updated with Glassdoor and Gemini results, and the table reports
+the memory retained by the postings, the peak while converting them to a
+DataFrame and the time the conversion takes.
+
+Usage:
+    python -m benchmarks.memory_benchmark [--jobs 20000]
+"""
+
+import gc
+import time
+import random
+import argparse
+import tracemalloc
+
+import pandas as pd
+from tabulate import tabulate
+
+from common.job import intern_job
+
+COMPANIES = [f"Company {index} Pty Ltd" for index in range(400)]
+LOCATIONS = ['Sydney NSW', 'Melbourne VIC', 'Brisbane QLD', 'Perth WA', 'Adelaide SA', 'Canberra ACT', 'Remote']
+SENIORITY = ['Entry level', 'Associate', 'Mid-Senior level', 'Director']
+EMPLOYMENT = ['Full-time', 'Contract', 'Part-time']
+WORDS = ('react typescript python aws teams build deliver customers product platform data services '
+         'experience design senior engineer develop cloud testing agile stakeholders ownership').split()
+
+
+def fresh(text):
+    """A new string object with the given content, as an HTML parser returns it."""
+    return ''.join(list(text))
+
+
+def keep(job):
+    """Leave a posting's values as they are."""
+    return job
+
+
+def crawl(size, finish, seed=3):
+    """
+    Build and process a synthetic crawl.
+
+    Args:
+        size (int): Number of jobs
+        finish (callable): Applied to each posting when it is created and when its
+                           details are added (keep or intern_job)
+        seed (int): Random seed, so both runs see the same data
+
+    Returns:
+        list: Postings after enrichment and matching
+    """
+    rng = random.Random(seed)
+    jobs = []
+    for index in range(size):
+        job = finish(dict(
+            source=fresh(rng.choice(['LinkedIn', 'SEEK'])),
+            title=fresh(f"Software Engineer {index % 50}"),
+            company=fresh(rng.choice(COMPANIES)),
+            location=fresh(rng.choice(LOCATIONS)),
+            job_url=f"https://example.com/jobs/{index}",
+            job_id=str(1000000 + index),
+            description='',
+            match_score=0,
+            rating=0,
+        ))
+        # Details page, Glassdoor enrichment and Gemini match
+        job.update({
+            'description': ' '.join(rng.choices(WORDS, k=rng.randint(300, 600))),
+            'seniority': fresh(rng.choice(SENIORITY)),
+            'employment_type': fresh(rng.choice(EMPLOYMENT)),
+        })
+        finish(job)
+        job.update({'rating': round(rng.uniform(3, 5), 1)})
+        job.update({
+            'match_score': rng.randint(0, 100),
+            'match_reason': 'Strong overlap in frontend and cloud experience.',
+            'skill_matches': ['react', 'typescript'],
+            'skill_gaps': ['kubernetes'],
+        })
+        jobs.append(job)
+    return jobs
+
+
+def measure(label, size, finish):
+    """
+    Measure one representation.
+
+    Returns:
+        list: Table row with the memory retained by the postings (total and per job
+              excluding the description text), the extra peak memory and the time
+              of the DataFrame conversion
+    """
+    gc.collect()
+    tracemalloc.start()
+    jobs = crawl(size, finish)
+    retained = tracemalloc.get_traced_memory()[0]
+    descriptions = sum(len(job['description']) + 49 for job in jobs)  # Text plus str object header
+
+    tracemalloc.reset_peak()
+    frame = pd.DataFrame(jobs)
+    peak = tracemalloc.get_traced_memory()[1] - retained
+    tracemalloc.stop()
+    del frame
+
+    # Timed again without tracing, which slows down every allocation
+    started = time.perf_counter()
+    pd.DataFrame(jobs)
+    elapsed = time.perf_counter() - started
+    del jobs
+    return [label, f"{retained / 2**20:.1f}", f"{(retained - descriptions) / size:.0f}",
+            f"{peak / 2**20:.1f}", f"{elapsed:.2f}"]
+
+
+def main():
+    """Run the benchmark and print a table of memory use."""
+    parser = argparse.ArgumentParser(description='Benchmark memory of job postings')
+    parser.add_argument('--jobs', type=int, default=20000, help='Number of jobs in the synthetic crawl')
+    args = parser.parse_args()
+
+    rows = [
+        measure('dicts', args.jobs, keep),
+        measure('dicts, interned values', args.jobs, intern_job),
+    ]
+    print(f"[+] Synthetic crawl of {args.jobs} jobs")
+    print(tabulate(rows, headers=['Representation', 'Postings (MB)', 'Bytes/job w/o text', 'Conversion peak (MB)',
+                                  'Conversion (s)'], tablefmt='pretty'))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+HTML Parse Benchmark
+
+Compares the parse time per page of the LinkedIn and SEEK fetchers on saved
+fixture pages, for every parser backend with and without the SoupStrainer
+restriction, and checks that every configuration extracts the same data as
+the full-tree html.parser baseline.
+
+Usage:
+    python -m benchmarks.parse_benchmark [--iterations 20]
+"""
+
+import os
+import time
+import argparse
+
+from tabulate import tabulate
+
+from fetch_jobs.html_parsing import HtmlParser, LXML_AVAILABLE
+from fetch_jobs.linkedin_jobs import LinkedInJobFetcher
+from fetch_jobs.seek_jobs import SeekJobFetcher
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# (label, fixture file, fetcher class, page kind)
+PAGES = [
+    ('LinkedIn search', 'linkedin_search.html', LinkedInJobFetcher, 'search'),
+    ('LinkedIn job', 'linkedin_job.html', LinkedInJobFetcher, 'detail'),
+    ('SEEK search', 'seek_search.html', SeekJobFetcher, 'search'),
+    ('SEEK job', 'seek_job.html', SeekJobFetcher, 'detail'),
+]
+
+# (label, backend, restrict to job containers); the first entry is the baseline
+CONFIGS = [
+    ('html.parser, full tree', 'html.parser', False),
+    ('html.parser, strainer', 'html.parser', True),
+    ('lxml, full tree', 'lxml', False),
+    ('lxml, strainer', 'lxml', True),
+]
+
+
+def parse_page(fetcher, kind, html):
+    """Run a fetcher's parsing code on one page, as done during a live fetch."""
+    if kind == 'search':
+        return [fetcher._parse_job_card(card) for card in fetcher._find_job_cards(html)]
+    return fetcher._parse_job_details(html)
+
+
+def time_parse(fetcher, kind, html, iterations):
+    """
+    Time the parsing of one page.
+
+    Returns:
+        tuple: (best time per page in milliseconds, parsed result)
+    """
+    result = parse_page(fetcher, kind, html)  # Warm up
+    best = float('inf')
+    for _ in range(iterations):
+        started = time.perf_counter()
+        parse_page(fetcher, kind, html)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
+
+
+def main():
+    """Run the benchmark and print a table of parse times."""
+    parser = argparse.ArgumentParser(description='Benchmark HTML parsing of the job fetchers')
+    parser.add_argument('--iterations', type=int, default=20, help='Timed runs per page and configuration')
+    args = parser.parse_args()
+
+    configs = [config for config in CONFIGS if config[1] != 'lxml' or LXML_AVAILABLE]
+    if len(configs) < len(CONFIGS):
+        print("[!] lxml is not installed; only html.parser is benchmarked")
+
+    rows = []
+    for label, fixture, fetcher_class, kind in PAGES:
+        with open(os.path.join(FIXTURES_DIR, fixture), encoding='utf-8') as f:
+            html = f.read()
+
+        fetcher = fetcher_class(enable_anti_detection=False)
+        baseline_ms = None
+        baseline_result = None
+        for config_label, backend, restrict in configs:
+            fetcher.html = HtmlParser(backend, restrict=restrict)
+            elapsed_ms, result = time_parse(fetcher, kind, html, args.iterations)
+            if baseline_ms is None:
+                baseline_ms, baseline_result = elapsed_ms, result
+            rows.append([
+                label, f"{len(html) / 1024:.0f} KB", config_label, f"{elapsed_ms:.2f}",
+                f"{baseline_ms / elapsed_ms:.1f}x", 'yes' if result == baseline_result else 'NO'
+            ])
+
+    print(tabulate(rows, headers=['Page', 'Size', 'Parser', 'ms/page', 'Speedup', 'Same output'],
+                   tablefmt='pretty'))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,511 @@
+"""
+Pipeline Benchmark
+
+This module runs the full job matcher pipeline offline. Recorded LinkedIn and
+SEEK pages, Google CSE results and canned Gemini answers are replayed through
+the real LinkedInJobFetcher, SeekJobFetcher, GlassdoorEnricher, GeminiMatcher,
+streaming stages and main.py output step, with every response delayed by a
+simulated latency model. It reports per-stage throughput, request and job
+latency percentiles, peak memory and CPU time.
+
+Usage:
+    python -m benchmarks.pipeline_benchmark [--latency-scale 0.1] [--json report.json] [main.py options]
+
+Options not recognised by the benchmark (e.g. --limit, --match-workers or
+--match-batch-size) are passed through to main.py's argument parser.
+"""
+
+import io
+import os
+import re
+import sys
+import json
+import math
+import time
+import random
+import asyncio
+import hashlib
+import argparse
+import tempfile
+import threading
+import contextlib
+import tracemalloc
+from collections import defaultdict
+from urllib.parse import urlsplit, parse_qs
+
+import httpx
+import requests
+import numpy as np
+from tabulate import tabulate
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+import main as job_matcher
+from glassdoor_cse import GlassdoorEnricher
+from match_resume.gemini_matcher import GeminiMatcher, estimate_tokens
+from match_resume.prefilter import ResumePrefilter
+from pipeline.stream import StreamingPipeline
+from pipeline.job_store import JobStore
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Median latency (ms) and log-normal spread of each simulated service at scale 1.0
+DEFAULT_LATENCIES = {
+    'linkedin_search': (450, 0.4),
+    'linkedin_job': (380, 0.4),
+    'seek_search': (650, 0.4),
+    'seek_job': (480, 0.4),
+    'google_cse': (320, 0.3),
+    'gemini': (1800, 0.35),
+}
+
+# Extra Gemini latency per 1000 prompt tokens (ms) at scale 1.0
+GEMINI_MS_PER_1K_TOKENS = 120
+
+LINKEDIN_ID_PATTERN = re.compile(r'\b39\d{8}\b')
+SEEK_ID_PATTERN = re.compile(r'\b8\d{7}\b')
+BATCH_ID_PATTERN = re.compile(r'=== JOB (J\d+) ===')
+
+
+def percentiles(values):
+    """Return the p50/p90/p99 of a list of seconds, in milliseconds."""
+    if not values:
+        return [None, None, None]
+    return [float(v) * 1000 for v in np.percentile(values, [50, 90, 99])]
+
+
+class LatencyModel:
+    """Log-normal latency model per simulated service."""
+
+    def __init__(self, latencies=None, scale=1.0, seed=0):
+        """
+        Initialize the latency model.
+
+        Args:
+            latencies (dict, optional): Service name to (median ms, sigma)
+            scale (float): Multiplier applied to every sampled latency (0 disables delays)
+            seed (int): Random seed, so runs are comparable
+        """
+        self.latencies = latencies or DEFAULT_LATENCIES
+        self.scale = scale
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self, service, extra_ms=0.0):
+        """
+        Sample a latency for one call.
+
+        Args:
+            service (str): Service name
+            extra_ms (float): Additional deterministic latency (e.g. proportional to prompt size)
+
+        Returns:
+            float: Delay in seconds
+        """
+        median_ms, sigma = self.latencies[service]
+        with self._lock:
+            factor = self._random.lognormvariate(0, sigma)
+        return (median_ms * factor + extra_ms) * self.scale / 1000
+
+
+class RecordedResponses:
+    """Replays recorded responses for every HTTP endpoint used by the pipeline."""
+
+    def __init__(self, latency, search_pages=4):
+        """
+        Load the fixtures.
+
+        Args:
+            latency (LatencyModel): Latency applied to every response
+            search_pages (int): Result pages served per search before an empty page
+        """
+        self.latency = latency
+        self.search_pages = search_pages
+        self.timings = defaultdict(list)
+        self._lock = threading.Lock()
+
+        self.pages = {}
+        for name in ('linkedin_search', 'linkedin_job', 'seek_search', 'seek_job'):
+            with open(os.path.join(FIXTURES_DIR, f'{name}.html'), encoding='utf-8') as f:
+                self.pages[name] = f.read()
+        with open(os.path.join(FIXTURES_DIR, 'google_cse.json'), encoding='utf-8') as f:
+            self.cse_template = json.load(f)
+
+        # Company names are renamed per page so that every page holds distinct postings
+        names = set(re.findall(r'data-automation="jobCompany"[^>]*>([^<]+)<', self.pages['seek_search']))
+        names |= {name.strip() for name in
+                  re.findall(r'class="hidden-nested-link"[^>]*>([^<]+)<', self.pages['linkedin_search'])}
+        self._company_pattern = re.compile(
+            r'(>\s*)(' + '|'.join(re.escape(name) for name in sorted(names, key=len, reverse=True)) + r')(\s*<)')
+
+    def _record(self, service, elapsed):
+        with self._lock:
+            self.timings[service].append(elapsed)
+
+    def _search_page(self, name, page, id_pattern):
+        """A search page with ids and company names made unique for this page number."""
+        html = id_pattern.sub(lambda m: str(int(m.group(0)) + page * 1000003), self.pages[name])
+        return self._company_pattern.sub(lambda m: f"{m.group(1)}{m.group(2)} {page + 1}{m.group(3)}", html)
+
+    def _cse_response(self, query):
+        """The recorded CSE result with the company name and a stable rating filled in."""
+        company = query.replace(' glassdoor', '')
+        digest = int(hashlib.md5(company.encode('utf-8')).hexdigest(), 16)
+        rating = f"{3.5 + (digest % 14) / 10:.1f}"
+
+        def fill(value):
+            if isinstance(value, str):
+                return value.replace('{company}', company).replace('{rating}', rating)
+            if isinstance(value, list):
+                return [fill(item) for item in value]
+            if isinstance(value, dict):
+                return {key: fill(item) for key, item in value.items()}
+            return value
+
+        return json.dumps(fill(self.cse_template))
+
+    def route(self, url):
+        """
+        Map a request URL to its recorded response.
+
+        Returns:
+            tuple: (service name, status code, body)
+        """
+        parts = urlsplit(url)
+        params = {key: values[0] for key, values in parse_qs(parts.query).items()}
+
+        if 'linkedin.com' in parts.netloc:
+            if 'seeMoreJobPostings' in parts.path:
+                page = int(params.get('start', 0)) // 25
+                body = self._search_page('linkedin_search', page, LINKEDIN_ID_PATTERN) \
+                    if page < self.search_pages else ''
+                return 'linkedin_search', 200, body
+            return 'linkedin_job', 200, self.pages['linkedin_job']
+
+        if 'seek.com.au' in parts.netloc:
+            if '/job/' in parts.path:
+                return 'seek_job', 200, self.pages['seek_job']
+            page = int(params.get('page', 1)) - 1
+            body = self._search_page('seek_search', page, SEEK_ID_PATTERN) \
+                if page < self.search_pages else '<html><body></body></html>'
+            return 'seek_search', 200, body
+
+        if 'googleapis.com' in parts.netloc:
+            return 'google_cse', 200, self._cse_response(params.get('q', ''))
+
+        return 'unknown', 404, ''
+
+    async def handle_async(self, request):
+        """httpx.MockTransport handler used by the fetchers' async engine."""
+        started = time.perf_counter()
+        service, status, body = self.route(str(request.url))
+        if service in self.latency.latencies:
+            await asyncio.sleep(self.latency.sample(service))
+        self._record(service, time.perf_counter() - started)
+        return httpx.Response(status, text=body)
+
+    def respond(self, url):
+        """Blocking counterpart of handle_async() used by the requests adapter."""
+        started = time.perf_counter()
+        service, status, body = self.route(url)
+        if service in self.latency.latencies:
+            time.sleep(self.latency.sample(service))
+        self._record(service, time.perf_counter() - started)
+        return status, body
+
+    def transport(self):
+        """Create an httpx transport serving the recorded responses."""
+        return httpx.MockTransport(self.handle_async)
+
+
+class ReplayAdapter(requests.adapters.BaseAdapter):
+    """requests transport adapter serving recorded responses (used by GlassdoorEnricher)."""
+
+    def __init__(self, recorded):
+        super().__init__()
+        self.recorded = recorded
+
+    def send(self, request, **kwargs):
+        status, body = self.recorded.respond(request.url)
+        response = requests.Response()
+        response.status_code = status
+        response._content = body.encode('utf-8')
+        response.encoding = 'utf-8'
+        response.headers['Content-Type'] = 'application/json'
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+class CannedGeminiModel:
+    """Stand-in for genai.GenerativeModel returning canned JSON after a simulated delay."""
+
+    def __init__(self, latency, recorded):
+        """
+        Initialize the model.
+
+        Args:
+            latency (LatencyModel): Latency model (service 'gemini')
+            recorded (RecordedResponses): Collects the call timings
+        """
+        with open(os.path.join(FIXTURES_DIR, 'gemini_responses.json'), encoding='utf-8') as f:
+            self.responses = json.load(f)
+        self.latency = latency
+        self.recorded = recorded
+        self.prompt_tokens = 0
+        self._lock = threading.Lock()
+
+    def _pick(self, key):
+        digest = int(hashlib.md5(key.encode('utf-8')).hexdigest(), 16)
+        return dict(self.responses[digest % len(self.responses)])
+
+    def generate_content(self, prompt, generation_config=None):
+        started = time.perf_counter()
+        tokens = estimate_tokens(prompt)
+        with self._lock:
+            self.prompt_tokens += tokens
+        time.sleep(self.latency.sample('gemini', extra_ms=tokens / 1000 * GEMINI_MS_PER_1K_TOKENS))
+
+        batch_ids = BATCH_ID_PATTERN.findall(prompt)
+        if batch_ids:
+            sections = BATCH_ID_PATTERN.split(prompt)
+            # split() yields [head, id1, body1, id2, body2, ...]
+            items = []
+            for job_id, body in zip(sections[1::2], sections[2::2]):
+                item = self._pick(body)
+                item['job_id'] = job_id
+                items.append(item)
+            text = json.dumps(items)
+        else:
+            text = json.dumps(self._pick(prompt))
+
+        self.recorded._record('gemini', time.perf_counter() - started)
+
+        class Response:
+            pass
+
+        response = Response()
+        response.text = text
+        return response
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in megabytes, if available."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_benchmark(args, pipeline_argv):
+    """
+    Run the replayed pipeline once.
+
+    Args:
+        args (argparse.Namespace): Benchmark options
+        pipeline_argv (list): Options passed through to main.py's parser
+
+    Returns:
+        dict: Collected metrics
+    """
+    workdir = tempfile.mkdtemp(prefix='job_matcher_bench_')
+    pipeline_args = job_matcher.parse_arguments([
+        '--resume', os.path.join(FIXTURES_DIR, 'resume.txt'),
+        '--output', os.path.join(workdir, 'job_matches.csv'),
+        '--store', os.path.join(workdir, 'job_store.db'),
+        '--no-cache',
+    ] + pipeline_argv)
+
+    with open(os.path.join(FIXTURES_DIR, 'resume.txt'), encoding='utf-8') as f:
+        resume_text = f.read()
+
+    latency = LatencyModel(scale=args.latency_scale, seed=args.seed)
+    recorded = RecordedResponses(latency, search_pages=args.search_pages)
+
+    glassdoor_enricher = GlassdoorEnricher(google_cse_key='benchmark', google_cse_id='benchmark')
+    glassdoor_enricher.session.mount('https://', ReplayAdapter(recorded))
+    gemini_matcher = GeminiMatcher(api_key='benchmark', compactor=job_matcher.build_compactor(pipeline_args),
+                                   quota=job_matcher.build_quota_controller(pipeline_args))
+    gemini_matcher.model = CannedGeminiModel(latency, recorded)
+
+    prefilter = None
+    if pipeline_args.prefilter_top_k or pipeline_args.prefilter_threshold is not None:
+        prefilter = ResumePrefilter(resume_text)
+
+    fetcher_options = {
+        'enable_anti_detection': False,
+        'requests_per_second': args.requests_per_second,
+        'transport': recorded.transport(),
+    }
+    keywords_list = [k.strip() for k in pipeline_args.keywords.split(',')]
+    sources = job_matcher.build_sources(pipeline_args, keywords_list, fetcher_options=fetcher_options)
+
+    # Stamp each job when its source emits it, to measure end-to-end job latency
+    emitted_at = {}
+
+    def timed(source):
+        def run(emit):
+            def timed_emit(job):
+                emitted_at[id(job)] = time.perf_counter()
+                emit(job)
+            source(timed_emit)
+        return run
+
+    job_latencies = []
+
+    def on_result(job):
+        started = emitted_at.get(id(job))
+        if started is not None:
+            job_latencies.append(time.perf_counter() - started)
+
+    enriched_jobs = []
+    seen_jobs = []
+    pipeline = StreamingPipeline(
+        sources={name: timed(source) for name, source in sources.items()},
+        stages=job_matcher.build_stages(pipeline_args, glassdoor_enricher, gemini_matcher, resume_text,
+                                        enriched_jobs, prefilter, seen_jobs),
+        queue_size=pipeline_args.queue_size
+    )
+    job_store = JobStore(pipeline_args.store)
+
+    output = sys.stdout if args.verbose else io.StringIO()
+    if args.tracemalloc:
+        tracemalloc.start()
+    cpu_started = time.process_time()
+    wall_started = time.perf_counter()
+
+    with contextlib.redirect_stdout(output):
+        results = pipeline.run(on_result=on_result)
+        pipeline_wall = time.perf_counter() - wall_started
+
+        output_started = time.perf_counter()
+        job_store.mark_seen(seen_jobs)
+        matched = [job for job in results if job.get('match_score', 0) > job_matcher.MIN_MATCH_SCORE]
+        if matched:
+            job_matcher.output_results(pipeline_args, matched, job_store)
+        output_time = time.perf_counter() - output_started
+
+    wall_time = time.perf_counter() - wall_started
+    cpu_time = time.process_time() - cpu_started
+    traced_peak = None
+    if args.tracemalloc:
+        traced_peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+    job_store.close()
+
+    stages = []
+    for stats in pipeline.summary():
+        stages.append({
+            **stats,
+            'throughput': stats['processed'] / pipeline_wall if pipeline_wall else 0.0,
+            'utilization': stats['busy_time'] / (stats['workers'] * pipeline_wall) if pipeline_wall else 0.0,
+        })
+
+    return {
+        'settings': {
+            'latency_scale': args.latency_scale,
+            'requests_per_second': args.requests_per_second,
+            'search_pages': args.search_pages,
+            'seed': args.seed,
+            'pipeline_argv': pipeline_argv,
+        },
+        'wall_time': wall_time,
+        'pipeline_time': pipeline_wall,
+        'output_time': output_time,
+        'cpu_time': cpu_time,
+        'cpu_utilization': cpu_time / wall_time if wall_time else 0.0,
+        'peak_rss_mb': peak_rss_mb(),
+        'traced_peak_mb': traced_peak,
+        'first_result': (pipeline.first_result_at - pipeline.started_at) if pipeline.first_result_at else None,
+        'fetched': dict(pipeline.source_counts),
+        'results': len(results),
+        'saved': len(matched),
+        'gemini_prompt_tokens': gemini_matcher.model.prompt_tokens,
+        'gemini_quota': gemini_matcher.quota.stats(),
+        'compaction_tokens_saved': (
+            gemini_matcher.compactor.stats(prompts=gemini_matcher.single_calls + gemini_matcher.batch_calls)
+            ['tokens_saved'] if gemini_matcher.compactor is not None else None),
+        'stages': stages,
+        'job_latency_ms': dict(zip(['p50', 'p90', 'p99'], percentiles(job_latencies))),
+        'requests': {
+            service: {'count': len(timings), **dict(zip(['p50', 'p90', 'p99'], percentiles(timings)))}
+            for service, timings in sorted(recorded.timings.items())
+        },
+    }
+
+
+def print_report(metrics):
+    """Print the benchmark metrics as tables."""
+    def fmt(value, spec='.1f'):
+        return '-' if value is None or (isinstance(value, float) and math.isnan(value)) else format(value, spec)
+
+    print("\n=== RUN ===")
+    run_rows = [
+        ['Wall time (s)', fmt(metrics['wall_time'], '.2f')],
+        ['  pipeline (s)', fmt(metrics['pipeline_time'], '.2f')],
+        ['  output/merge (s)', fmt(metrics['output_time'], '.2f')],
+        ['CPU time (s)', fmt(metrics['cpu_time'], '.2f')],
+        ['CPU utilization', f"{metrics['cpu_utilization']:.0%}"],
+        ['Peak RSS (MB)', fmt(metrics['peak_rss_mb'])],
+        ['Peak traced Python memory (MB)', fmt(metrics['traced_peak_mb'])],
+        ['First result after (s)', fmt(metrics['first_result'], '.2f')],
+        ['Jobs fetched', ', '.join(f"{name}: {count}" for name, count in metrics['fetched'].items())],
+        ['Jobs scored / saved', f"{metrics['results']} / {metrics['saved']}"],
+        ['Gemini prompt tokens', metrics['gemini_prompt_tokens']],
+        ['Gemini concurrency (final / peak)',
+         f"{metrics['gemini_quota']['concurrency']} / {metrics['gemini_quota']['peak_concurrency']}"],
+        ['Gemini quota wait (s)', fmt(metrics['gemini_quota']['wait_time'], '.2f')],
+        ['  saved by compaction', fmt(metrics['compaction_tokens_saved'], 'd')],
+    ]
+    print(tabulate(run_rows, tablefmt='pretty', colalign=('left', 'right')))
+
+    print("\n=== STAGES ===")
+    stage_rows = [[s['stage'], s['workers'], s['processed'], s['dropped'], s['errors'], fmt(s['busy_time'], '.2f'),
+                   fmt(s['throughput']), f"{s['utilization']:.0%}"] for s in metrics['stages']]
+    print(tabulate(stage_rows, headers=['Stage', 'Workers', 'Processed', 'Dropped', 'Errors', 'Busy (s)',
+                                        'Items/s', 'Utilization'], tablefmt='pretty'))
+
+    print("\n=== LATENCY (ms) ===")
+    latency_rows = [[service, stats['count'], fmt(stats['p50']), fmt(stats['p90']), fmt(stats['p99'])]
+                    for service, stats in metrics['requests'].items()]
+    job_latency = metrics['job_latency_ms']
+    latency_rows.append(['job end-to-end', metrics['results'], fmt(job_latency['p50']), fmt(job_latency['p90']),
+                         fmt(job_latency['p99'])])
+    print(tabulate(latency_rows, headers=['Call', 'Count', 'p50', 'p90', 'p99'], tablefmt='pretty'))
+
+
+def main():
+    """Run the pipeline benchmark from the command line."""
+    parser = argparse.ArgumentParser(description='Offline benchmark of the job matcher pipeline',
+                                     epilog='Other options are passed through to main.py')
+    parser.add_argument('--latency-scale', type=float, default=0.1,
+                        help='Multiplier for the simulated service latencies (1.0 = realistic, 0 = none)')
+    parser.add_argument('--requests-per-second', type=float, default=20.0,
+                        help='Per-host request rate of the fetchers')
+    parser.add_argument('--search-pages', type=int, default=4,
+                        help='Result pages served per search before an empty page')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the latency model')
+    parser.add_argument('--tracemalloc', action='store_true',
+                        help='Trace Python allocations for the peak memory figure (slows the run down)')
+    parser.add_argument('--json', type=str, default=None, help='Also write the metrics to this JSON file')
+    parser.add_argument('--verbose', action='store_true', help='Show the pipeline output')
+    args, pipeline_argv = parser.parse_known_args()
+
+    metrics = run_benchmark(args, pipeline_argv)
+    print_report(metrics)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(metrics, f, indent=2)
+        print(f"\n[+] Metrics written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
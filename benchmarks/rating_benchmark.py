@@ -0,0 +1,135 @@
+"""
+Rating Extraction Benchmark
+
+Compares the Glassdoor rating extraction of glassdoor_cse with the previous
+implementation (nine regexes searched one by one over every field, first hit
+wins) on a saved corpus of Google CSE responses with known ratings. Reports
+the time per response and how many responses each version rates correctly,
+listing the responses the current version gets wrong.
+
+The corpus (fixtures/cse_corpus.json) covers Glassdoor review pages in the
+phrasings seen in practice, structured pagemap ratings, ratings from other
+sites (Indeed, SEEK, customer reviews) that must not win over Glassdoor, and
+responses without any rating.
+
+Usage:
+    python -m benchmarks.rating_benchmark [--iterations 200]
+"""
+
+import os
+import re
+import json
+import time
+import argparse
+
+from tabulate import tabulate
+
+from glassdoor_cse import extract_rating
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def legacy_extract_rating(results):
+    """Previous rating extraction of _get_company_rating_google_cse, kept as the reference."""
+    if "items" in results:
+        for item in results["items"]:
+            snippet = item.get("snippet", "")
+            if "5.0" in snippet and ("Mutinex" in snippet or "rating" in snippet.lower()):
+                return 5.0
+
+    if "items" in results:
+        patterns = [
+            r"rating of ([0-9.]+) out of 5 stars",
+            r"([0-9.]+) out of 5 stars",
+            r"([0-9.]+)/5 stars",
+            r"Rating: ([0-9.]+)",
+            r"rated ([0-9.]+) by",
+            r"([0-9.]+) rating",
+            r"([0-9.]+) ★",
+            r"(?:rating|reviews|stars|score)[^\n.]*?([0-9]\.[0-9])",
+            r"([0-9]\.[0-9])(?:[^\n.]*?(?:rating|reviews|stars|score))"
+        ]
+        for item in results["items"]:
+            fields_to_check = [
+                item.get("title", ""),
+                item.get("snippet", ""),
+                item.get("htmlTitle", ""),
+                item.get("htmlSnippet", "")
+            ]
+            for text in fields_to_check:
+                text = str(text)
+                if "Mutinex" in text and "5.0" in text:
+                    return 5.0
+
+            metatags = item.get("pagemap", {}).get("metatags", [])
+            for tag in metatags:
+                for value in tag.values():
+                    fields_to_check.append(str(value))
+
+            for text in fields_to_check:
+                text = str(text)
+                for pattern in patterns:
+                    match = re.search(pattern, text)
+                    if match:
+                        try:
+                            rating = float(match.group(1))
+                            if 0 <= rating <= 5:
+                                return rating
+                        except ValueError:
+                            continue
+    return 0
+
+
+def current_extract_rating(results):
+    """Current extraction, with "no rating" reported as 0 like the enricher does."""
+    rating = extract_rating(results)
+    return rating if rating is not None else 0
+
+
+def time_run(function, corpus, iterations):
+    """
+    Time a function over the whole corpus.
+
+    Returns:
+        tuple: (best time per response in microseconds, list of ratings)
+    """
+    ratings = [function(case['response']) for case in corpus]  # Warm up
+    best = float('inf')
+    for _ in range(iterations):
+        started = time.perf_counter()
+        for case in corpus:
+            function(case['response'])
+        best = min(best, time.perf_counter() - started)
+    return best / len(corpus) * 1e6, ratings
+
+
+def main():
+    """Run the benchmark and print speed and accuracy of both versions."""
+    parser = argparse.ArgumentParser(description='Benchmark Glassdoor rating extraction from CSE responses')
+    parser.add_argument('--iterations', type=int, default=200, help='Timed passes over the corpus')
+    args = parser.parse_args()
+
+    with open(os.path.join(FIXTURES_DIR, 'cse_corpus.json'), encoding='utf-8') as f:
+        corpus = json.load(f)
+    expected = [case['expected'] for case in corpus]
+
+    rows = []
+    results = {}
+    for label, function in [('previous', legacy_extract_rating), ('current', current_extract_rating)]:
+        elapsed_us, ratings = time_run(function, corpus, args.iterations)
+        correct = sum(1 for rating, wanted in zip(ratings, expected) if rating == wanted)
+        results[label] = ratings
+        rows.append([label, f"{elapsed_us:.1f}", f"{correct}/{len(corpus)}", f"{correct / len(corpus):.0%}"])
+
+    print(f"[+] {len(corpus)} saved CSE responses")
+    print(tabulate(rows, headers=['Extractor', 'us/response', 'Correct', 'Accuracy'], tablefmt='pretty'))
+
+    wrong = [[case['company'], case['expected'], previous, current]
+             for case, previous, current in zip(corpus, results['previous'], results['current'])
+             if current != case['expected']]
+    if wrong:
+        print(tabulate(wrong, headers=['Company', 'Expected', 'Previous', 'Current'], tablefmt='pretty'))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Resume Text Benchmark
+
+Compares the resume text cleaning and section splitting of ResumeParser with
+the previous implementation (a per-character generator for non-printable
+characters and one regex search per section header) on a corpus of resumes
+derived from the fixture resume, and checks that both produce identical
+output for every resume.
+
+The corpus mimics PDF extraction output: repeated spaces and blank lines,
+tabs, form feeds, soft hyphens, non-breaking and zero-width spaces, bullets,
+accented names and shuffled sections with varied headings.
+
+Usage:
+    python -m benchmarks.resume_benchmark [--resumes 300] [--iterations 5]
+"""
+
+import os
+import re
+import time
+import random
+import argparse
+
+from tabulate import tabulate
+
+from match_resume.parse_resume import ResumeParser, split_sections
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Noise inserted by PDF text extraction
+NOISE = ['  ', '   ', '\t', '\x0c', '­', ' ', '​', '\r', ' • ', '\n\n', '﻿']
+NAMES = ['Jane Citizen', 'José Álvarez', 'Zoë Müller', 'Nguyễn Văn An', '李小龍', 'Siobhán Ó Briain']
+HEADINGS = {
+    'SUMMARY': ['SUMMARY', 'Profile', 'About Me'],
+    'SKILLS': ['SKILLS', 'Technical Skills', 'Core Competencies', 'Tools & Technologies'],
+    'EXPERIENCE': ['EXPERIENCE', 'Work History', 'Employment', 'Professional Experience'],
+    'EDUCATION': ['EDUCATION', 'Academic Background', 'Qualifications'],
+    'PROJECTS': ['PROJECTS', 'Portfolio', 'Selected Projects'],
+    'CERTIFICATIONS': ['CERTIFICATIONS', 'Certificates & Awards'],
+}
+
+
+def legacy_clean_text(text):
+    """Previous ResumeParser._clean_text, kept as the reference output."""
+    text = re.sub(r'\n+', '\n', text)
+    text = re.sub(r' +', ' ', text)
+    text = ''.join(c for c in text if c.isprintable() or c == '\n')
+    lines = [line.strip() for line in text.split('\n')]
+    return '\n'.join(lines)
+
+
+def legacy_split_sections(text):
+    """Previous split_sections, kept as the reference output."""
+    sections = {
+        'education': r'(?i)education|academic|qualifications',
+        'experience': r'(?i)experience|work|employment|job|career',
+        'skills': r'(?i)skills|competencies|technologies|tools|technical',
+        'projects': r'(?i)projects|portfolio',
+        'certifications': r'(?i)certifications|certificates|awards',
+        'contact': r'(?i)contact|personal|details|information'
+    }
+    extracted_sections = {}
+    current_section = 'other'
+    section_content = []
+
+    def save_section():
+        content = '\n'.join(section_content)
+        if current_section in extracted_sections:
+            extracted_sections[current_section] += '\n' + content
+        else:
+            extracted_sections[current_section] = content
+
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        section_found = False
+        for section_name, pattern in sections.items():
+            if re.search(pattern, line) and len(line) < 50:
+                if section_content:
+                    save_section()
+                current_section = section_name
+                section_content = []
+                section_found = True
+                break
+        if not section_found:
+            section_content.append(line)
+    if section_content:
+        save_section()
+    return extracted_sections
+
+
+def build_corpus(size, seed=7):
+    """
+    Derive a corpus of raw resume texts from the fixture resume.
+
+    Args:
+        size (int): Number of resumes
+        seed (int): Random seed, so runs are comparable
+
+    Returns:
+        list: Raw resume texts as PDF extraction would return them
+    """
+    with open(os.path.join(FIXTURES_DIR, 'resume.txt'), encoding='utf-8') as f:
+        base = f.read()
+
+    # Split the fixture into (heading, body) blocks
+    blocks = re.split(r'\n(?=[A-Z]{4,}\n)', base)
+    header, sections = blocks[0], blocks[1:]
+
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        chosen = sections[:]
+        rng.shuffle(chosen)
+        parts = [header.replace('Jane Citizen', rng.choice(NAMES))]
+        for block in chosen:
+            heading, _, body = block.partition('\n')
+            parts.append(rng.choice(HEADINGS.get(heading, [heading])) + '\n' + body)
+        text = '\n'.join(parts)
+
+        # Sprinkle extraction noise between words
+        words = text.split(' ')
+        for position in rng.sample(range(len(words)), k=min(len(words), len(words) // 6)):
+            words[position] += rng.choice(NOISE)
+        corpus.append(' '.join(words) * rng.randint(1, 3))
+    return corpus
+
+
+def time_run(function, corpus, iterations):
+    """
+    Time a function over the whole corpus.
+
+    Returns:
+        tuple: (best time per resume in microseconds, list of outputs)
+    """
+    outputs = [function(text) for text in corpus]  # Warm up
+    best = float('inf')
+    for _ in range(iterations):
+        started = time.perf_counter()
+        for text in corpus:
+            function(text)
+        best = min(best, time.perf_counter() - started)
+    return best / len(corpus) * 1e6, outputs
+
+
+def main():
+    """Run the benchmark and print a table of per-resume times."""
+    parser = argparse.ArgumentParser(description='Benchmark resume text cleaning and section splitting')
+    parser.add_argument('--resumes', type=int, default=300, help='Number of resumes in the corpus')
+    parser.add_argument('--iterations', type=int, default=5, help='Timed passes over the corpus')
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.resumes)
+    size_kb = sum(len(text) for text in corpus) / len(corpus) / 1024
+    print(f"[+] {len(corpus)} resumes, {size_kb:.1f} KB of text each on average")
+
+    clean_text = lambda text: ResumeParser._clean_text(None, text)
+    cleaned = [clean_text(text) for text in corpus]
+
+    rows = []
+    for label, legacy, current, inputs in [
+        ('clean text', legacy_clean_text, clean_text, corpus),
+        ('split sections', legacy_split_sections, split_sections, cleaned),
+        ('clean + split', lambda text: legacy_split_sections(legacy_clean_text(text)),
+         lambda text: split_sections(clean_text(text)), corpus),
+    ]:
+        legacy_us, legacy_outputs = time_run(legacy, inputs, args.iterations)
+        current_us, current_outputs = time_run(current, inputs, args.iterations)
+        rows.append([label, f"{legacy_us:.0f}", f"{current_us:.0f}", f"{legacy_us / current_us:.1f}x",
+                     'yes' if legacy_outputs == current_outputs else 'NO'])
+
+    print(tabulate(rows, headers=['Step', 'Before (us/resume)', 'After (us/resume)', 'Speedup', 'Same output'],
+                   tablefmt='pretty'))
+
+
+if __name__ == "__main__":
+    main()
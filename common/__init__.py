@@ -0,0 +1 @@
+"""Common package for the job matcher system."""
\ No newline at end of file
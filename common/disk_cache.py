@@ -0,0 +1,228 @@
+"""
+Disk Cache
+
+This module provides a small SQLite-backed key/value cache used to persist
+expensive results (model responses, company lookups, parsed documents) between
+pipeline runs. Values are stored as zlib-compressed JSON and support a TTL as
+well as size-based (least recently used) eviction.
+"""
+
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+
+
+def make_key(*parts):
+    """
+    Build a stable content-addressed key from the given parts.
+
+    Args:
+        *parts: Strings, bytes or other values to hash (converted with str())
+
+    Returns:
+        str: Hex SHA-256 digest of the length-prefixed parts
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        data = part if isinstance(part, bytes) else str(part).encode('utf-8', errors='replace')
+        # Length-prefix each part so ('ab', 'c') and ('a', 'bc') never collide
+        digest.update(len(data).to_bytes(8, 'big'))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """Thread-safe SQLite key/value cache with TTL and LRU eviction."""
+
+    # Run the (comparatively expensive) eviction check every N writes
+    EVICT_EVERY = 50
+
+    def __init__(self, path, namespace='default', ttl=None, max_entries=None, max_bytes=None):
+        """
+        Initialize the disk cache.
+
+        Args:
+            path (str): Path of the SQLite database file
+            namespace (str): Logical namespace, lets several caches share one file
+            ttl (float, optional): Default time-to-live in seconds (None = never expires)
+            max_entries (int, optional): Maximum number of entries kept in this namespace
+            max_bytes (int, optional): Maximum total compressed size kept in this namespace
+        """
+        self.path = path
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                expires_at REAL,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+        self._conn.execute('CREATE INDEX IF NOT EXISTS cache_lru ON cache (namespace, accessed_at)')
+        self._conn.commit()
+
+    def get(self, key, default=None):
+        """
+        Look up a value by key.
+
+        Args:
+            key (str): Cache key
+            default: Value returned on a miss or expired entry
+
+        Returns:
+            The cached value, or default if missing or expired
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?',
+                (self.namespace, key)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return default
+
+            value, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                self._conn.execute('DELETE FROM cache WHERE namespace = ? AND key = ?', (self.namespace, key))
+                self._conn.commit()
+                self.misses += 1
+                return default
+
+            self._conn.execute(
+                'UPDATE cache SET accessed_at = ? WHERE namespace = ? AND key = ?',
+                (now, self.namespace, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+
+        return json.loads(zlib.decompress(value).decode('utf-8'))
+
+    def set(self, key, value, ttl=None):
+        """
+        Store a JSON-serialisable value.
+
+        Args:
+            key (str): Cache key
+            value: JSON-serialisable value
+            ttl (float, optional): Time-to-live in seconds, overrides the default TTL
+        """
+        now = time.time()
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = now + ttl if ttl is not None else None
+        blob = zlib.compress(json.dumps(value, default=str).encode('utf-8'))
+
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO cache (namespace, key, value, size, created_at, accessed_at, expires_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (self.namespace, key, blob, len(blob), now, now, expires_at)
+            )
+            self._conn.commit()
+            self._writes += 1
+            if self._writes % self.EVICT_EVERY == 0:
+                self._evict_locked()
+
+    def delete(self, key):
+        """Remove a single entry."""
+        with self._lock:
+            self._conn.execute('DELETE FROM cache WHERE namespace = ? AND key = ?', (self.namespace, key))
+            self._conn.commit()
+
+    def clear(self):
+        """Remove every entry in this namespace."""
+        with self._lock:
+            self._conn.execute('DELETE FROM cache WHERE namespace = ?', (self.namespace,))
+            self._conn.commit()
+
+    def evict(self):
+        """Drop expired entries and enforce the entry/size limits."""
+        with self._lock:
+            self._evict_locked()
+
+    def _evict_locked(self):
+        """Eviction body; the caller must hold the lock."""
+        self._conn.execute(
+            'DELETE FROM cache WHERE namespace = ? AND expires_at IS NOT NULL AND expires_at <= ?',
+            (self.namespace, time.time())
+        )
+
+        if self.max_entries is not None:
+            count = self._conn.execute(
+                'SELECT COUNT(*) FROM cache WHERE namespace = ?', (self.namespace,)
+            ).fetchone()[0]
+            if count > self.max_entries:
+                self._conn.execute(
+                    'DELETE FROM cache WHERE namespace = ? AND key IN ('
+                    'SELECT key FROM cache WHERE namespace = ? ORDER BY accessed_at LIMIT ?)',
+                    (self.namespace, self.namespace, count - self.max_entries)
+                )
+
+        if self.max_bytes is not None:
+            total = self._conn.execute(
+                'SELECT COALESCE(SUM(size), 0) FROM cache WHERE namespace = ?', (self.namespace,)
+            ).fetchone()[0]
+            if total > self.max_bytes:
+                # Walk entries from least recently used until enough space is freed
+                excess = total - self.max_bytes
+                doomed = []
+                for key, size in self._conn.execute(
+                    'SELECT key, size FROM cache WHERE namespace = ? ORDER BY accessed_at', (self.namespace,)
+                ):
+                    doomed.append((self.namespace, key))
+                    excess -= size
+                    if excess <= 0:
+                        break
+                self._conn.executemany('DELETE FROM cache WHERE namespace = ? AND key = ?', doomed)
+
+        self._conn.commit()
+
+    def stats(self):
+        """
+        Return usage statistics for this namespace.
+
+        Returns:
+            dict: Hits, misses, hit rate, entry count and stored bytes
+        """
+        with self._lock:
+            entries, size = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache WHERE namespace = ?', (self.namespace,)
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': entries,
+            'bytes': size,
+        }
+
+    def close(self):
+        """Run a final eviction pass and close the database connection."""
+        with self._lock:
+            self._evict_locked()
+            self._conn.close()
@@ -0,0 +1,194 @@
+"""
+HTTP Response Cache
+
+This module keeps job detail pages in the disk cache between runs. A cached
+page is served without any network call while it is fresh; once stale, the
+next request carries the stored ETag / Last-Modified validators and a
+304 Not Modified answer reuses the stored body. Bodies are compressed by the
+underlying DiskCache, which also evicts the least recently used pages once
+the namespace grows past its byte limit.
+"""
+
+import re
+import time
+import threading
+from urllib.parse import urlsplit, urlunsplit
+
+# Response headers kept with the cached body
+STORED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Cache-Control')
+
+MAX_AGE_PATTERN = re.compile(r'max-age=(\d+)')
+
+
+class CachedResponse:
+    """Response served from the cache, exposing the attributes the fetchers use."""
+
+    def __init__(self, url, entry, revalidated=False):
+        """
+        Initialize the response.
+
+        Args:
+            url (str): Requested URL
+            entry (dict): Cache entry with 'status_code', 'text' and 'headers'
+            revalidated (bool): Whether the server confirmed the entry with a 304
+        """
+        self.url = url
+        self.status_code = entry['status_code']
+        self.text = entry['text']
+        self.headers = dict(entry.get('headers') or {})
+        self.from_cache = True
+        self.revalidated = revalidated
+
+    @property
+    def content(self):
+        return self.text.encode('utf-8')
+
+    def raise_for_status(self):
+        """Cached entries are successful responses, so there is nothing to raise."""
+
+
+class HttpCache:
+    """Caches GET response bodies by URL with freshness and conditional revalidation."""
+
+    def __init__(self, cache, freshness=24 * 3600, ignore_query=True):
+        """
+        Initialize the HTTP cache.
+
+        Args:
+            cache (DiskCache): Disk cache holding the pages (its TTL bounds how long a
+                               stale page is kept for revalidation, max_bytes bounds its size)
+            freshness (float): Seconds a page is served without contacting the server,
+                               unless the response carries its own Cache-Control max-age
+            ignore_query (bool): Key pages by URL without the query string, so tracking
+                                 parameters on job links do not defeat the cache
+        """
+        self.cache = cache
+        self.freshness = freshness
+        self.ignore_query = ignore_query
+
+        self.fresh_hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.stored = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, url):
+        """
+        Find the cached entry for a URL.
+
+        Args:
+            url (str): URL about to be requested
+
+        Returns:
+            tuple: (response, entry). response is a CachedResponse when the entry is
+                   fresh and no request is needed; otherwise it is None and entry is the
+                   stale entry to revalidate (or None when the URL is not cached).
+        """
+        entry = self.cache.get(self._key(url))
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            return None, None
+
+        if entry['fresh_until'] > time.time():
+            with self._lock:
+                self.fresh_hits += 1
+                self.bytes_saved += entry['size']
+            return CachedResponse(url, entry), entry
+        return None, entry
+
+    def conditional_headers(self, entry, headers):
+        """
+        Add the validators of a stale entry to the request headers.
+
+        Args:
+            entry (dict, optional): Entry returned by lookup()
+            headers (dict): Request headers
+
+        Returns:
+            dict: Headers including If-None-Match / If-Modified-Since when available
+        """
+        if not entry:
+            return headers
+        headers = dict(headers)
+        stored = entry.get('headers') or {}
+        if stored.get('ETag'):
+            headers['If-None-Match'] = stored['ETag']
+        if stored.get('Last-Modified'):
+            headers['If-Modified-Since'] = stored['Last-Modified']
+        return headers
+
+    def update(self, url, entry, response):
+        """
+        Feed a network response back into the cache.
+
+        A 304 refreshes the stale entry and returns it as a CachedResponse; a 200
+        is stored. Any other status is passed through untouched.
+
+        Args:
+            url (str): Requested URL
+            entry (dict, optional): Entry returned by lookup()
+            response: requests or httpx response
+
+        Returns:
+            The response the caller should use
+        """
+        if response.status_code == 304 and entry:
+            # Validators may be updated on a 304
+            for name in ('ETag', 'Last-Modified', 'Cache-Control'):
+                if response.headers.get(name):
+                    entry['headers'][name] = response.headers[name]
+            entry['fresh_until'] = time.time() + self._lifetime(entry['headers'])
+            self.cache.set(self._key(url), entry)
+            with self._lock:
+                self.revalidated += 1
+                self.bytes_saved += entry['size']
+            return CachedResponse(url, entry, revalidated=True)
+
+        if response.status_code == 200 and response.text:
+            headers = {name: response.headers[name] for name in STORED_HEADERS if response.headers.get(name)}
+            self.cache.set(self._key(url), {
+                'status_code': 200,
+                'text': response.text,
+                'headers': headers,
+                'size': len(response.content),
+                'fresh_until': time.time() + self._lifetime(headers),
+            })
+            with self._lock:
+                self.stored += 1
+        return response
+
+    def _key(self, url):
+        """Cache key of a URL (fragment and, optionally, query string removed)."""
+        parts = urlsplit(url)
+        query = '' if self.ignore_query else parts.query
+        return urlunsplit((parts.scheme, parts.netloc, parts.path, query, ''))
+
+    def _lifetime(self, headers):
+        """Freshness lifetime in seconds: the response's max-age, or the configured default."""
+        match = MAX_AGE_PATTERN.search(headers.get('Cache-Control') or '')
+        if match and int(match.group(1)) > 0:
+            return int(match.group(1))
+        return self.freshness
+
+    def stats(self):
+        """
+        Return cache effectiveness for this run.
+
+        Returns:
+            dict: Fresh hits, 304 revalidations, misses, stored pages, requests and
+                  bytes saved, plus the disk usage of the namespace
+        """
+        disk = self.cache.stats()
+        with self._lock:
+            return {
+                'fresh_hits': self.fresh_hits,
+                'revalidated': self.revalidated,
+                'misses': self.misses,
+                'stored': self.stored,
+                'requests_saved': self.fresh_hits,
+                'bytes_saved': self.bytes_saved,
+                'entries': disk['entries'],
+                'bytes': disk['bytes'],
+            }
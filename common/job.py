@@ -0,0 +1,37 @@
+"""
+Job Record
+
+This module holds the helpers for the job postings travelling through the
+pipeline. Postings stay plain dicts: fetchers create them, the Glassdoor
+enricher and the Gemini matcher add their results with update(), and the
+output step converts a list of them to a DataFrame.
+
+Values repeated across thousands of postings (company, location, source,
+criteria) are interned when a fetcher creates or completes a posting, so all
+postings share one string object per distinct value instead of one per job.
+"""
+
+import sys
+
+# String fields whose values repeat across postings
+INTERNED_FIELDS = frozenset((
+    'source', 'company', 'location', 'date_posted', 'seniority', 'employment_type', 'job_function',
+    'industries', 'search_keyword',
+))
+
+
+def intern_job(job):
+    """
+    Intern the repeated string values of a job posting in place.
+
+    Args:
+        job (dict): Job posting
+
+    Returns:
+        dict: The same posting, for use in return statements
+    """
+    for field in INTERNED_FIELDS:
+        value = job.get(field)
+        if type(value) is str:
+            job[field] = sys.intern(value)
+    return job
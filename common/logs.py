@@ -0,0 +1,60 @@
+"""
+Structured Logging
+
+This module configures the logging used across the job matcher. Every module
+logs through logging.getLogger(__name__); the console format stays the plain
+progress lines the pipeline always printed, while the JSON format writes one
+object per line with the timestamp, level, logger, message and any fields
+passed through `extra=`, so a run's log can be filtered and aggregated.
+"""
+
+import sys
+import json
+import logging
+from datetime import datetime, timezone
+
+# Attributes every LogRecord has; anything else was passed through `extra=`
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+# Libraries that log every request at INFO level
+QUIET_LOGGERS = ('httpx', 'httpcore', 'urllib3')
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as single-line JSON objects including their extra fields."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'message': record.getMessage().strip(),
+        }
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRIBUTES and not name.startswith('_'):
+                entry[name] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(json_format=False, level='INFO', stream=None):
+    """
+    Configure the root logger for a run.
+
+    Args:
+        json_format (bool): Write JSON lines instead of plain progress lines
+        level (str): Minimum level to log
+        stream (file, optional): Output stream; defaults to stdout
+    """
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(JsonFormatter() if json_format else logging.Formatter('%(message)s'))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+
+    for name in QUIET_LOGGERS:
+        logging.getLogger(name).setLevel(logging.WARNING)
@@ -0,0 +1,299 @@
+"""
+Run Metrics
+
+This module collects the instrumentation of a pipeline run: counters (jobs per
+stage, retries, cache hits, bytes received), gauges and latency histograms of
+every outbound request (LinkedIn and SEEK search and detail pages, Google CSE
+queries, Gemini calls) and of the work done in each pipeline stage.
+
+A process-wide registry is shared by the fetchers, enrichers, matcher and
+pipeline, like the rate limiter. At the end of a run it is written as a JSON
+run report and, optionally, as a Prometheus text-format file that a
+node_exporter textfile collector can pick up. Histograms use fixed buckets, so
+recording a sample costs the same however long the run is; percentiles in the
+report are interpolated from the buckets.
+"""
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Prefix of every metric name in the Prometheus export
+PROMETHEUS_PREFIX = 'job_matcher_'
+
+
+def _label_key(labels):
+    """Hashable, order-independent key of a label set."""
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape_label(value):
+    """Escape a label value for the Prometheus text format."""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=None):
+    """Render a label key (plus extra pairs) as {name="value",...}."""
+    pairs = list(labels) + list(extra or ())
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape_label(value)}"' for name, value in pairs) + '}'
+
+
+def _write_atomic(path, text):
+    """Write a file through a temporary file, so readers never see a partial report."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary = f"{path}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(temporary, path)
+
+
+class Histogram:
+    """Fixed-bucket histogram of durations in seconds."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        """
+        Initialize the histogram.
+
+        Args:
+            buckets (tuple): Increasing upper bounds of the buckets; larger values go
+                             to an implicit +Inf bucket
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        """Record one sample."""
+        index = len(self.buckets)
+        for position, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = position
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q):
+        """
+        Estimate a quantile by linear interpolation inside its bucket.
+
+        Args:
+            q (float): Quantile between 0 and 1
+
+        Returns:
+            float: Estimated value, or None without samples
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                lower = max(lower, self.min)
+                upper = min(upper, self.max)
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.max
+
+    def cumulative(self):
+        """(upper bound, cumulative count) pairs, ending with +Inf, as Prometheus expects."""
+        pairs = []
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def summary(self):
+        """Count, sum, extremes and estimated percentiles of the samples."""
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'min': self.min,
+            'max': self.max,
+            'mean': self.sum / self.count if self.count else None,
+            'p50': self.quantile(0.5),
+            'p90': self.quantile(0.9),
+            'p99': self.quantile(0.99),
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe registry of labelled counters, gauges and latency histograms."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        """
+        Initialize an empty registry.
+
+        Args:
+            buckets (tuple): Bucket bounds used by every histogram
+        """
+        self.buckets = buckets
+        self.started_at = time.time()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name, value=1, **labels):
+        """Add to a counter."""
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        """Set a gauge to its current value."""
+        with self._lock:
+            self._gauges[(name, _label_key(labels))] = value
+
+    def observe(self, name, seconds, **labels):
+        """Record a duration in a histogram."""
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Context manager recording the duration of its block in a histogram, even if it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def record_request(self, service, kind, seconds, status='ok', size=0):
+        """
+        Record one outbound request.
+
+        Args:
+            service (str): Remote service (linkedin, seek, google_cse, gemini)
+            kind (str): Request type (search_page, detail_page, query, single, batch)
+            seconds (float): Time until the response (or error) arrived
+            status (int or str): HTTP status code or outcome
+            size (int): Bytes received
+        """
+        self.observe('request_seconds', seconds, service=service, kind=kind)
+        self.increment('requests_total', service=service, kind=kind, status=status)
+        if size:
+            self.increment('received_bytes_total', size, service=service, kind=kind)
+
+    def value(self, name, **labels):
+        """Current value of a counter or gauge (0 when never set)."""
+        key = (name, _label_key(labels))
+        with self._lock:
+            return self._counters.get(key, self._gauges.get(key, 0))
+
+    def total(self, name):
+        """Sum of a counter over all its label sets."""
+        with self._lock:
+            return sum(value for (metric, _), value in self._counters.items() if metric == name)
+
+    def histogram(self, name, **labels):
+        """Summary of one histogram, or None when it has no samples."""
+        with self._lock:
+            histogram = self._histograms.get((name, _label_key(labels)))
+            return histogram.summary() if histogram is not None else None
+
+    def report(self, run=None):
+        """
+        Build the JSON run report.
+
+        Args:
+            run (dict, optional): Run information (arguments, outcome) to include
+
+        Returns:
+            dict: Run information, counters, gauges, histogram summaries and the
+                  request types sorted by total time spent waiting on them
+        """
+        with self._lock:
+            counters = [{'name': name, 'labels': dict(labels), 'value': value}
+                        for (name, labels), value in sorted(self._counters.items())]
+            gauges = [{'name': name, 'labels': dict(labels), 'value': value}
+                      for (name, labels), value in sorted(self._gauges.items())]
+            histograms = [dict({'name': name, 'labels': dict(labels)}, **histogram.summary())
+                          for (name, labels), histogram in sorted(self._histograms.items())]
+
+        finished_at = time.time()
+        return {
+            'run': dict({
+                'started_at': self.started_at,
+                'finished_at': finished_at,
+                'duration_seconds': round(finished_at - self.started_at, 3),
+            }, **(run or {})),
+            'counters': counters,
+            'gauges': gauges,
+            'histograms': histograms,
+            # Where the run's time went, largest first
+            'time_spent': sorted(({'name': entry['name'], 'labels': entry['labels'], 'seconds': entry['sum'],
+                                   'count': entry['count']} for entry in histograms),
+                                 key=lambda entry: entry['seconds'], reverse=True),
+        }
+
+    def write_json(self, path, run=None):
+        """Write the JSON run report to a file."""
+        _write_atomic(path, json.dumps(self.report(run), indent=2, default=str) + '\n')
+
+    def to_prometheus(self):
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: Exposition text
+        """
+        lines = []
+        with self._lock:
+            for kind, metrics in (('counter', self._counters), ('gauge', self._gauges)):
+                names = sorted({name for name, _ in metrics})
+                for name in names:
+                    lines.append(f"# TYPE {PROMETHEUS_PREFIX}{name} {kind}")
+                    for (metric, labels), value in sorted(metrics.items()):
+                        if metric == name:
+                            lines.append(f"{PROMETHEUS_PREFIX}{name}{_format_labels(labels)} {value}")
+
+            for name in sorted({name for name, _ in self._histograms}):
+                lines.append(f"# TYPE {PROMETHEUS_PREFIX}{name} histogram")
+                for (metric, labels), histogram in sorted(self._histograms.items()):
+                    if metric != name:
+                        continue
+                    for bound, count in histogram.cumulative():
+                        le = '+Inf' if bound == float('inf') else repr(bound)
+                        lines.append(f"{PROMETHEUS_PREFIX}{name}_bucket{_format_labels(labels, [('le', le)])} {count}")
+                    lines.append(f"{PROMETHEUS_PREFIX}{name}_sum{_format_labels(labels)} {histogram.sum}")
+                    lines.append(f"{PROMETHEUS_PREFIX}{name}_count{_format_labels(labels)} {histogram.count}")
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        """Write the Prometheus text-format file (atomically, as textfile collectors require)."""
+        _write_atomic(path, self.to_prometheus())
+
+
+_shared_metrics = None
+_shared_lock = threading.Lock()
+
+
+def shared_metrics():
+    """Return the process-wide metrics registry used by the fetchers, enrichers and matcher."""
+    global _shared_metrics
+    with _shared_lock:
+        if _shared_metrics is None:
+            _shared_metrics = MetricsRegistry()
+        return _shared_metrics
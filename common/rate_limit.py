@@ -0,0 +1,334 @@
+"""
+Rate Limiting
+
+This module provides a token-bucket rate limiter that can be shared between
+threads and asyncio tasks. Callers reserve a token and are told how long to
+wait before using it, so the same bucket works for both time.sleep() and
+asyncio.sleep() based code.
+
+On top of it, AdaptiveRateLimiter keeps one bucket per host and adapts its
+rate with AIMD: every successful response raises the rate a little, while a
+429/403/CAPTCHA response halves it and pauses the host (honouring
+Retry-After). A process-wide instance is shared by the fetchers and enrichers.
+"""
+
+import re
+import time
+import random
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+# Response signals reported by classify_response()
+SIGNAL_OK = 'ok'
+SIGNAL_THROTTLED = 'throttled'
+SIGNAL_BLOCKED = 'blocked'
+
+THROTTLE_STATUSES = frozenset({429, 503})
+BLOCK_STATUSES = frozenset({403, 999})  # LinkedIn answers 999 when it blocks a client
+
+# Markers of CAPTCHA / bot-challenge interstitials. Only small bodies are scanned:
+# challenge pages are short, real job pages are not.
+BLOCK_MARKERS = re.compile(r'g-recaptcha|h-captcha|captcha-delivery|cf-challenge|challenge-platform'
+                           r'|/checkpoint/challenge|please verify you are a human', re.IGNORECASE)
+BODY_SCAN_LIMIT = 50000
+
+
+def parse_retry_after(value):
+    """
+    Parse a Retry-After header.
+
+    Args:
+        value (str): Header value, either seconds or an HTTP date
+
+    Returns:
+        float: Seconds to wait, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+def classify_response(status_code, body=None):
+    """
+    Classify a response as ok, throttled or blocked.
+
+    Args:
+        status_code (int): HTTP status code
+        body (str, optional): Response body, checked for CAPTCHA markers when short
+
+    Returns:
+        str: SIGNAL_OK, SIGNAL_THROTTLED or SIGNAL_BLOCKED
+    """
+    if status_code in THROTTLE_STATUSES:
+        return SIGNAL_THROTTLED
+    if status_code in BLOCK_STATUSES:
+        return SIGNAL_BLOCKED
+    if body and len(body) <= BODY_SCAN_LIMIT and BLOCK_MARKERS.search(body):
+        return SIGNAL_BLOCKED
+    return SIGNAL_OK
+
+
+def host_of(url):
+    """Return the host of a URL (a bare host name is returned unchanged)."""
+    return urlsplit(url).netloc or url
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiting requests to `rate` per second."""
+
+    def __init__(self, rate, capacity=1, jitter=0.0):
+        """
+        Initialize the token bucket.
+
+        Args:
+            rate (float): Tokens added per second (sustained requests per second)
+            capacity (float): Maximum burst size
+            jitter (float): Extra random delay of up to this many seconds added to
+                            each wait, so requests do not arrive on a fixed beat
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.jitter = jitter
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens=1.0):
+        """
+        Reserve tokens and return how long the caller must wait before using them.
+
+        The reservation is taken immediately (the bucket may go negative), which
+        keeps concurrent callers correctly spaced out.
+
+        Args:
+            tokens (float): Number of tokens to take
+
+        Returns:
+            float: Delay in seconds before the request may be sent
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+        if delay > 0 and self.jitter:
+            delay += random.uniform(0, self.jitter)
+        return delay
+
+    def set_rate(self, rate):
+        """Change the sustained rate, keeping the tokens accumulated so far."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self.rate = float(rate)
+
+    def pause(self, seconds):
+        """Make the next reservation wait at least `seconds`, with later ones spaced after it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens = min(self._tokens, 0.0) - seconds * self.rate
+
+    def acquire(self, tokens=1.0):
+        """Block the current thread until tokens are available."""
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, tokens=1.0):
+        """Wait in the event loop until tokens are available."""
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class AdaptiveRateLimiter:
+    """Per-host token buckets whose rates adapt to throttling signals (AIMD)."""
+
+    def __init__(self, rate=1.0, min_rate=0.05, max_rate=None, capacity=2, jitter=0.0,
+                 increase=0.05, decrease=0.5, backoff=30.0, max_backoff=300.0):
+        """
+        Initialize the limiter.
+
+        Args:
+            rate (float): Initial requests per second for hosts that are not configured
+            min_rate (float): Lowest rate the limiter backs off to
+            max_rate (float, optional): Highest rate reached by additive increase (default: 4x rate)
+            capacity (float): Burst size of each host's bucket
+            jitter (float): Maximum random delay added when a request is throttled by the bucket
+            increase (float): Requests per second added after each successful response
+            decrease (float): Factor applied to the rate after a throttled or blocked response
+            backoff (float): Pause (seconds) after a throttled response without Retry-After;
+                             doubles with each consecutive signal
+            max_backoff (float): Upper bound of the pause
+        """
+        self.defaults = {'rate': rate, 'min_rate': min_rate, 'max_rate': max_rate or rate * 4,
+                         'capacity': capacity, 'jitter': jitter}
+        self.increase = increase
+        self.decrease = decrease
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def configure(self, url, rate=None, min_rate=None, max_rate=None, capacity=None, jitter=None):
+        """
+        Set the limits of a host the first time it is seen.
+
+        Hosts that already have state keep their learned rate, so every fetcher
+        can call this without resetting what the others observed.
+
+        Args:
+            url (str): URL or host name
+            rate (float, optional): Initial requests per second
+            min_rate (float, optional): Lowest rate
+            max_rate (float, optional): Highest rate (default: 4x rate)
+            capacity (float, optional): Burst size
+            jitter (float, optional): Maximum random delay added to throttled requests
+        """
+        host = host_of(url)
+        with self._lock:
+            if host in self._hosts:
+                return
+            settings = dict(self.defaults)
+            if rate is not None:
+                settings['rate'] = rate
+                settings['max_rate'] = max_rate or rate * 4
+            for key, value in (('min_rate', min_rate), ('max_rate', max_rate),
+                               ('capacity', capacity), ('jitter', jitter)):
+                if value is not None:
+                    settings[key] = value
+            self._hosts[host] = self._new_host(settings)
+
+    def _new_host(self, settings):
+        return {
+            'bucket': TokenBucket(settings['rate'], settings['capacity'], jitter=settings['jitter']),
+            'min_rate': settings['min_rate'],
+            'max_rate': max(settings['max_rate'], settings['rate']),
+            'requests': 0,
+            'throttled': 0,
+            'blocked': 0,
+            'consecutive': 0,
+            'paused_until': 0.0,
+        }
+
+    def _host(self, url):
+        host = host_of(url)
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                state = self._hosts[host] = self._new_host(self.defaults)
+            return state
+
+    def reserve(self, url):
+        """
+        Reserve a request slot for a URL's host.
+
+        Returns:
+            float: Delay in seconds before the request may be sent
+        """
+        state = self._host(url)
+        with self._lock:
+            state['requests'] += 1
+        return state['bucket'].reserve()
+
+    def acquire(self, url):
+        """Block the current thread until a request to the URL's host may be sent."""
+        delay = self.reserve(url)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, url):
+        """Wait in the event loop until a request to the URL's host may be sent."""
+        delay = self.reserve(url)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def record(self, url, status_code, retry_after=None, body=None):
+        """
+        Feed a response back into the host's rate.
+
+        Args:
+            url (str): Requested URL
+            status_code (int): HTTP status code
+            retry_after (str, optional): Retry-After header value
+            body (str, optional): Response body (checked for CAPTCHA pages)
+
+        Returns:
+            str: The signal derived from the response (see classify_response)
+        """
+        signal = classify_response(status_code, body)
+        state = self._host(url)
+        bucket = state['bucket']
+
+        with self._lock:
+            if signal == SIGNAL_OK:
+                state['consecutive'] = 0
+                new_rate = min(state['max_rate'], bucket.rate + self.increase)
+                pause = 0.0
+            else:
+                state[signal] += 1
+                state['consecutive'] += 1
+                new_rate = max(state['min_rate'], bucket.rate * self.decrease)
+                pause = parse_retry_after(retry_after)
+                if pause is None:
+                    pause = min(self.max_backoff, self.backoff * 2 ** (state['consecutive'] - 1))
+                state['paused_until'] = max(state['paused_until'], time.monotonic() + pause)
+
+        if new_rate != bucket.rate:
+            bucket.set_rate(new_rate)
+        if pause:
+            bucket.pause(pause)
+        return signal
+
+    def metrics(self):
+        """
+        Current state of every host.
+
+        Returns:
+            dict: Host name to rate (requests per second), requests, throttled and
+                  blocked counts, and seconds left in the current pause
+        """
+        now = time.monotonic()
+        with self._lock:
+            return {
+                host: {
+                    'rate': state['bucket'].rate,
+                    'requests': state['requests'],
+                    'throttled': state['throttled'],
+                    'blocked': state['blocked'],
+                    'paused_for': max(0.0, state['paused_until'] - now),
+                }
+                for host, state in self._hosts.items()
+            }
+
+
+_shared_limiter = None
+_shared_lock = threading.Lock()
+
+
+def shared_rate_limiter():
+    """Return the process-wide AdaptiveRateLimiter used by the fetchers and enrichers."""
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = AdaptiveRateLimiter()
+        return _shared_limiter
@@ -9,21 +9,31 @@ import os
 import re
 import time
 import random
+import logging
 import requests
 from bs4 import BeautifulSoup
 from dotenv import load_dotenv
 from urllib.parse import urlencode, quote_plus
 
+from common.rate_limit import SIGNAL_OK, shared_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+SERPAPI_URL = 'https://serpapi.com/search'
+GLASSDOOR_URL = 'https://www.glassdoor.com'
+
 class GlassdoorEnricher:
     """Class to fetch company insights from Glassdoor."""
     
-    def __init__(self, serpapi_key=None):
+    def __init__(self, serpapi_key=None, rate_limiter=None):
         """
         Initialize the Glassdoor enricher.
         
         Args:
             serpapi_key (str, optional): SerpAPI key. If not provided,
                                         it will try to load from environment variables.
+            rate_limiter (AdaptiveRateLimiter, optional): Per-host limiter; defaults to the
+                                                          process-wide shared limiter
         """
         # Load API key from environment if not provided
         if serpapi_key is None:
@@ -32,6 +42,11 @@ class GlassdoorEnricher:
         
         self.serpapi_key = serpapi_key
         self.use_serpapi = serpapi_key is not None
+
+        # Glassdoor itself is scraped slowly; the limiter backs off further on blocks
+        self.rate_limiter = rate_limiter or shared_rate_limiter()
+        self.rate_limiter.configure(SERPAPI_URL, rate=1.0)
+        self.rate_limiter.configure(GLASSDOOR_URL, rate=0.3, min_rate=0.02, jitter=0.5)
         
         # Initialize a session for direct scraping fallback
         self.session = requests.Session()
@@ -82,13 +97,15 @@ class GlassdoorEnricher:
             }
             
             # Make API request
+            self.rate_limiter.acquire(SERPAPI_URL)
             response = requests.get(
-                'https://serpapi.com/search', 
+                SERPAPI_URL, 
                 params=params
             )
+            self.rate_limiter.record(SERPAPI_URL, response.status_code, response.headers.get('Retry-After'))
             
             if response.status_code != 200:
-                print(f"SerpAPI request failed: {response.status_code}")
+                logger.warning(f"SerpAPI request failed: {response.status_code}")
                 return self._get_default_insights()
             
             # Parse response
@@ -130,7 +147,7 @@ class GlassdoorEnricher:
             return insights
             
         except Exception as e:
-            print(f"Error getting Glassdoor insights via SerpAPI: {str(e)}")
+            logger.warning(f"Error getting Glassdoor insights via SerpAPI: {str(e)}")
             return self._get_default_insights()
     
     def _get_insights_direct(self, company_name):
@@ -178,30 +195,34 @@ class GlassdoorEnricher:
                 try:
                     # Uncomment the line below to use proxies
                     # response = self.session.get(search_url, headers=headers, cookies=cookies, proxies=proxies, timeout=10)
+                    self.rate_limiter.acquire(search_url)
                     response = self.session.get(search_url, headers=headers, cookies=cookies, timeout=10)
+                    signal = self.rate_limiter.record(search_url, response.status_code,
+                                                      response.headers.get('Retry-After'), response.text)
                     
                     # Check if request was successful
-                    if response.status_code == 200:
+                    if response.status_code == 200 and signal == SIGNAL_OK:
                         break
                     
-                    print(f"Attempt {attempt+1} failed with status code {response.status_code}")
-                    time.sleep(random.uniform(2, 5))  # Add a longer delay between retries
+                    # The limiter has already slowed down and paused the host before the next attempt
+                    logger.warning(f"Attempt {attempt+1} failed with status code {response.status_code} ({signal})")
                 except Exception as e:
-                    print(f"Request error on attempt {attempt+1}: {str(e)}")
+                    logger.warning(f"Request error on attempt {attempt+1}: {str(e)}")
                     time.sleep(random.uniform(2, 5))
             else:
                 # This executes if all attempts fail
-                print(f"Glassdoor search request failed after 3 attempts")
+                logger.warning(f"Glassdoor search request failed after 3 attempts")
+                return self._get_default_insights()
+            
+            # Check if we hit a CAPTCHA page the limiter's markers did not catch (any body size)
+            page_text = response.text.lower()
+            if "captcha" in page_text or "please verify" in page_text:
+                logger.warning("Captcha detected, please implement a captcha solving solution")
                 return self._get_default_insights()
             
             # Parse the response
             soup = BeautifulSoup(response.text, 'html.parser')
             
-            # Check if we hit a CAPTCHA page
-            if "captcha" in response.text.lower() or "please verify" in response.text.lower():
-                print("Captcha detected, please implement a captcha solving solution")
-                return self._get_default_insights()
-            
             # Extract insights
             insights = {
                 'rating': 0,
@@ -239,13 +260,10 @@ class GlassdoorEnricher:
                 if element.text.strip():
                     insights['cons'].append(element.text.strip())
             
-            # Add a longer delay to avoid rate limiting
-            time.sleep(random.uniform(2, 5))
-            
             return insights
             
         except Exception as e:
-            print(f"Error getting Glassdoor insights directly: {str(e)}")
+            logger.warning(f"Error getting Glassdoor insights directly: {str(e)}")
             return self._get_default_insights()
         
     
@@ -0,0 +1,143 @@
+"""
+Async Fetch Engine
+
+This module provides the asyncio-based HTTP engine used by the job fetchers.
+It keeps a pooled httpx.AsyncClient per proxy, caps the number of in-flight
+requests per host and spaces requests with an adaptive per-host rate limiter
+that slows down on 429/403/CAPTCHA responses, so search pagination and job
+detail retrieval can run concurrently without hammering the job sites.
+Every request is recorded in the run metrics: its latency, status and size,
+and the time it waited for the host's rate limit.
+"""
+
+import time
+import asyncio
+import itertools
+from urllib.parse import urlsplit
+
+import httpx
+
+from common.metrics import shared_metrics
+from common.rate_limit import AdaptiveRateLimiter
+
+
+class AsyncFetchEngine:
+    """Pooled async HTTP client with per-host concurrency caps and rate limits."""
+
+    def __init__(self, proxies=None, max_per_host=4, requests_per_second=1.0, burst=2,
+                 jitter=0.5, headers=None, transport=None, rate_limiter=None, metrics=None, service='http'):
+        """
+        Initialize the fetch engine.
+
+        Args:
+            proxies (list): List of proxy dictionaries in format:
+                          [{'http': 'http://user:pass@ip:port', 'https': 'https://user:pass@ip:port'}, ...]
+            max_per_host (int): Maximum number of concurrent requests to a single host
+            requests_per_second (float): Initial request rate per host (adapted to responses)
+            burst (int): Number of requests that may be sent back-to-back
+            jitter (float): Maximum random delay (seconds) added when a request is throttled
+            headers (dict, optional): Default headers sent with every request
+            transport (httpx.AsyncBaseTransport, optional): Custom transport (e.g. for replaying
+                                                            recorded responses)
+            rate_limiter (AdaptiveRateLimiter, optional): Limiter shared with other clients of
+                                                          the same hosts. A private one is
+                                                          created when omitted.
+            metrics (MetricsRegistry, optional): Run metrics; defaults to the process-wide registry
+            service (str): Service label of the recorded requests (e.g. 'linkedin')
+        """
+        self.proxies = proxies or []
+        self.max_per_host = max_per_host
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.jitter = jitter
+        self.headers = dict(headers or {})
+        self.transport = transport
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter(requests_per_second, capacity=burst, jitter=jitter)
+        self.metrics = metrics or shared_metrics()
+        self.service = service
+
+        self._clients = []
+        self._client_cycle = None
+        self._semaphores = {}
+
+    async def __aenter__(self):
+        self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def open(self):
+        """Create the pooled clients (one per proxy, or a single direct client)."""
+        limits = httpx.Limits(max_connections=self.max_per_host * 4,
+                              max_keepalive_connections=self.max_per_host * 2)
+        client_kwargs = {
+            'headers': self.headers,
+            'limits': limits,
+            'follow_redirects': True,
+        }
+        if self.transport is not None:
+            client_kwargs['transport'] = self.transport
+
+        if self.proxies:
+            for proxy in self.proxies:
+                proxy_url = proxy.get('https') or proxy.get('http')
+                self._clients.append(httpx.AsyncClient(proxy=proxy_url, **client_kwargs))
+        else:
+            self._clients.append(httpx.AsyncClient(**client_kwargs))
+        self._client_cycle = itertools.cycle(self._clients)
+
+    async def close(self):
+        """Close all pooled clients."""
+        for client in self._clients:
+            await client.aclose()
+        self._clients = []
+        self._client_cycle = None
+
+    def next_client(self):
+        """Return the next client in the proxy rotation."""
+        if self._client_cycle is None:
+            raise RuntimeError("AsyncFetchEngine is not open. Use 'async with AsyncFetchEngine(...)'.")
+        return next(self._client_cycle)
+
+    def _host_semaphore(self, url):
+        """Get (creating on first use) the concurrency cap for a URL's host."""
+        host = urlsplit(url).netloc
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.max_per_host)
+            self.rate_limiter.configure(host, rate=self.requests_per_second, capacity=self.burst, jitter=self.jitter)
+        return self._semaphores[host]
+
+    async def get(self, url, headers=None, timeout=15, client=None, kind='page'):
+        """
+        Send a GET request under the host's concurrency cap and rate limit.
+
+        The response is fed back to the rate limiter, so throttled or blocked
+        responses slow down (and pause) later requests to the same host.
+
+        Args:
+            url (str): URL to fetch
+            headers (dict, optional): Per-request headers
+            timeout (float): Request timeout in seconds
+            client (httpx.AsyncClient, optional): Client to use instead of the next in rotation
+            kind (str): Request type label of the recorded metrics (e.g. 'search_page')
+
+        Returns:
+            httpx.Response: The response (status is not checked)
+        """
+        semaphore = self._host_semaphore(url)
+        async with semaphore:
+            waited = time.perf_counter()
+            await self.rate_limiter.acquire_async(url)
+            started = time.perf_counter()
+            self.metrics.observe('rate_limit_wait_seconds', started - waited, service=self.service)
+            client = client or self.next_client()
+            try:
+                response = await client.get(url, headers=headers, timeout=timeout)
+            except httpx.HTTPError as e:
+                self.metrics.record_request(self.service, kind, time.perf_counter() - started, type(e).__name__)
+                raise
+        self.metrics.record_request(self.service, kind, time.perf_counter() - started, response.status_code,
+                                    len(response.content))
+        self.rate_limiter.record(url, response.status_code, response.headers.get('Retry-After'), response.text)
+        return response
@@ -0,0 +1,128 @@
+"""
+HTML Parsing Helpers
+
+This module holds the parser backend selection and the precompiled patterns,
+CSS selectors and SoupStrainers used by the job fetchers. Pages are parsed
+with lxml when it is installed (falling back to Python's html.parser), and
+only the job card / job description containers are turned into a tree, so
+navigation, scripts and footers are skipped during parsing.
+"""
+
+import os
+import re
+import logging
+
+import soupsieve
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml  # noqa: F401
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Tree builders in order of preference
+BACKENDS = ('lxml', 'html.parser')
+
+# LinkedIn search results
+LINKEDIN_SEARCH_CARD_CLASS = 'base-search-card'
+LINKEDIN_LIST_CARD_CLASS = re.compile(r'job-result-card|job-card-list__item|job-search-card')
+LINKEDIN_BASE_CARD_CLASS = 'base-card'
+LINKEDIN_CARD_TITLE_CLASS = re.compile(r'base-search-card__title|job-card-list__title')
+LINKEDIN_CARD_COMPANY_CLASS = re.compile(r'base-search-card__subtitle|job-card-container__company-name')
+LINKEDIN_CARD_LOCATION_CLASS = re.compile(r'job-search-card__location|job-card-meta__location')
+LINKEDIN_CARD_LINK_CLASS = re.compile(r'base-card__full-link|job-card-list__title-link')
+LINKEDIN_JOB_ID_PATTERNS = (re.compile(r'/jobs/view/(\d+)'), re.compile(r'currentJobId=(\d+)'))
+LINKEDIN_VIEW_ID_PATTERN = re.compile(r'view/(\d+)')
+DIGITS_PATTERN = re.compile(r'(\d+)')
+
+# LinkedIn job detail pages
+LINKEDIN_DESCRIPTION_CLASS = re.compile(r'description__text|show-more-less-html__markup')
+LINKEDIN_DESCRIPTION_SECTION_CLASS = re.compile(r'show-more-less-html|main-job-description')
+LINKEDIN_DESCRIPTION_MARKUP_CLASS = re.compile(r'show-more-less-html__markup|decorated-job-posting__details')
+LINKEDIN_CRITERIA_ITEM_CLASS = re.compile(r'description__job-criteria-item|job-details-jobs-unified-top-card__job-insight')
+LINKEDIN_CRITERIA_HEADER_CLASS = re.compile(
+    r'description__job-criteria-subheader|job-details-jobs-unified-top-card__job-insight-header')
+LINKEDIN_CRITERIA_VALUE_CLASS = re.compile(
+    r'description__job-criteria-text|job-details-jobs-unified-top-card__job-insight-text')
+LINKEDIN_TOP_CARD_SELECTOR = soupsieve.compile(
+    'div.topcard__flavor-indicator span, span.job-details-jobs-unified-top-card__posted-date,'
+    'figcaption.job-poster__tagline time')
+
+# SEEK search results and job pages
+SEEK_CARD_SELECTOR = soupsieve.compile('article[data-automation="normalJob"]')
+SEEK_CARD_FIELD_SELECTORS = {
+    'title': soupsieve.compile('[data-automation="jobTitle"]'),
+    'company': soupsieve.compile('[data-automation="jobCompany"]'),
+    'location': soupsieve.compile('[data-automation="jobLocation"]'),
+    'url': soupsieve.compile('a[data-automation="jobTitle"]'),
+    'date': soupsieve.compile('[data-automation="jobListingDate"]'),
+}
+SEEK_JOB_ID_PATTERN = re.compile(r'/job/(\d+)/?')
+SEEK_DESCRIPTION_SELECTOR = soupsieve.compile('[data-automation="jobAdDetails"]')
+SEEK_WORK_TYPE_SELECTOR = soupsieve.compile('[data-automation="job-detail-work-type"]')
+SEEK_SALARY_SELECTOR = soupsieve.compile('[data-automation="job-detail-salary"]')
+SEEK_DETAIL_SELECTOR = soupsieve.compile('[data-automation^="job-detail-"]')
+
+# Only these containers are built into a tree; everything else is skipped while parsing
+LINKEDIN_CARD_STRAINER = SoupStrainer(
+    ['div', 'li'],
+    class_=re.compile(r'base-search-card|base-card|job-result-card|job-card-list__item|job-search-card'))
+LINKEDIN_DETAIL_STRAINER = SoupStrainer(
+    ['div', 'section', 'li', 'span', 'figcaption'],
+    class_=re.compile(r'description__text|show-more-less-html|main-job-description|description__job-criteria-item'
+                      r'|job-details-jobs-unified-top-card__(job-insight|posted-date)'
+                      r'|topcard__flavor-indicator|job-poster__tagline'))
+SEEK_CARD_STRAINER = SoupStrainer('article', attrs={'data-automation': 'normalJob'})
+SEEK_DETAIL_STRAINER = SoupStrainer(attrs={'data-automation': re.compile(r'^(jobAdDetails$|job-detail-)')})
+
+
+def default_backend():
+    """
+    Pick the parser backend.
+
+    The JOB_MATCHER_HTML_PARSER environment variable overrides the default,
+    which is lxml when installed and html.parser otherwise.
+
+    Returns:
+        str: BeautifulSoup tree builder name
+    """
+    backend = os.getenv('JOB_MATCHER_HTML_PARSER')
+    if backend:
+        return backend
+    return 'lxml' if LXML_AVAILABLE else 'html.parser'
+
+
+class HtmlParser:
+    """Builds BeautifulSoup trees with a configurable backend and optional SoupStrainers."""
+
+    def __init__(self, backend=None, restrict=True):
+        """
+        Initialize the parser.
+
+        Args:
+            backend (str, optional): BeautifulSoup tree builder ('lxml' or 'html.parser').
+                                     Defaults to default_backend().
+            restrict (bool): Parse only the containers matched by the strainer passed to parse()
+        """
+        self.backend = backend or default_backend()
+        if self.backend == 'lxml' and not LXML_AVAILABLE:
+            logger.warning("Warning: lxml is not installed, falling back to html.parser")
+            self.backend = 'html.parser'
+        self.restrict = restrict
+
+    def parse(self, html, strainer=None):
+        """
+        Parse a page.
+
+        Args:
+            html (str): Page content
+            strainer (SoupStrainer, optional): Containers to keep (ignored when restrict is False)
+
+        Returns:
+            BeautifulSoup: Parsed document
+        """
+        parse_only = strainer if self.restrict else None
+        return BeautifulSoup(html, self.backend, parse_only=parse_only)
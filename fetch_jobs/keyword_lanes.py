@@ -0,0 +1,123 @@
+"""
+Keyword Lanes
+
+This module shares a fetcher's global job limit between keyword searches that
+run concurrently, one lane per keyword. Every lane starts with an equal share
+of the limit. A lane that runs out of results (or fails) hands its unused
+share back, and lanes that have filled their own share take jobs from it one
+at a time, always the lane with the fewest jobs first, so the limit is still
+reached when some keywords match only a few postings and the returned share
+is spread evenly. A lane that cannot take a job waits while other lanes may
+still return capacity or catch up, and stops once none can.
+
+Lanes run on one event loop, so the scheduler state needs no locking beyond
+the condition lanes wait on.
+"""
+
+import asyncio
+
+
+class FairShareScheduler:
+    """Splits a global job limit fairly between concurrent keyword lanes."""
+
+    def __init__(self, limit, lanes):
+        """
+        Initialize the scheduler.
+
+        Args:
+            limit (int): Maximum number of jobs all lanes take together
+            lanes (list): Lane names (the keywords), in priority order; when the limit does
+                          not divide evenly, earlier lanes get the extra jobs
+        """
+        lanes = list(lanes)
+        self.limit = max(0, limit)
+        base, extra = divmod(self.limit, len(lanes)) if lanes else (0, 0)
+        self.shares = {lane: base + (1 if index < extra else 0) for index, lane in enumerate(lanes)}
+        self.initial_shares = dict(self.shares)
+        self.taken = dict.fromkeys(lanes, 0)
+        self.spare = 0
+        self.finished = set()
+        self.waiting = set()
+        self._condition = asyncio.Condition()
+
+    def _has_capacity(self, lane):
+        """Whether the lane may take a job now: from its own share, or from the spare when it is behind."""
+        if self.taken[lane] < self.shares[lane]:
+            return True
+        if self.spare <= 0:
+            return False
+        return all(self.taken[lane] <= self.taken[other] for other in self.shares
+                   if other != lane and other not in self.finished)
+
+    def _starved(self, lane):
+        """
+        Whether no other lane can change the allocation any more.
+
+        That is when every other lane has finished or is waiting without capacity
+        itself. A waiting lane that has capacity was woken but has not run yet.
+        """
+        return all(other in self.finished or (other in self.waiting and not self._has_capacity(other))
+                   for other in self.shares if other != lane)
+
+    async def _wait_for_capacity(self, lane):
+        """Wait (holding the condition) until the lane has capacity; False if it never will."""
+        while not self._has_capacity(lane):
+            if self._starved(lane):
+                return False
+            self.waiting.add(lane)
+            # Lanes already waiting re-check whether they are starved now
+            self._condition.notify_all()
+            try:
+                await self._condition.wait()
+            finally:
+                self.waiting.discard(lane)
+        return True
+
+    async def wait(self, lane):
+        """
+        Wait until the lane may take another job, without taking it.
+
+        Called before requesting the next search page, so a lane that has filled
+        its share does not fetch pages it cannot use.
+
+        Returns:
+            bool: False when the limit is used up for good and the lane should stop
+        """
+        async with self._condition:
+            return await self._wait_for_capacity(lane)
+
+    async def acquire(self, lane):
+        """
+        Take one job of the limit for the lane, waiting for capacity if needed.
+
+        Returns:
+            bool: True if the lane may add the job, False when the limit is used up for good
+        """
+        async with self._condition:
+            if not await self._wait_for_capacity(lane):
+                return False
+            if self.taken[lane] >= self.shares[lane]:
+                # Borrowed from a lane that finished below its share
+                self.spare -= 1
+                self.shares[lane] += 1
+            self.taken[lane] += 1
+            # Lanes waiting for the spare may be the furthest behind now
+            self._condition.notify_all()
+            return True
+
+    async def finish(self, lane):
+        """Mark a lane as finished and hand its unused share to the other lanes."""
+        async with self._condition:
+            self.finished.add(lane)
+            self.spare += self.shares[lane] - self.taken[lane]
+            self.shares[lane] = self.taken[lane]
+            self._condition.notify_all()
+
+    def stats(self):
+        """
+        Per-lane allocation.
+
+        Returns:
+            dict: Lane name -> dict with the initial share and the jobs taken
+        """
+        return {lane: {'share': self.initial_shares[lane], 'taken': self.taken[lane]} for lane in self.shares}
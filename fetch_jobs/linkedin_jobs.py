@@ -1,16 +1,34 @@
 import requests
+import httpx
+import asyncio
 import time
 import json  
-import re
 import random
-from bs4 import BeautifulSoup
+import logging
 from urllib.parse import urlencode, quote_plus
 import itertools
 
+from common.job import intern_job
+from common.metrics import shared_metrics
+from common.rate_limit import SIGNAL_OK, classify_response, shared_rate_limiter
+from fetch_jobs.async_engine import AsyncFetchEngine
+from fetch_jobs.keyword_lanes import FairShareScheduler
+from fetch_jobs.html_parsing import (
+    HtmlParser, LINKEDIN_SEARCH_CARD_CLASS, LINKEDIN_LIST_CARD_CLASS, LINKEDIN_BASE_CARD_CLASS,
+    LINKEDIN_CARD_TITLE_CLASS, LINKEDIN_CARD_COMPANY_CLASS, LINKEDIN_CARD_LOCATION_CLASS,
+    LINKEDIN_CARD_LINK_CLASS, LINKEDIN_JOB_ID_PATTERNS, LINKEDIN_VIEW_ID_PATTERN, DIGITS_PATTERN,
+    LINKEDIN_DESCRIPTION_CLASS, LINKEDIN_DESCRIPTION_SECTION_CLASS, LINKEDIN_DESCRIPTION_MARKUP_CLASS,
+    LINKEDIN_CRITERIA_ITEM_CLASS, LINKEDIN_CRITERIA_HEADER_CLASS, LINKEDIN_CRITERIA_VALUE_CLASS,
+    LINKEDIN_TOP_CARD_SELECTOR, LINKEDIN_CARD_STRAINER, LINKEDIN_DETAIL_STRAINER
+)
+
+logger = logging.getLogger(__name__)
+
 class LinkedInJobFetcher:
     """Class to fetch job listings from LinkedIn using XHR API calls with anti-detection measures."""
 
-    def __init__(self, proxies=None, enable_anti_detection=True):
+    def __init__(self, proxies=None, enable_anti_detection=True, max_concurrency=4, requests_per_second=None,
+                 html_parser=None, transport=None, rate_limiter=None, http_cache=None, metrics=None):
         """
         Initialize the LinkedIn job fetcher with necessary headers and base URL.
         
@@ -18,8 +36,31 @@ class LinkedInJobFetcher:
             proxies (list): List of proxy dictionaries in format:
                           [{'http': 'http://user:pass@ip:port', 'https': 'https://user:pass@ip:port'}, ...]
             enable_anti_detection (bool): Enable anti-detection measures
+            max_concurrency (int): Maximum concurrent requests to LinkedIn in async mode
+            requests_per_second (float, optional): Sustained request rate in async mode.
+                                                   Defaults to 1.0 with anti-detection, 2.0 without.
+            html_parser (str, optional): BeautifulSoup backend ('lxml' or 'html.parser').
+                                         Defaults to lxml when installed.
+            transport (httpx.AsyncBaseTransport, optional): Custom transport for the async engine
+                                                            (e.g. replaying recorded responses)
+            rate_limiter (AdaptiveRateLimiter, optional): Per-host limiter; defaults to the
+                                                          process-wide shared limiter
+            http_cache (HttpCache, optional): Cache for job detail pages kept between runs
+            metrics (MetricsRegistry, optional): Run metrics; defaults to the process-wide registry
         """
         self.session = requests.Session()
+        self.html = HtmlParser(html_parser)
+        self.transport = transport
+        self.rate_limiter = rate_limiter or shared_rate_limiter()
+        self.http_cache = http_cache
+        self.metrics = metrics or shared_metrics()
+        self.max_concurrency = max_concurrency
+        self.requests_per_second = requests_per_second or (1.0 if enable_anti_detection else 2.0)
+        self._engine = None
+        self._on_job = None
+        self._known_jobs = None
+        self.skipped_known = 0
+        self.keyword_stats = {}
         self.proxies = proxies or []
         self.proxy_cycle = itertools.cycle(self.proxies) if self.proxies else None
         self.enable_anti_detection = enable_anti_detection
@@ -112,19 +153,29 @@ class LinkedInJobFetcher:
             self.general_headers['User-Agent'] = user_agent
             self.api_headers['User-Agent'] = user_agent
 
-    def _make_request(self, url, headers, **kwargs):
-        """Make a request with proxy rotation and anti-detection measures."""
+    def _create_engine(self):
+        """Create the async fetch engine used by fetch_jobs_async()."""
+        return AsyncFetchEngine(
+            proxies=self.proxies,
+            max_per_host=self.max_concurrency,
+            requests_per_second=self.requests_per_second,
+            burst=2,
+            jitter=0.5 if self.enable_anti_detection else 0.0,
+            headers=dict(self.session.headers),
+            transport=self.transport,
+            rate_limiter=self.rate_limiter,
+            metrics=self.metrics,
+            service='linkedin'
+        )
+
+    def _prepare_headers(self, headers):
+        """Count the request, rotate the user agent and randomize per-request headers."""
         self.request_count += 1
         
         # Rotate user agent every few requests
         if self.request_count % random.randint(3, 7) == 0:
             self._rotate_user_agent()
         
-        # Get proxy for this request
-        proxy = self._get_next_proxy()
-        if proxy:
-            kwargs['proxies'] = proxy
-        
         # Add anti-detection headers dynamically
         if self.enable_anti_detection:
             # Randomize some header values
@@ -141,24 +192,81 @@ class LinkedInJobFetcher:
                 track_data['displayWidth'] = random.choice([1920, 1366, 1440, 1536])
                 track_data['displayHeight'] = random.choice([1080, 768, 900, 864])
                 headers['X-Li-Track'] = json.dumps(track_data)
+
+        return headers
+
+    def _cached_response(self, url, cacheable):
+        """
+        Look up a cacheable request in the HTTP cache.
+
+        Returns:
+            tuple: (fresh cached response or None, stale entry to revalidate or None)
+        """
+        if not cacheable or self.http_cache is None:
+            return None, None
+        return self.http_cache.lookup(url)
+
+    def _cache_response(self, url, cache_entry, response, cacheable):
+        """Store a successful cacheable response (or resolve a 304) through the HTTP cache."""
+        if not cacheable or self.http_cache is None:
+            return response
+        return self.http_cache.update(url, cache_entry, response)
+
+    def _make_request(self, url, headers, cacheable=False, **kwargs):
+        """
+        Make a request with proxy rotation and anti-detection measures.
+
+        Cacheable requests (job detail pages) are answered from the HTTP cache while
+        fresh and revalidated with the stored ETag / Last-Modified once stale.
+        """
+        kind = 'detail_page' if cacheable else 'search_page'
+        # Fresh cached pages need no request at all; stale ones are revalidated
+        cached, cache_entry = self._cached_response(url, cacheable)
+        if cached is not None:
+            return cached
+
+        headers = self._prepare_headers(headers)
+        if cache_entry is not None:
+            headers = self.http_cache.conditional_headers(cache_entry, headers)
+        
+        # Get proxy for this request
+        proxy = self._get_next_proxy()
+        if proxy:
+            kwargs['proxies'] = proxy
         
+        # The shared per-host limiter is the throttle; it backs off on 429/403/CAPTCHA responses
+        self.rate_limiter.configure(url, rate=self.requests_per_second, capacity=2,
+                                    jitter=0.5 if self.enable_anti_detection else 0.0)
+
         # Make request with retry logic
         max_retries = 3
         for attempt in range(max_retries):
+            if attempt:
+                self.metrics.increment('retries_total', service='linkedin', kind=kind)
             try:
-                response = self.session.get(url, headers=headers, **kwargs)
+                waited = time.perf_counter()
+                self.rate_limiter.acquire(url)
+                started = time.perf_counter()
+                self.metrics.observe('rate_limit_wait_seconds', started - waited, service='linkedin')
+                try:
+                    response = self.session.get(url, headers=headers, **kwargs)
+                except requests.exceptions.RequestException as e:
+                    self.metrics.record_request('linkedin', kind, time.perf_counter() - started, type(e).__name__)
+                    raise
+                self.metrics.record_request('linkedin', kind, time.perf_counter() - started, response.status_code,
+                                            len(response.content))
                 
                 # Check for rate limiting or blocking
-                if response.status_code == 429:
-                    wait_time = random.uniform(30, 60)
-                    print(f"Rate limited. Waiting {wait_time:.1f} seconds...")
-                    time.sleep(wait_time)
+                signal = self.rate_limiter.record(url, response.status_code,
+                                                  response.headers.get('Retry-After'), response.text)
+                if signal != SIGNAL_OK:
+                    logger.warning(f"Request {signal} (status {response.status_code}) on attempt {attempt + 1}. Backing off...")
                     continue
                 
-                return response
+                return self._cache_response(url, cache_entry, response, cacheable)
                 
             except requests.exceptions.ProxyError:
-                print(f"Proxy error on attempt {attempt + 1}. Trying next proxy...")
+                logger.warning(f"Proxy error on attempt {attempt + 1}. Trying next proxy...")
                 proxy = self._get_next_proxy()
                 if proxy:
                     kwargs['proxies'] = proxy
@@ -170,166 +278,282 @@ class LinkedInJobFetcher:
         
         return response
 
-    def fetch_jobs(self, keywords, location, limit=100, days_ago=5):
+    async def _make_request_async(self, url, headers, timeout=15, cacheable=False):
+        """Async counterpart of _make_request() going through the fetch engine."""
+        kind = 'detail_page' if cacheable else 'search_page'
+        # Fresh cached pages need no request at all; stale ones are revalidated
+        cached, cache_entry = self._cached_response(url, cacheable)
+        if cached is not None:
+            return cached
+
+        headers = self._prepare_headers(headers)
+        if cache_entry is not None:
+            headers = self.http_cache.conditional_headers(cache_entry, headers)
+
+        # Make request with retry logic
+        max_retries = 3
+        for attempt in range(max_retries):
+            if attempt:
+                self.metrics.increment('retries_total', service='linkedin', kind=kind)
+            try:
+                # The engine rotates proxies (one pooled client per proxy) and records the request
+                response = await self._engine.get(url, headers=headers, timeout=timeout, kind=kind)
+                
+                # Check for rate limiting or blocking (the engine's limiter has already backed off)
+                signal = classify_response(response.status_code, response.text)
+                if signal != SIGNAL_OK:
+                    logger.warning(f"Request {signal} (status {response.status_code}) on attempt {attempt + 1}. Backing off...")
+                    continue
+                
+                return self._cache_response(url, cache_entry, response, cacheable)
+                
+            except httpx.ProxyError:
+                logger.warning(f"Proxy error on attempt {attempt + 1}. Trying next proxy...")
+                continue
+            except httpx.RequestError as e:
+                if attempt == max_retries - 1:
+                    raise e
+                await asyncio.sleep(random.uniform(2, 5))
+        
+        return response
+
+    def fetch_jobs(self, keywords, location, limit=100, days_ago=5, on_job=None, known_jobs=None):
         """
         Fetch job listings from LinkedIn based on specified criteria.
-        Searches each keyword separately.
+        Searches each keyword separately, all keywords at the same time.
+
+        This is a synchronous wrapper around fetch_jobs_async().
         
         Args:
             keywords (list or str): Keywords to search for
             location (str): Location to search in
             limit (int): Maximum number of jobs to fetch
             days_ago (int): Fetch jobs posted within this many days (default: 5)
+            on_job (callable, optional): Called with each job as soon as its details are fetched
+            known_jobs (object, optional): Lookup with an is_known(job_id, title, company, source) method;
+                                           known postings are skipped without fetching their details
+        """
+        return asyncio.run(self.fetch_jobs_async(keywords, location, limit=limit, days_ago=days_ago,
+                                                 on_job=on_job, known_jobs=known_jobs))
+
+    async def fetch_jobs_async(self, keywords, location, limit=100, days_ago=5, on_job=None, known_jobs=None):
+        """
+        Fetch job listings from LinkedIn concurrently.
+
+        Every keyword is searched in its own lane, and the lanes run at the same
+        time. The limit is split between them by a FairShareScheduler, so each
+        keyword gets an equal share and the shares of keywords with fewer results
+        go to the others. Within a lane search pages are walked one after another,
+        while job detail pages are fetched in the background as soon as their card
+        is parsed. Throughput is bounded by the engine's per-host concurrency cap
+        and token-bucket rate limit instead of fixed sleeps. Per-keyword yield and
+        latency are kept in keyword_stats.
+
+        Args:
+            keywords (list or str): Keywords to search for
+            location (str): Location to search in
+            limit (int): Maximum number of jobs to fetch
+            days_ago (int): Fetch jobs posted within this many days (default: 5)
+            on_job (callable, optional): Called with each job as soon as its details are fetched
+            known_jobs (object, optional): Lookup with an is_known(job_id, title, company, source) method;
+                                           known postings are skipped without fetching their details
+
+        Returns:
+            list: List of job dictionaries with details
         """
         all_jobs = []
         job_ids_seen = set()
 
         if not isinstance(keywords, list):
             keywords = [keywords]
+        keywords = list(dict.fromkeys(keywords))
+        scheduler = FairShareScheduler(limit, keywords)
+        self.keyword_stats = {}
 
-        for keyword in keywords:
-            print(f"[+] Fetching jobs for keyword: '{keyword}'")
-            if len(all_jobs) >= limit:
-                print(f"Global job limit ({limit}) reached. Stopping search for '{keyword}'.")
+        async with self._create_engine() as engine:
+            self._engine = engine
+            self._on_job = on_job
+            self._known_jobs = known_jobs
+            try:
+                # A failing lane must not cancel the others
+                outcomes = await asyncio.gather(*(self._keyword_lane_async(keyword, location, days_ago, scheduler,
+                                                                           all_jobs, job_ids_seen)
+                                                  for keyword in keywords), return_exceptions=True)
+                for keyword, outcome in zip(keywords, outcomes):
+                    if isinstance(outcome, Exception):
+                        logger.warning(f"    Keyword '{keyword}' failed: {outcome}")
+            finally:
+                self._engine = None
+                self._on_job = None
+                self._known_jobs = None
+
+        for keyword, allocation in scheduler.stats().items():
+            self.keyword_stats.setdefault(keyword, {})['share'] = allocation['share']
+        return all_jobs
+
+    async def _keyword_lane_async(self, keyword, location, days_ago, scheduler, all_jobs, job_ids_seen):
+        """Search one keyword, wait for its detail pages and record its yield and latency."""
+        logger.info(f"[+] Fetching jobs for keyword: '{keyword}'")
+        started = time.perf_counter()
+        stats = {'pages': 0, 'jobs': 0, 'known': 0, 'duplicates': 0}
+        self.keyword_stats[keyword] = stats
+        detail_tasks = []
+        try:
+            await self._search_keyword_async(keyword, location, days_ago, scheduler, all_jobs, job_ids_seen,
+                                             detail_tasks, stats)
+        finally:
+            # Whatever the lane did not use goes to the other keywords
+            await scheduler.finish(keyword)
+        stats['search_seconds'] = time.perf_counter() - started
+
+        # Wait for the detail pages still in flight; one failing must not cancel the rest
+        for outcome in await asyncio.gather(*detail_tasks, return_exceptions=True):
+            if isinstance(outcome, Exception):
+                logger.warning(f"    Error fetching job details for '{keyword}': {outcome}")
+        stats['seconds'] = time.perf_counter() - started
+
+        self.metrics.increment('keyword_jobs_total', stats['jobs'], source='linkedin', keyword=keyword)
+        self.metrics.observe('keyword_seconds', stats['seconds'], source='linkedin', keyword=keyword)
+        logger.info(f"    Keyword '{keyword}': {stats['jobs']} jobs from {stats['pages']} pages in {stats['seconds']:.1f}s "
+                    f"({stats['known']} already known, {stats['duplicates']} duplicates)",
+                    extra={'keyword': keyword, 'jobs': stats['jobs'], 'pages': stats['pages'],
+                           'seconds': round(stats['seconds'], 3)})
+
+    async def _search_keyword_async(self, keyword, location, days_ago, scheduler, all_jobs, job_ids_seen,
+                                    detail_tasks, stats):
+        """Paginate the search results for one keyword, scheduling detail fetches as cards arrive."""
+        # Parameters for the search query
+        # Note: LinkedIn's guest API params can be minimal. 'f_WT' for worldwide, 'geoId' for specific locations.
+        # Not using geoId for now to keep it simpler, relies on 'location' string.
+        search_params = {
+            'keywords': keyword,
+            'location': location,
+            # 'geoId': '92000000', # Example: Worldwide, can be more specific
+            'trk': 'public_jobs_jobs-search-bar_search-submit', # Initial tracking ID
+            'start': 0,
+            'count': 25,  # Number of jobs to fetch per request (max 25 for this API)
+            'f_TPR': f'r{days_ago * 86400}'  # Time Posted Range: r86400 = last 24 hours, r432000 = last 5 days
+        }
+        
+        limit_reached = False
+        while not limit_reached: # Loop for paginating results for the current keyword
+            if not await scheduler.wait(keyword):
+                logger.info(f"    Global job limit ({scheduler.limit}) reached during pagination for '{keyword}'.")
                 break
-            
-            # Parameters for the search query
-            # Note: LinkedIn's guest API params can be minimal. 'f_WT' for worldwide, 'geoId' for specific locations.
-            # Not using geoId for now to keep it simpler, relies on 'location' string.
-            search_params = {
-                'keywords': keyword,
-                'location': location,
-                # 'geoId': '92000000', # Example: Worldwide, can be more specific
-                'trk': 'public_jobs_jobs-search-bar_search-submit', # Initial tracking ID
-                'start': 0,
-                'count': 25,  # Number of jobs to fetch per request (max 25 for this API)
-                'f_TPR': f'r{days_ago * 86400}'  # Time Posted Range: r86400 = last 24 hours, r432000 = last 5 days
-            }
-            
-            jobs_found_for_this_keyword = 0
-            while True: # Loop for paginating results for the current keyword
-                if len(all_jobs) >= limit:
-                    print(f"    Global job limit ({limit}) reached during pagination for '{keyword}'.")
+
+            query_string = urlencode(search_params, quote_via=quote_plus)
+            url = f"{self.base_url}?{query_string}"
+            # print(f"    Fetching URL: {url}") # Uncomment for debugging
+
+            try:
+                response = await self._make_request_async(url, self.api_headers, timeout=15)
+                # print(f"    Status Code: {response.status_code}") # Uncomment for debugging
+                response.raise_for_status() # Raises HTTPStatusError for bad responses (4XX or 5XX)
+                stats['pages'] += 1
+
+                # The response from this guest API is typically HTML snippets
+                html_content = response.text
+                if not html_content.strip():
+                    logger.info(f"    Received empty response for '{keyword}' at start={search_params['start']}. Assuming no more jobs.")
                     break
 
-                query_string = urlencode(search_params, quote_via=quote_plus)
-                url = f"{self.base_url}?{query_string}"
-                # print(f"    Fetching URL: {url}") # Uncomment for debugging
+                job_cards = self._find_job_cards(html_content)
 
-                try:
-                    response = self._make_request(url, self.api_headers, timeout=15)
-                    # print(f"    Status Code: {response.status_code}") # Uncomment for debugging
-                    response.raise_for_status() # Raises HTTPError for bad responses (4XX or 5XX)
-
-                    # The response from this guest API is typically HTML snippets
-                    html_content = response.text
-                    if not html_content.strip():
-                        print(f"    Received empty response for '{keyword}' at start={search_params['start']}. Assuming no more jobs.")
-                        break
-
-                    soup = BeautifulSoup(html_content, 'html.parser')
-                    
-                    # LinkedIn uses different class names, try a few common ones for job cards
-                    job_cards = soup.find_all('div', class_='base-search-card')
-                    if not job_cards:
-                        job_cards = soup.find_all('li', class_=re.compile(r'job-result-card|job-card-list__item|job-search-card'))
-                    if not job_cards: # If still no cards, try the original selector
-                         job_cards = soup.find_all('div', class_='base-card')
-
-                    # print(f"    Found {len(job_cards)} raw job cards on page (start={search_params['start']}).") # Uncomment for debugging
-
-                    if not job_cards and search_params['start'] > 0:
-                        print(f"    No more job cards found for keyword '{keyword}' after page with start={search_params['start'] - search_params['count']}.")
-                        break
-                    elif not job_cards and search_params['start'] == 0:
-                        print(f"    No job cards found on the first page for keyword '{keyword}'.")
-                        # print(f"DEBUG Response HTML (first 500 chars): {html_content[:500]}") # For debugging
-                        break
-                    
-                    newly_added_jobs_this_page = 0
-                    for card in job_cards:
-                        if len(all_jobs) >= limit:
-                            break
-                        
-                        job_data = self._parse_job_card(card)
-                        if job_data and job_data['job_id'] not in job_ids_seen and job_data['job_id'] != "unknown":
-                            # Fetch full job details (this is resource-intensive)
-                            detailed_info = self._fetch_job_details(job_data['job_url'])
-                            if detailed_info:
-                                job_data.update(detailed_info)
-                            
-                            job_data['search_keyword'] = keyword # Add the keyword that found this job
-                            all_jobs.append(job_data)
-                            job_ids_seen.add(job_data['job_id'])
-                            newly_added_jobs_this_page += 1
-                            jobs_found_for_this_keyword +=1
-                            # print(f"      Added job: {job_data['title'][:50]}...") # Uncomment for debugging
-                            
-                            # Enhanced delay with randomization for anti-detection
-                            delay = random.uniform(0.8, 2.5) if self.enable_anti_detection else random.uniform(0.5, 1.2)
-                            time.sleep(delay)
-                    
-                    print(f"    Added {newly_added_jobs_this_page} new jobs from this page for '{keyword}'.")
-
-                    if newly_added_jobs_this_page == 0 and search_params['start'] > 0:
-                        print(f"    No new unique jobs processed from this page for '{keyword}', stopping pagination.")
-                        break
-                        
-                    if search_params['start'] == 0 and newly_added_jobs_this_page == 0 and not job_cards: # Should be caught by earlier break
-                         print(f"    No jobs found at all for '{keyword}'.")
-                         break
-
-                    # Prepare for the next page
-                    search_params['start'] += search_params['count']
-                    
-                    # IMPORTANT: Update 'trk' for pagination requests
-                    search_params['trk'] = 'public_jobs_jobs-search-results_see-more-jobs_bottom' # Critical for subsequent loads
-
-                    # LinkedIn guest search depth is limited (around 40 pages or 1000 jobs)
-                    if search_params['start'] >= 975: # Max offset is typically 975 (page 40 if count=25)
-                        print(f"    Reached LinkedIn's typical pagination depth (around 1000 results) for '{keyword}'.")
-                        break
-                    
-                    # Enhanced delay between paginated requests for anti-detection
-                    delay = random.uniform(3.0, 8.0) if self.enable_anti_detection else random.uniform(1.8, 4.0)
-                    time.sleep(delay)
-
-                except requests.exceptions.HTTPError as e:
-                    print(f"    HTTP error for '{keyword}' at start={search_params['start']}: {e}")
-                    if e.response.status_code == 400:
-                        print(f"    Received 400 Bad Request. This often means pagination limit or invalid parameters for '{keyword}'.")
-                    elif e.response.status_code == 429:
-                        print(f"    Received 429 Too Many Requests. Consider increasing delays or using proxies.")
-                    # print(f"DEBUG Response text for HTTP error:\n{e.response.text[:500]}\n") # For debugging
-                    break # Stop paginating for this keyword on error
-                except requests.exceptions.RequestException as e:
-                    print(f"    Request error for '{keyword}' at start={search_params['start']}: {e}")
+                # print(f"    Found {len(job_cards)} raw job cards on page (start={search_params['start']}).") # Uncomment for debugging
+
+                if not job_cards and search_params['start'] > 0:
+                    logger.info(f"    No more job cards found for keyword '{keyword}' after page with start={search_params['start'] - search_params['count']}.")
                     break
-                except Exception as e:
-                    print(f"    An unexpected error occurred while fetching for '{keyword}' at start={search_params['start']}: {e}")
+                elif not job_cards and search_params['start'] == 0:
+                    logger.info(f"    No job cards found on the first page for keyword '{keyword}'.")
+                    # print(f"DEBUG Response HTML (first 500 chars): {html_content[:500]}") # For debugging
                     break
-            
-            print(f"  Finished searching for '{keyword}'. Total jobs added for this keyword: {jobs_found_for_this_keyword}")
-            # Enhanced delay between different keywords for anti-detection
-            if keyword != keywords[-1]: # Avoid sleeping after the last keyword
-                delay = random.uniform(4.0, 9.0) if self.enable_anti_detection else random.uniform(2.0, 4.5)
-                time.sleep(delay)
+                
+                newly_added_jobs_this_page = 0
+                known_jobs_this_page = 0
+                for card in job_cards:
+                    job_data = self._parse_job_card(card)
+                    if job_data and job_data['job_id'] in job_ids_seen:
+                        # Already found on an earlier page or by another keyword
+                        stats['duplicates'] += 1
+                    elif job_data and self._is_known(job_data):
+                        # Evaluated in a previous run: skip the detail request
+                        job_ids_seen.add(job_data['job_id'])
+                        known_jobs_this_page += 1
+                        stats['known'] += 1
+                        self.skipped_known += 1
+                    elif job_data and job_data['job_id'] != "unknown":
+                        # Reserve the id while waiting for this keyword's share of the limit
+                        job_ids_seen.add(job_data['job_id'])
+                        if not await scheduler.acquire(keyword):
+                            job_ids_seen.discard(job_data['job_id'])
+                            limit_reached = True
+                            break
+                        job_data['search_keyword'] = keyword # Add the keyword that found this job
+                        all_jobs.append(job_data)
+                        newly_added_jobs_this_page += 1
+                        stats['jobs'] += 1
+                        # print(f"      Added job: {job_data['title'][:50]}...") # Uncomment for debugging
+
+                        # Fetch full job details in the background (this is resource-intensive)
+                        detail_tasks.append(asyncio.create_task(self._fill_job_details_async(job_data)))
+                
+                # A page of known or duplicate postings still leads to the next page;
+                # pagination only stops on a page without cards (checked above)
+                logger.info(f"    Added {newly_added_jobs_this_page} new jobs from this page for '{keyword}'"
+                            f" ({known_jobs_this_page} already known).")
+
+                # Prepare for the next page
+                search_params['start'] += search_params['count']
+                
+                # IMPORTANT: Update 'trk' for pagination requests
+                search_params['trk'] = 'public_jobs_jobs-search-results_see-more-jobs_bottom' # Critical for subsequent loads
+
+                # LinkedIn guest search depth is limited (around 40 pages or 1000 jobs)
+                if search_params['start'] >= 975: # Max offset is typically 975 (page 40 if count=25)
+                    logger.info(f"    Reached LinkedIn's typical pagination depth (around 1000 results) for '{keyword}'.")
+                    break
+
+            except httpx.HTTPStatusError as e:
+                logger.warning(f"    HTTP error for '{keyword}' at start={search_params['start']}: {e}")
+                if e.response.status_code == 400:
+                    logger.warning(f"    Received 400 Bad Request. This often means pagination limit or invalid parameters for '{keyword}'.")
+                elif e.response.status_code == 429:
+                    logger.warning(f"    Received 429 Too Many Requests after backing off. Consider using proxies.")
+                # print(f"DEBUG Response text for HTTP error:\n{e.response.text[:500]}\n") # For debugging
+                break # Stop paginating for this keyword on error
+            except httpx.RequestError as e:
+                logger.warning(f"    Request error for '{keyword}' at start={search_params['start']}: {e}")
+                break
+            except Exception as e:
+                logger.warning(f"    An unexpected error occurred while fetching for '{keyword}' at start={search_params['start']}: {e}")
+                break
         
-        return all_jobs
+    def _find_job_cards(self, html):
+        """Parse a search results page and return its job card elements."""
+        soup = self.html.parse(html, LINKEDIN_CARD_STRAINER)
+
+        # LinkedIn uses different class names, try a few common ones for job cards
+        job_cards = soup.find_all('div', class_=LINKEDIN_SEARCH_CARD_CLASS)
+        if not job_cards:
+            job_cards = soup.find_all('li', class_=LINKEDIN_LIST_CARD_CLASS)
+        if not job_cards: # If still no cards, try the original selector
+            job_cards = soup.find_all('div', class_=LINKEDIN_BASE_CARD_CLASS)
+        return job_cards
 
     def _parse_job_card(self, card):
         """Extract job information from a job card element."""
         try:
-            title_element = card.find(['h3', 'a'], class_=re.compile(r'base-search-card__title|job-card-list__title'))
+            title_element = card.find(['h3', 'a'], class_=LINKEDIN_CARD_TITLE_CLASS)
             title = title_element.text.strip() if title_element else "No Title"
 
-            company_element = card.find(['h4', 'a'], class_=re.compile(r'base-search-card__subtitle|job-card-container__company-name'))
+            company_element = card.find(['h4', 'a'], class_=LINKEDIN_CARD_COMPANY_CLASS)
             company = company_element.text.strip() if company_element else "No Company"
 
-            location_element = card.find('span', class_=re.compile(r'job-search-card__location|job-card-meta__location'))
+            location_element = card.find('span', class_=LINKEDIN_CARD_LOCATION_CLASS)
             location = location_element.text.strip() if location_element else "No Location"
 
-            job_url_element = card.find('a', class_=re.compile(r'base-card__full-link|job-card-list__title-link'))
+            job_url_element = card.find('a', class_=LINKEDIN_CARD_LINK_CLASS)
             job_url = ""
             if job_url_element and job_url_element.get('href'):
                 job_url = job_url_element.get('href').split('?')[0]
@@ -339,16 +563,16 @@ class LinkedInJobFetcher:
             # Try to get job ID from URL or data attributes
             job_id = "unknown"
             if job_url:
-                match = re.search(r'/jobs/view/(\d+)', job_url) or \
-                        re.search(r'currentJobId=(\d+)', job_url) or \
-                        re.search(r'view/(\d+)', job_url.split('/')[-1] if '/' in job_url else "") 
+                match = LINKEDIN_JOB_ID_PATTERNS[0].search(job_url) or \
+                        LINKEDIN_JOB_ID_PATTERNS[1].search(job_url) or \
+                        LINKEDIN_VIEW_ID_PATTERN.search(job_url.split('/')[-1] if '/' in job_url else "")
                 if match:
                     job_id = match.group(1)
             
             if job_id == "unknown": # Fallback to data attributes on the card
                 data_job_id = card.get('data-job-id') or card.get('data-entity-urn')
                 if data_job_id:
-                    match = re.search(r'(\d+)', str(data_job_id))
+                    match = DIGITS_PATTERN.search(str(data_job_id))
                     if match:
                         job_id = match.group(1)
             
@@ -356,7 +580,7 @@ class LinkedInJobFetcher:
             if title == "No Title" and company == "No Company" and not job_url:
                 return None
 
-            return {
+            return intern_job({
                 'source': 'LinkedIn',
                 'title': title,
                 'company': company,
@@ -366,7 +590,7 @@ class LinkedInJobFetcher:
                 'description': '', # To be filled by _fetch_job_details
                 'match_score': 0,  # Placeholder
                 'rating': 0        # Placeholder
-            }
+            })
         except Exception as e:
             # print(f"      Error parsing a job card's basic info: {str(e)}\n      Card HTML: {str(card)[:200]}") # Debug
             return None
@@ -377,36 +601,10 @@ class LinkedInJobFetcher:
             return {}
         
         try:
-            # Enhanced delay with randomization for anti-detection
-            delay = random.uniform(1.2, 3.0) if self.enable_anti_detection else random.uniform(0.7, 1.5)
-            time.sleep(delay)
-            
             # Use general headers for fetching the job detail page
-            response = self._make_request(job_url, self.general_headers, timeout=15)
+            response = self._make_request(job_url, self.general_headers, timeout=15, cacheable=True)
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            description_html_element = soup.find('div', class_=re.compile(r'description__text|show-more-less-html__markup'))
-            description = "No description available"
-            if description_html_element:
-                # get_text() is better for extracting clean text from complex HTML
-                description = description_html_element.get_text(separator='\n', strip=True)
-            else: # Fallback for other description containers if the primary one is not found
-                desc_container = soup.find('section', class_=re.compile(r'show-more-less-html|main-job-description'))
-                if desc_container:
-                    description_markup = desc_container.find('div', class_=re.compile(r'show-more-less-html__markup|decorated-job-posting__details'))
-                    if description_markup:
-                        description = description_markup.get_text(separator='\n', strip=True)
-            
-            details = {
-                'description': description,
-                'date_posted': self._extract_criterion_from_page(soup, ['Date posted', 'Posted Date']),
-                'seniority': self._extract_criterion_from_page(soup, ['Seniority level']),
-                'employment_type': self._extract_criterion_from_page(soup, ['Employment type']),
-                'job_function': self._extract_criterion_from_page(soup, ['Job function']),
-                'industries': self._extract_criterion_from_page(soup, ['Industries'])
-            }
-            return details
+            return self._parse_job_details(response.text)
 
         except requests.exceptions.RequestException as e:
             # print(f"        Network error fetching details from {job_url}: {e}") # Debug
@@ -415,20 +613,79 @@ class LinkedInJobFetcher:
             # print(f"        Error fetching/parsing job details from {job_url}: {e}") # Debug
             return {'description': f'Failed to fetch job details (parsing): {e}'}
 
+    async def _fetch_job_details_async(self, job_url):
+        """Async counterpart of _fetch_job_details(); throttling is left to the engine."""
+        if not job_url:
+            return {}
+
+        try:
+            # Use general headers for fetching the job detail page
+            response = await self._make_request_async(job_url, self.general_headers, timeout=15, cacheable=True)
+            response.raise_for_status()
+            return self._parse_job_details(response.text)
+
+        except httpx.HTTPError as e:
+            return {'description': f'Failed to fetch job details (network): {e}'}
+        except Exception as e:
+            return {'description': f'Failed to fetch job details (parsing): {e}'}
+
+    def _is_known(self, job):
+        """Whether a job card belongs to a posting evaluated in a previous run."""
+        if self._known_jobs is None:
+            return False
+        return self._known_jobs.is_known(job.get('job_id'), job.get('title'), job.get('company'), job.get('source'))
+
+    async def _fill_job_details_async(self, job_data):
+        """Fetch a job's detail page and merge it into the job dictionary."""
+        detailed_info = await self._fetch_job_details_async(job_data['job_url'])
+        if detailed_info:
+            job_data.update(detailed_info)
+            intern_job(job_data)
+        if self._on_job is not None:
+            try:
+                self._on_job(job_data)
+            except Exception as e:
+                logger.warning(f"    Error handling job {job_data.get('job_id')}: {str(e)}")
+
+    def _parse_job_details(self, html):
+        """Extract the description and job criteria from a job detail page."""
+        soup = self.html.parse(html, LINKEDIN_DETAIL_STRAINER)
+
+        description_html_element = soup.find('div', class_=LINKEDIN_DESCRIPTION_CLASS)
+        description = "No description available"
+        if description_html_element:
+            # get_text() is better for extracting clean text from complex HTML
+            description = description_html_element.get_text(separator='\n', strip=True)
+        else: # Fallback for other description containers if the primary one is not found
+            desc_container = soup.find('section', class_=LINKEDIN_DESCRIPTION_SECTION_CLASS)
+            if desc_container:
+                description_markup = desc_container.find('div', class_=LINKEDIN_DESCRIPTION_MARKUP_CLASS)
+                if description_markup:
+                    description = description_markup.get_text(separator='\n', strip=True)
+        
+        return {
+            'description': description,
+            'date_posted': self._extract_criterion_from_page(soup, ['Date posted', 'Posted Date']),
+            'seniority': self._extract_criterion_from_page(soup, ['Seniority level']),
+            'employment_type': self._extract_criterion_from_page(soup, ['Employment type']),
+            'job_function': self._extract_criterion_from_page(soup, ['Job function']),
+            'industries': self._extract_criterion_from_page(soup, ['Industries'])
+        }
+
     def _extract_criterion_from_page(self, soup, header_options):
         """Helper to extract text based on a list of possible header texts for criteria."""
         try:
             # Common structure for job criteria
-            criteria_items = soup.find_all('li', class_=re.compile(r'description__job-criteria-item|job-details-jobs-unified-top-card__job-insight'))
+            criteria_items = soup.find_all('li', class_=LINKEDIN_CRITERIA_ITEM_CLASS)
             for item in criteria_items:
-                header_el = item.find(['h3','dt'], class_=re.compile(r'description__job-criteria-subheader|job-details-jobs-unified-top-card__job-insight-header'))
+                header_el = item.find(['h3','dt'], class_=LINKEDIN_CRITERIA_HEADER_CLASS)
                 if header_el and any(opt.lower() in header_el.text.lower() for opt in header_options):
-                    value_el = item.find(['span','dd'], class_=re.compile(r'description__job-criteria-text|job-details-jobs-unified-top-card__job-insight-text'))
+                    value_el = item.find(['span','dd'], class_=LINKEDIN_CRITERIA_VALUE_CLASS)
                     if value_el:
                         return value_el.text.strip()
             
             # Fallback for information often found in the top card (e.g., posted date)
-            top_card_info_elements = soup.select('div.topcard__flavor-indicator span, span.job-details-jobs-unified-top-card__posted-date,figcaption.job-poster__tagline time')
+            top_card_info_elements = LINKEDIN_TOP_CARD_SELECTOR.select(soup)
             for el in top_card_info_elements:
                 text_content = el.text.strip()
                 if any(opt.lower() in text_content.lower() for opt in ["day", "week", "month", "hour", "ago", "posted", "on"]):
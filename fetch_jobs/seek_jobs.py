@@ -6,18 +6,32 @@ job detail pages to extract relevant information with anti-detection measures.
 """
 
 import requests
+import httpx
+import asyncio
 import time
 import random
+import logging
 import re
 import datetime
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin, quote_plus
 import itertools
 
+from common.job import intern_job
+from common.metrics import shared_metrics
+from common.rate_limit import SIGNAL_OK, classify_response, shared_rate_limiter
+from fetch_jobs.async_engine import AsyncFetchEngine
+from fetch_jobs.html_parsing import (
+    HtmlParser, SEEK_CARD_SELECTOR, SEEK_CARD_FIELD_SELECTORS, SEEK_JOB_ID_PATTERN, SEEK_DESCRIPTION_SELECTOR,
+    SEEK_WORK_TYPE_SELECTOR, SEEK_SALARY_SELECTOR, SEEK_DETAIL_SELECTOR, SEEK_CARD_STRAINER, SEEK_DETAIL_STRAINER
+)
+
+logger = logging.getLogger(__name__)
+
 class SeekJobFetcher:
     """Class to fetch job listings from SEEK website with anti-detection measures."""
     
-    def __init__(self, proxies=None, enable_anti_detection=True):
+    def __init__(self, proxies=None, enable_anti_detection=True, max_concurrency=4, requests_per_second=None,
+                 html_parser=None, transport=None, rate_limiter=None, http_cache=None, metrics=None):
         """
         Initialize the SEEK job fetcher with necessary headers and base URL.
         
@@ -25,8 +39,30 @@ class SeekJobFetcher:
             proxies (list): List of proxy dictionaries in format:
                           [{'http': 'http://user:pass@ip:port', 'https': 'https://user:pass@ip:port'}, ...]
             enable_anti_detection (bool): Enable anti-detection measures
+            max_concurrency (int): Maximum concurrent requests to SEEK in async mode
+            requests_per_second (float, optional): Sustained request rate in async mode.
+                                                   Defaults to 1.0 with anti-detection, 2.0 without.
+            html_parser (str, optional): BeautifulSoup backend ('lxml' or 'html.parser').
+                                         Defaults to lxml when installed.
+            transport (httpx.AsyncBaseTransport, optional): Custom transport for the async engine
+                                                            (e.g. replaying recorded responses)
+            rate_limiter (AdaptiveRateLimiter, optional): Per-host limiter; defaults to the
+                                                          process-wide shared limiter
+            http_cache (HttpCache, optional): Cache for job detail pages kept between runs
+            metrics (MetricsRegistry, optional): Run metrics; defaults to the process-wide registry
         """
         self.session = requests.Session()
+        self.html = HtmlParser(html_parser)
+        self.transport = transport
+        self.rate_limiter = rate_limiter or shared_rate_limiter()
+        self.http_cache = http_cache
+        self.metrics = metrics or shared_metrics()
+        self.max_concurrency = max_concurrency
+        self.requests_per_second = requests_per_second or (1.0 if enable_anti_detection else 2.0)
+        self._engine = None
+        self._on_job = None
+        self._known_jobs = None
+        self.skipped_known = 0
         self.proxies = proxies or []
         self.proxy_cycle = itertools.cycle(self.proxies) if self.proxies else None
         self.enable_anti_detection = enable_anti_detection
@@ -94,19 +130,29 @@ class SeekJobFetcher:
             user_agent = random.choice(self.user_agents)
             self.headers['User-Agent'] = user_agent
 
-    def _make_request(self, url, **kwargs):
-        """Make a request with proxy rotation and anti-detection measures."""
+    def _create_engine(self):
+        """Create the async fetch engine used by fetch_jobs_async()."""
+        return AsyncFetchEngine(
+            proxies=self.proxies,
+            max_per_host=self.max_concurrency,
+            requests_per_second=self.requests_per_second,
+            burst=2,
+            jitter=0.5 if self.enable_anti_detection else 0.0,
+            headers=dict(self.session.headers),
+            transport=self.transport,
+            rate_limiter=self.rate_limiter,
+            metrics=self.metrics,
+            service='seek'
+        )
+
+    def _prepare_headers(self):
+        """Count the request, rotate the user agent and build randomized per-request headers."""
         self.request_count += 1
         
         # Rotate user agent every few requests
         if self.request_count % random.randint(3, 7) == 0:
             self._rotate_user_agent()
         
-        # Get proxy for this request
-        proxy = self._get_next_proxy()
-        if proxy:
-            kwargs['proxies'] = proxy
-        
         # Add anti-detection headers dynamically
         headers = self.headers.copy()
         if self.enable_anti_detection:
@@ -127,31 +173,81 @@ class SeekJobFetcher:
                     'https://www.google.com.au/',
                     'https://www.seek.com.au/'
                 ])
+
+        return headers
+
+    def _cached_response(self, url, cacheable):
+        """
+        Look up a cacheable request in the HTTP cache.
+
+        Returns:
+            tuple: (fresh cached response or None, stale entry to revalidate or None)
+        """
+        if not cacheable or self.http_cache is None:
+            return None, None
+        return self.http_cache.lookup(url)
+
+    def _cache_response(self, url, cache_entry, response, cacheable):
+        """Store a successful cacheable response (or resolve a 304) through the HTTP cache."""
+        if not cacheable or self.http_cache is None:
+            return response
+        return self.http_cache.update(url, cache_entry, response)
+
+    def _make_request(self, url, cacheable=False, **kwargs):
+        """
+        Make a request with proxy rotation and anti-detection measures.
+
+        Cacheable requests (job detail pages) are answered from the HTTP cache while
+        fresh and revalidated with the stored ETag / Last-Modified once stale.
+        """
+        kind = 'detail_page' if cacheable else 'search_page'
+        # Fresh cached pages need no request at all; stale ones are revalidated
+        cached, cache_entry = self._cached_response(url, cacheable)
+        if cached is not None:
+            return cached
+
+        headers = self._prepare_headers()
+        if cache_entry is not None:
+            headers = self.http_cache.conditional_headers(cache_entry, headers)
+        
+        # Get proxy for this request
+        proxy = self._get_next_proxy()
+        if proxy:
+            kwargs['proxies'] = proxy
         
+        # The shared per-host limiter is the throttle; it backs off on 429/403/CAPTCHA responses
+        self.rate_limiter.configure(url, rate=self.requests_per_second, capacity=2,
+                                    jitter=0.5 if self.enable_anti_detection else 0.0)
+
         # Make request with retry logic
         max_retries = 3
         for attempt in range(max_retries):
+            if attempt:
+                self.metrics.increment('retries_total', service='seek', kind=kind)
             try:
-                response = self.session.get(url, headers=headers, **kwargs)
+                waited = time.perf_counter()
+                self.rate_limiter.acquire(url)
+                started = time.perf_counter()
+                self.metrics.observe('rate_limit_wait_seconds', started - waited, service='seek')
+                try:
+                    response = self.session.get(url, headers=headers, **kwargs)
+                except requests.exceptions.RequestException as e:
+                    self.metrics.record_request('seek', kind, time.perf_counter() - started, type(e).__name__)
+                    raise
+                self.metrics.record_request('seek', kind, time.perf_counter() - started, response.status_code,
+                                            len(response.content))
                 
                 # Check for rate limiting or blocking
-                if response.status_code == 429:
-                    wait_time = random.uniform(30, 60)
-                    print(f"Rate limited. Waiting {wait_time:.1f} seconds...")
-                    time.sleep(wait_time)
+                signal = self.rate_limiter.record(url, response.status_code,
+                                                  response.headers.get('Retry-After'), response.text)
+                if signal != SIGNAL_OK:
+                    logger.warning(f"Request {signal} (status {response.status_code}) on attempt {attempt + 1}. Backing off...")
                     continue
                 
-                # Check for potential blocking patterns
-                if response.status_code == 403 or 'blocked' in response.text.lower():
-                    print(f"Potential blocking detected on attempt {attempt + 1}")
-                    if attempt < max_retries - 1:
-                        time.sleep(random.uniform(10, 20))
-                        continue
-                
-                return response
+                return self._cache_response(url, cache_entry, response, cacheable)
                 
             except requests.exceptions.ProxyError:
-                print(f"Proxy error on attempt {attempt + 1}. Trying next proxy...")
+                logger.warning(f"Proxy error on attempt {attempt + 1}. Trying next proxy...")
                 proxy = self._get_next_proxy()
                 if proxy:
                     kwargs['proxies'] = proxy
@@ -162,21 +258,89 @@ class SeekJobFetcher:
                 time.sleep(random.uniform(2, 5))
         
         return response
+
+    async def _make_request_async(self, url, timeout=15, cacheable=False):
+        """Async counterpart of _make_request() going through the fetch engine."""
+        kind = 'detail_page' if cacheable else 'search_page'
+        # Fresh cached pages need no request at all; stale ones are revalidated
+        cached, cache_entry = self._cached_response(url, cacheable)
+        if cached is not None:
+            return cached
+
+        headers = self._prepare_headers()
+        if cache_entry is not None:
+            headers = self.http_cache.conditional_headers(cache_entry, headers)
+
+        # Make request with retry logic
+        max_retries = 3
+        for attempt in range(max_retries):
+            if attempt:
+                self.metrics.increment('retries_total', service='seek', kind=kind)
+            try:
+                # The engine rotates proxies (one pooled client per proxy) and records the request
+                response = await self._engine.get(url, headers=headers, timeout=timeout, kind=kind)
+                
+                # Check for rate limiting or blocking (the engine's limiter has already backed off)
+                signal = classify_response(response.status_code, response.text)
+                if signal != SIGNAL_OK:
+                    logger.warning(f"Request {signal} (status {response.status_code}) on attempt {attempt + 1}. Backing off...")
+                    continue
+                
+                return self._cache_response(url, cache_entry, response, cacheable)
+                
+            except httpx.ProxyError:
+                logger.warning(f"Proxy error on attempt {attempt + 1}. Trying next proxy...")
+                continue
+            except httpx.RequestError as e:
+                if attempt == max_retries - 1:
+                    raise e
+                await asyncio.sleep(random.uniform(2, 5))
+        
+        return response
     
-    def fetch_jobs(self, keywords, location, limit=20, max_days_old=3):
+    def fetch_jobs(self, keywords, location, limit=20, max_days_old=3, on_job=None, known_jobs=None):
         """
         Fetch job listings from SEEK based on specified criteria.
+
+        This is a synchronous wrapper around fetch_jobs_async().
         
         Args:
             keywords (str): Keywords to search for (comma-separated)
             location (str): Location to search in
             limit (int): Maximum number of job listings to fetch
             max_days_old (int): Maximum age of jobs in days to include
+            on_job (callable, optional): Called with each job as soon as its details are fetched
+            known_jobs (object, optional): Lookup with an is_known(job_id, title, company, source) method;
+                                           known postings are skipped without fetching their details
         
+        Returns:
+            list: List of job dictionaries with details
+        """
+        return asyncio.run(self.fetch_jobs_async(keywords, location, limit=limit, max_days_old=max_days_old,
+                                                 on_job=on_job, known_jobs=known_jobs))
+
+    async def fetch_jobs_async(self, keywords, location, limit=20, max_days_old=3, on_job=None, known_jobs=None):
+        """
+        Fetch job listings from SEEK concurrently.
+
+        Result pages are requested one after another while the detail pages of
+        the cards already found are fetched in the background, bounded by the
+        engine's per-host concurrency cap and token-bucket rate limit.
+
+        Args:
+            keywords (str): Keywords to search for (comma-separated)
+            location (str): Location to search in
+            limit (int): Maximum number of job listings to fetch
+            max_days_old (int): Maximum age of jobs in days to include
+            on_job (callable, optional): Called with each job as soon as its details are fetched
+            known_jobs (object, optional): Lookup with an is_known(job_id, title, company, source) method;
+                                           known postings are skipped without fetching their details
+
         Returns:
             list: List of job dictionaries with details
         """
         all_jobs = []
+        detail_tasks = []
         page = 1
         
         # Format location and keywords for URL
@@ -194,64 +358,64 @@ class SeekJobFetcher:
         keywords_param = re.sub(r'[^a-z0-9-]', '', keywords_param)
         keywords_param = re.sub(r'-+', '-', keywords_param).strip('-')
         
-        # Calculate the cutoff date
-        cutoff_date = datetime.datetime.now() - datetime.timedelta(days=max_days_old)
-        
-        while len(all_jobs) < limit:
+        async with self._create_engine() as engine:
+            self._engine = engine
+            self._on_job = on_job
+            self._known_jobs = known_jobs
             try:
-                # Construct the search URL with date filter
-                # Adding date filter directly to the URL
-                search_url = f"{self.base_url}/{keywords_param}-jobs/in-{location_param}?daterange=3&page={page}"
-                
-                # Make the request with anti-detection measures
-                response = self._make_request(search_url, timeout=15)
-                response.raise_for_status()
-                
-                # Parse job results
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # Find all job cards
-                job_cards = soup.select('article[data-automation="normalJob"]')
-                
-                if not job_cards:
-                    # No more jobs or reached the end
-                    break
-                
-                # Process each job card
-                for card in job_cards:
-                    if len(all_jobs) >= limit:
-                        break
-                    
+                while len(all_jobs) < limit:
                     try:
-                        job = self._parse_job_card(card)
-                        if job:
-                            # Check if job is within the date range
-                            if self._is_job_recent(job['date_posted'], max_days_old):
-                                # Fetch full job details
-                                job_details = self._fetch_job_details(job['job_url'])
-                                if job_details:
-                                    job.update(job_details)
-                                
-                                all_jobs.append(job)
-                                
-                                # Enhanced delay with randomization for anti-detection
-                                delay = random.uniform(1.0, 3.0) if self.enable_anti_detection else random.uniform(0.5, 1.5)
-                                time.sleep(delay)
+                        # Construct the search URL with date filter
+                        # Adding date filter directly to the URL
+                        search_url = f"{self.base_url}/{keywords_param}-jobs/in-{location_param}?daterange=3&page={page}"
+                        
+                        # Make the request with anti-detection measures
+                        response = await self._make_request_async(search_url, timeout=15)
+                        response.raise_for_status()
+                        
+                        # Parse job results
+                        job_cards = self._find_job_cards(response.text)
+                        
+                        if not job_cards:
+                            # No more jobs or reached the end
+                            break
+                        
+                        # Process each job card
+                        for card in job_cards:
+                            if len(all_jobs) >= limit:
+                                break
                             
+                            try:
+                                job = self._parse_job_card(card)
+                                # Check if job is within the date range
+                                if job and self._is_job_recent(job['date_posted'], max_days_old):
+                                    if self._is_known(job):
+                                        # Evaluated in a previous run: skip the detail request
+                                        self.skipped_known += 1
+                                        continue
+                                    all_jobs.append(job)
+                                    # Fetch full job details in the background
+                                    detail_tasks.append(asyncio.create_task(self._fill_job_details_async(job)))
+                                    
+                            except Exception as e:
+                                logger.warning(f"Error processing SEEK job card: {str(e)}")
+                                continue
+                        
+                        # Move to the next page
+                        page += 1
+                        
                     except Exception as e:
-                        print(f"Error processing SEEK job card: {str(e)}")
-                        continue
-                
-                # Move to the next page
-                page += 1
-                
-                # Enhanced delay between pages for anti-detection
-                delay = random.uniform(2.0, 6.0) if self.enable_anti_detection else random.uniform(1.0, 3.0)
-                time.sleep(delay)
-                
-            except Exception as e:
-                print(f"Error fetching SEEK jobs: {str(e)}")
-                break
+                        logger.warning(f"Error fetching SEEK jobs: {str(e)}")
+                        break
+
+                # Wait for the detail pages still in flight; one failing must not cancel the rest
+                for outcome in await asyncio.gather(*detail_tasks, return_exceptions=True):
+                    if isinstance(outcome, Exception):
+                        logger.warning(f"Error fetching SEEK job details: {str(outcome)}")
+            finally:
+                self._engine = None
+                self._on_job = None
+                self._known_jobs = None
         
         return all_jobs
     
@@ -297,38 +461,43 @@ class SeekJobFetcher:
             return True
             
         except Exception as e:
-            print(f"Error parsing job date '{date_string}': {str(e)}")
+            logger.warning(f"Error parsing job date '{date_string}': {str(e)}")
             return True  # Keep by default in case of parsing errors
     
+    def _find_job_cards(self, html):
+        """Parse a search results page and return its job card elements."""
+        soup = self.html.parse(html, SEEK_CARD_STRAINER)
+        return SEEK_CARD_SELECTOR.select(soup)
+
     def _parse_job_card(self, card):
         """Extract job information from a job card element."""
         try:
             # Extract job title
-            title_element = card.select_one('[data-automation="jobTitle"]')
+            title_element = SEEK_CARD_FIELD_SELECTORS['title'].select_one(card)
             title = title_element.text.strip() if title_element else "No Title"
             
             # Extract company name
-            company_element = card.select_one('[data-automation="jobCompany"]')
+            company_element = SEEK_CARD_FIELD_SELECTORS['company'].select_one(card)
             company = company_element.text.strip() if company_element else "No Company"
             
             # Extract location
-            location_element = card.select_one('[data-automation="jobLocation"]')
+            location_element = SEEK_CARD_FIELD_SELECTORS['location'].select_one(card)
             location = location_element.text.strip() if location_element else "No Location"
             
             # Extract job URL
-            url_element = card.select_one('a[data-automation="jobTitle"]')
+            url_element = SEEK_CARD_FIELD_SELECTORS['url'].select_one(card)
             job_url = urljoin(self.base_url, url_element['href']) if url_element and 'href' in url_element.attrs else None
             
             # Extract job ID from URL
-            job_id_match = re.search(r'/job/(\d+)/?', job_url) if job_url else None
+            job_id_match = SEEK_JOB_ID_PATTERN.search(job_url) if job_url else None
             job_id = job_id_match.group(1) if job_id_match else "unknown"
             
             # Extract listing date if available
-            date_element = card.select_one('[data-automation="jobListingDate"]')
+            date_element = SEEK_CARD_FIELD_SELECTORS['date'].select_one(card)
             date_posted = date_element.text.strip() if date_element else "Unknown"
             
             # Basic job dictionary
-            job = {
+            job = intern_job({
                 'source': 'SEEK',
                 'title': title,
                 'company': company,
@@ -339,11 +508,11 @@ class SeekJobFetcher:
                 'description': '',
                 'match_score': 0,
                 'rating': 0
-            }
+            })
             
             return job
         except Exception as e:
-            print(f"Error parsing SEEK job card: {str(e)}")
+            logger.warning(f"Error parsing SEEK job card: {str(e)}")
             return None
     
     def _fetch_job_details(self, job_url):
@@ -352,48 +521,79 @@ class SeekJobFetcher:
             return {}
             
         try:
-            # Enhanced delay with randomization for anti-detection
-            delay = random.uniform(1.0, 2.5) if self.enable_anti_detection else random.uniform(0.5, 1.0)
-            time.sleep(delay)
-            
-            response = self._make_request(job_url, timeout=15)
+            response = self._make_request(job_url, timeout=15, cacheable=True)
             response.raise_for_status()
+            return self._parse_job_details(response.text)
             
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Extract job description
-            description_element = soup.select_one('[data-automation="jobAdDetails"]')
-            description = description_element.text.strip() if description_element else "No description available"
-            
-            # Extract employment type if available
-            employment_type = "Not specified"
-            employment_element = soup.select_one('[data-automation="job-detail-work-type"]')
-            if employment_element:
-                employment_type = employment_element.text.strip()
-            
-            # Extract salary information if available
-            salary = "Not specified"
-            salary_element = soup.select_one('[data-automation="job-detail-salary"]')
-            if salary_element:
-                salary = salary_element.text.strip()
-            
-            # Extract other details if available
-            details = {
-                'description': description,
-                'employment_type': employment_type,
-                'salary': salary
-            }
-            
-            # Look for other job details like classification, etc.
-            for bullet in soup.select('[data-automation^="job-detail-"]'):
-                try:
-                    key = bullet.get('data-automation').replace('job-detail-', '')
-                    details[key] = bullet.text.strip()
-                except:
-                    pass
-            
-            return details
-            
         except Exception as e:
-            print(f"Error fetching SEEK job details from {job_url}: {str(e)}")
+            logger.warning(f"Error fetching SEEK job details from {job_url}: {str(e)}")
+            return {'description': 'Failed to fetch job details'}
+
+    async def _fetch_job_details_async(self, job_url):
+        """Async counterpart of _fetch_job_details(); throttling is left to the engine."""
+        if not job_url:
+            return {}
+
+        try:
+            response = await self._make_request_async(job_url, timeout=15, cacheable=True)
+            response.raise_for_status()
+            return self._parse_job_details(response.text)
+
+        except Exception as e:
+            logger.warning(f"Error fetching SEEK job details from {job_url}: {str(e)}")
             return {'description': 'Failed to fetch job details'}
+
+    def _is_known(self, job):
+        """Whether a job card belongs to a posting evaluated in a previous run."""
+        if self._known_jobs is None:
+            return False
+        return self._known_jobs.is_known(job.get('job_id'), job.get('title'), job.get('company'), job.get('source'))
+
+    async def _fill_job_details_async(self, job):
+        """Fetch a job's detail page and merge it into the job dictionary."""
+        job_details = await self._fetch_job_details_async(job['job_url'])
+        if job_details:
+            job.update(job_details)
+            intern_job(job)
+        if self._on_job is not None:
+            try:
+                self._on_job(job)
+            except Exception as e:
+                logger.warning(f"Error handling SEEK job {job.get('job_id')}: {str(e)}")
+
+    def _parse_job_details(self, html):
+        """Extract the description and job detail fields from a job page."""
+        soup = self.html.parse(html, SEEK_DETAIL_STRAINER)
+        
+        # Extract job description
+        description_element = SEEK_DESCRIPTION_SELECTOR.select_one(soup)
+        description = description_element.text.strip() if description_element else "No description available"
+        
+        # Extract employment type if available
+        employment_type = "Not specified"
+        employment_element = SEEK_WORK_TYPE_SELECTOR.select_one(soup)
+        if employment_element:
+            employment_type = employment_element.text.strip()
+        
+        # Extract salary information if available
+        salary = "Not specified"
+        salary_element = SEEK_SALARY_SELECTOR.select_one(soup)
+        if salary_element:
+            salary = salary_element.text.strip()
+        
+        # Extract other details if available
+        details = {
+            'description': description,
+            'employment_type': employment_type,
+            'salary': salary
+        }
+        
+        # Look for other job details like classification, etc.
+        for bullet in SEEK_DETAIL_SELECTOR.select(soup):
+            try:
+                key = bullet.get('data-automation').replace('job-detail-', '')
+                details[key] = bullet.text.strip()
+            except:
+                pass
+        
+        return details
@@ -7,13 +7,168 @@ to enrich job data with insights about company culture and employee satisfaction
 
 import os
 import re
+import time
+import logging
+import threading
 import requests
+from urllib.parse import urlsplit
+from concurrent.futures import Future
 from dotenv import load_dotenv
 
+from common.metrics import shared_metrics
+from common.rate_limit import shared_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+CSE_URL = "https://www.googleapis.com/customsearch/v1"
+# Initial Google CSE request rate; the shared limiter adapts it to 429 responses
+CSE_REQUESTS_PER_SECOND = 2.0
+
+# Legal-form suffixes ignored when deciding whether two company names are the same company.
+# Only trailing ones are removed: "SA Power Networks" and "Co-op Group" keep their first word.
+COMPANY_SUFFIXES = re.compile(
+    r'(?:\s+(?:pty|ltd|limited|inc|incorporated|llc|plc|corp|corporation|co|company|gmbh|ag|sa|bv))+$'
+)
+
+# A rating between 0 and 5 with at most two decimals, not part of a larger number or an
+# amount, and not the scale of another rating ("4.1/5", "3.9 out of 5")
+RATING_NUMBER = r'(?<![\d.,$/])(?<!out of )[0-5](?:\.\d{1,2})?(?![\d,%]|\.\d)'
+# The same with a required decimal part, for numbers that are only near a rating word
+RATING_DECIMAL = r'(?<![\d.,$/])(?<!out of )[0-5]\.\d{1,2}(?![\d,%]|\.\d)'
+
+# Rating phrasings and their ranks, most specific first. {n} is the rating itself.
+RATING_PATTERNS = (
+    ('rating_out_of_5_stars', r'rating of {n} out of 5 stars', 100),
+    # "2 out of 5 jobs" is not a rating: only a few words may follow "out of 5"
+    ('out_of_5', r'{n} out of 5\b(?!\s+(?!(?:stars?|based|from|on|by|rating)\b)[a-z])', 90),
+    ('based_on_reviews', r'{n}\.?\s+(?:stars?\s+)?(?:based on|from)\s+[\d,]+\s+(?:company\s+|employee\s+)?reviews', 85),
+    ('slash_5', r'{n}\s?/\s?5\b', 80),
+    ('labelled', r'rating\s*:?\s*{n}', 70),
+    ('rated_by', r'rated {n} by', 70),
+    ('star_glyph', r'{n}\s?★', 60),
+    ('before_word', r'{n} rating', 50),
+)
+
+# Standalone decimals near rating-related words, only used when no phrasing above matches
+NEARBY_WORD_PATTERNS = (
+    ('word_before', r'(?:rating|reviews|stars|score)[^\n.]*?{n}', 20),
+    ('word_after', r'{n}(?=[^\n.]*?(?:rating|reviews|stars|score))', 20),
+)
+PATTERN_RANKS = {name: rank for name, _, rank in RATING_PATTERNS + NEARBY_WORD_PATTERNS}
+
+
+def _rating_matcher(patterns, number):
+    """
+    All phrasings in one pass; the named group that matched identifies the phrasing.
+
+    The alternation sits in a lookahead, so matches take no text and a phrasing
+    starting inside another one is still found. Every phrasing starts with a
+    digit or an r/s word, so the leading lookahead rejects most positions before
+    the alternatives are tried.
+    """
+    return re.compile(
+        '(?=[0-5rs])(?=' +
+        '|'.join(pattern.replace('{n}', f'(?P<{name}>{number})') for name, pattern, _ in patterns) +
+        ')',
+        re.IGNORECASE
+    )
+
+
+RATING_MATCHER = _rating_matcher(RATING_PATTERNS, RATING_NUMBER)
+NEARBY_WORD_MATCHER = _rating_matcher(NEARBY_WORD_PATTERNS, RATING_DECIMAL)
+
+# Score bonuses for where a rating was found
+STRUCTURED_RATING_SCORE = 100  # pagemap aggregaterating.ratingvalue
+METATAG_BONUS = 10
+GLASSDOOR_BONUS = 40
+REVIEWS_PAGE_BONUS = 20
+RESULT_POSITION_PENALTY = 2
+
+def rating_candidates(text):
+    """
+    Find every rating mentioned in a text.
+
+    Args:
+        text (str): Title, snippet or metatag value of a search result
+
+    Returns:
+        list: (rank of the phrasing, rating) pairs
+    """
+    for matcher in (RATING_MATCHER, NEARBY_WORD_MATCHER):
+        candidates = [(PATTERN_RANKS[match.lastgroup], float(match.group(match.lastgroup)))
+                      for match in matcher.finditer(text)]
+        if candidates:
+            return candidates
+    return []
+
+def extract_rating(results):
+    """
+    Pick the most credible company rating from a Google CSE response.
+
+    Every rating found in the results is scored by how it was phrased and where it
+    was found: structured pagemap data and metatags beat free text, results from
+    glassdoor.* (and its Reviews pages in particular) beat other sites, and
+    earlier results beat later ones.
+
+    Args:
+        results (dict): Decoded CSE JSON response
+
+    Returns:
+        float: Best rating, or None when no rating was found
+    """
+    best_score, best_rating = None, None
+    for position, item in enumerate(results.get('items') or []):
+        link = item.get('link', '')
+        bonus = -position * RESULT_POSITION_PENALTY
+        if 'glassdoor.' in urlsplit(link).netloc:
+            bonus += GLASSDOOR_BONUS
+            if '/Reviews/' in link:
+                bonus += REVIEWS_PAGE_BONUS
+
+        pagemap = item.get('pagemap') or {}
+        candidates = []
+        for aggregate in pagemap.get('aggregaterating') or []:
+            try:
+                rating = float(aggregate.get('ratingvalue'))
+            except (TypeError, ValueError):
+                continue
+            if 0 <= rating <= 5:
+                candidates.append((STRUCTURED_RATING_SCORE, rating))
+
+        for field in ('title', 'snippet'):
+            candidates.extend(rating_candidates(str(item.get(field) or '')))
+        for tag in pagemap.get('metatags') or []:
+            for value in tag.values():
+                candidates.extend((rank + METATAG_BONUS, rating) for rank, rating in rating_candidates(str(value)))
+
+        for rank, rating in candidates:
+            if best_score is None or rank + bonus > best_score:
+                best_score, best_rating = rank + bonus, rating
+    return best_rating
+
+def normalize_company_name(company_name):
+    """
+    Normalize a company name for caching and request coalescing.
+
+    "Atlassian Pty Ltd", "ATLASSIAN" and "Atlassian, Inc." all map to "atlassian".
+
+    Args:
+        company_name (str): Company name as shown on the job posting
+
+    Returns:
+        str: Lowercase name without punctuation or legal-form suffixes
+    """
+    name = str(company_name or '').lower().replace('&', ' and ')
+    name = ' '.join(re.sub(r'[^a-z0-9 ]+', ' ', name).split())
+    stripped = COMPANY_SUFFIXES.sub('', name)
+    # Keep the suffix if it is all there is (e.g. a company literally called "Co")
+    name = stripped if stripped.strip() else name
+    return ' '.join(name.split())
+
 class GlassdoorEnricher:
     """Class to fetch company insights from Glassdoor using Google CSE."""
     
-    def __init__(self, google_cse_key=None, google_cse_id=None):
+    def __init__(self, google_cse_key=None, google_cse_id=None, cache=None, rate_limiter=None, metrics=None):
         """
         Initialize the Glassdoor enricher with Google CSE.
         
@@ -22,19 +177,46 @@ class GlassdoorEnricher:
                                            it will try to load from environment variables.
             google_cse_id (str, optional): Google Custom Search Engine ID. If not provided,
                                           it will try to load from environment variables.
+            cache (DiskCache, optional): Persistent cache for company insights, keyed by the
+                                         normalized company name. Its TTL controls how often
+                                         a company's rating is looked up again.
+            rate_limiter (AdaptiveRateLimiter, optional): Per-host limiter; defaults to the
+                                                          process-wide shared limiter
+            metrics (MetricsRegistry, optional): Run metrics; defaults to the process-wide registry
         """
         # Load API keys from environment if not provided
         load_dotenv()
         
         self.google_cse_key = google_cse_key or os.getenv('GOOGLE_CSE_KEY')
         self.google_cse_id = google_cse_id or os.getenv('GOOGLE_CSE_ID')
+        self.cache = cache
+        self.session = requests.Session()
+        self.rate_limiter = rate_limiter or shared_rate_limiter()
+        self.rate_limiter.configure(CSE_URL, rate=CSE_REQUESTS_PER_SECOND)
+        self.metrics = metrics or shared_metrics()
+
+        # Single-flight state: one lookup per normalized company name at a time
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._memory = {}
+
+        # Statistics
+        self.lookups = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.coalesced = 0
+        self.api_calls = 0
         
         if not self.google_cse_key or not self.google_cse_id:
-            print("Warning: Google API key or CSE ID not provided. Enrichment will return default values.")
+            logger.warning("Warning: Google API key or CSE ID not provided. Enrichment will return default values.")
     
     def get_company_insights(self, company_name):
         """
         Get company insights from Glassdoor via Google CSE.
+
+        Lookups are deduplicated by normalized company name: results are served from
+        memory or the disk cache when available, and concurrent requests for the same
+        company wait for the single lookup already in flight.
         
         Args:
             company_name (str): Name of the company
@@ -44,8 +226,56 @@ class GlassdoorEnricher:
         """
         if not self.google_cse_key or not self.google_cse_id:
             return self._get_default_insights()
-            
+
+        key = normalize_company_name(company_name)
+        with self._lock:
+            self.lookups += 1
+            if key in self._memory:
+                self.memory_hits += 1
+                return dict(self._memory[key])
+
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return dict(future.result())
+
+        try:
+            insights, cacheable = self._lookup_company_insights(company_name, key)
+            if cacheable:
+                with self._lock:
+                    self._memory[key] = insights
+            future.set_result(insights)
+            return dict(insights)
+        except Exception as e:
+            future.set_result(self._get_default_insights())
+            raise e
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def _lookup_company_insights(self, company_name, key):
+        """
+        Look up insights in the disk cache, falling back to Google CSE.
+
+        Returns:
+            tuple: (insights dict, whether the result may be cached)
+        """
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                return cached, True
+
         try:
+            with self._lock:
+                self.api_calls += 1
             rating = self._get_company_rating_google_cse(company_name)
             
             # Create insights object, focusing on the rating which is what you need
@@ -56,12 +286,35 @@ class GlassdoorEnricher:
          #       'cons': [],  # Not easily available via CSE
          #       'salaries': {}  # Not easily available via CSE
             }
+
+            # A missing rating (None) means the API call failed: retry on the next run
+            if rating is not None and self.cache is not None:
+                self.cache.set(key, insights)
             
-            return insights
+            return insights, rating is not None
             
         except Exception as e:
-            print(f"Error getting Glassdoor insights via Google CSE: {str(e)}")
-            return self._get_default_insights()
+            logger.warning(f"Error getting Glassdoor insights via Google CSE: {str(e)}")
+            return self._get_default_insights(), False
+
+    def stats(self):
+        """
+        Return lookup statistics.
+
+        Returns:
+            dict: Lookups, cache hits, coalesced requests, API calls, calls saved and hit rate
+        """
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits + self.coalesced
+            return {
+                'lookups': self.lookups,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'coalesced': self.coalesced,
+                'api_calls': self.api_calls,
+                'saved_calls': self.lookups - self.api_calls,
+                'hit_rate': hits / self.lookups if self.lookups else 0.0,
+            }
     
     def _get_company_rating_google_cse(self, company_name):
         """
@@ -71,12 +324,12 @@ class GlassdoorEnricher:
             company_name (str): Name of the company
             
         Returns:
-            float: Company rating or 0 if not found
+            float: Company rating, 0 if not found, or None if the API call failed
         """
         
         query = f"{company_name} glassdoor"   # Add location to make search more specific 
         
-        url = "https://www.googleapis.com/customsearch/v1"
+        url = CSE_URL
         params = {
             "q": query,
             "cx": self.google_cse_id,
@@ -84,76 +337,28 @@ class GlassdoorEnricher:
             "num": 3,  # Get a few results to increase chances of finding ratings
         }
         
-        response = requests.get(url, params=params)
+        waited = time.perf_counter()
+        self.rate_limiter.acquire(url)
+        started = time.perf_counter()
+        self.metrics.observe('rate_limit_wait_seconds', started - waited, service='google_cse')
+        try:
+            response = self.session.get(url, params=params, timeout=15)
+        except requests.exceptions.RequestException as e:
+            self.metrics.record_request('google_cse', 'query', time.perf_counter() - started, type(e).__name__)
+            raise
+        self.metrics.record_request('google_cse', 'query', time.perf_counter() - started, response.status_code,
+                                    len(response.content))
+        # Throttled responses slow down (and pause) later lookups
+        self.rate_limiter.record(url, response.status_code, response.headers.get('Retry-After'))
         if response.status_code != 200:
-            print(f"Google CSE API returned status code {response.status_code}")
-            return 0
+            logger.warning(f"Google CSE API returned status code {response.status_code}")
+            return None
             
         results = response.json()
-        print(f"Enriched 1/1: {company_name} - ", end="")
-        
-        # First look specifically for the 5.0 rating we know is in the data
-        if "items" in results:
-            for item in results["items"]:
-                snippet = item.get("snippet", "")
-                if "5.0" in snippet and ("Mutinex" in snippet or "rating" in snippet.lower()):
-                    print(f"Rating: 5.0")
-                    return 5.0
-        
-        # More careful pattern matching as a fallback
-        if "items" in results:
-            # More selective patterns to avoid false positives
-            patterns = [
-                r"rating of ([0-9.]+) out of 5 stars",
-                r"([0-9.]+) out of 5 stars",
-                r"([0-9.]+)/5 stars",
-                r"Rating: ([0-9.]+)",
-                r"rated ([0-9.]+) by",
-                r"([0-9.]+) rating",
-                r"([0-9.]+) ★",
-                # More specific pattern for standalone ratings - must be near rating-related words
-                r"(?:rating|reviews|stars|score)[^\n.]*?([0-9]\.[0-9])",
-                r"([0-9]\.[0-9])(?:[^\n.]*?(?:rating|reviews|stars|score))"
-            ]
-            
-            for item in results["items"]:
-                # Gather possible fields to check
-                fields_to_check = [
-                    item.get("title", ""),
-                    item.get("snippet", ""),
-                    item.get("htmlTitle", ""),
-                    item.get("htmlSnippet", "")
-                ]
-                
-                # Check for company name specifically near numbers
-                for text in fields_to_check:
-                    text = str(text)
-                    # Look for Mutinex. 5.0 pattern specifically
-                    if "Mutinex" in text and "5.0" in text:
-                        print(f"Rating: 5.0")
-                        return 5.0
-                
-                # Check metatags if they exist
-                metatags = item.get("pagemap", {}).get("metatags", [])
-                for tag in metatags:
-                    for value in tag.values():
-                        fields_to_check.append(str(value))
-                
-                # Search for rating in all fields
-                for text in fields_to_check:
-                    text = str(text)
-                    for pattern in patterns:
-                        match = re.search(pattern, text)
-                        if match:
-                            try:
-                                rating = float(match.group(1))
-                                if 0 <= rating <= 5:
-                                    print(f"Rating: {rating}")
-                                    return rating
-                            except ValueError:
-                                continue
-        
-        print("Rating: 0")
+
+        rating = extract_rating(results)
+        if rating is not None:
+            return rating
         return 0  # Return 0 if no rating is found
     
     def _get_default_insights(self):
@@ -7,16 +7,21 @@ This script orchestrates the job matching pipeline:
 2. Matches jobs against your CV using Gemini API
 3. Enriches job data with Glassdoor insights
 4. Ranks and presents the best job matches
+
+Fetching, deduplication, enrichment and matching run as a streaming pipeline:
+jobs flow to the next stage as soon as they are produced, connected by bounded
+queues so a slow stage applies backpressure to the faster ones.
 """
 
 
 import os
 import argparse
+import logging
+import threading
 import pandas as pd
 from dotenv import load_dotenv
 from tabulate import tabulate
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from glassdoor_cse import GlassdoorEnricher  # Import the new CSE-based enricher
 
 # Import custom modules
@@ -24,6 +29,21 @@ from fetch_jobs.linkedin_jobs import LinkedInJobFetcher
 from fetch_jobs.seek_jobs import SeekJobFetcher
 from match_resume.parse_resume import ResumeParser
 from match_resume.gemini_matcher import GeminiMatcher
+from match_resume.prefilter import ResumePrefilter
+from match_resume.compaction import PromptCompactor
+from match_resume.resilience import is_failed_match
+from match_resume.quota import QuotaController
+from common.disk_cache import DiskCache
+from common.http_cache import HttpCache
+from common.job import intern_job
+from common.logs import configure_logging
+from common.metrics import shared_metrics
+from common.rate_limit import shared_rate_limiter
+from pipeline.stream import StreamingPipeline, Stage
+from pipeline.job_store import JobStore, job_identifier, scoped_job_id
+from pipeline.candidates import find_resumes, build_candidates
+from pipeline.dedupe import NearDuplicateDetector
+from pipeline.checkpoint import RunCheckpoint
 #from enrich_data.glassdoor_reviews import GlassdoorEnricher
 
 import time
@@ -32,10 +52,52 @@ from datetime import datetime
 # Load environment variables
 load_dotenv()
 
-def parse_arguments():
-    """Parse command line arguments."""
+logger = logging.getLogger('job_matcher')
+
+# Columns of the output CSV read by the dashboard
+EXPECTED_COLUMNS = [
+    'job_id',
+    'title',
+    'company',
+    'location',
+    'job_url',
+    'apply',
+    'comments',
+    'match_score',
+    'prefilter_score',
+    'rating',
+    'source',
+    'seniority',
+    'employment_type',
+    'match_reason',
+    'description',
+    'skill_matches',
+    'skill_gaps'
+]
+
+# Jobs scoring at or below this are not saved
+MIN_MATCH_SCORE = 55
+
+# Fields the matching stage adds to a job, checkpointed once it is scored
+MATCH_FIELDS = ('match_score', 'match_reason', 'skill_matches', 'skill_gaps', 'resume_matches')
+
+# Most recent stored postings the prefilter's IDF weights are fitted on
+PREFILTER_CORPUS_JOBS = 2000
+
+def parse_arguments(argv=None):
+    """
+    Parse command line arguments.
+
+    Args:
+        argv (list, optional): Arguments to parse instead of sys.argv
+
+    Returns:
+        argparse.Namespace: Parsed arguments
+    """
     parser = argparse.ArgumentParser(description='Job Matcher Pipeline')
-    parser.add_argument('--resume', type=str, required=True, help='Path to your resume PDF')
+    parser.add_argument('--resume', type=str, nargs='+', required=True,
+                        help='Resume PDF(s) or directories of PDFs; several resumes share one fetch and '
+                             'enrichment pass and each gets its own output CSV and job store')
     parser.add_argument('--keywords', type=str, default='Frontend Developer, Software Engineer, Full Stack Developer',
                         help='Job keywords, comma separated. Multi-word phrases will be searched exactly on supported platforms (like LinkedIn)')
     parser.add_argument('--location', type=str, default='Sydney',
@@ -43,28 +105,121 @@ def parse_arguments():
     parser.add_argument('--limit', type=int, default=5,
                         help='Maximum number of jobs to fetch from each source')
     parser.add_argument('--output', type=str, default='public/job_matches.csv',
-                        help='Output CSV file name')
-    return parser.parse_args()
-
-def main():
-    """Main execution function."""
-    print("Running at:", datetime.now())
-    args = parse_arguments()
-    print(f"[+] Job Matcher Pipeline Started - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-
-    print("\n[+] Parsing resume...")
-    resume_parser = ResumeParser(args.resume)
-    resume_text = resume_parser.extract_text()
-
-    print("\n[+] Fetching jobs...")
-    all_jobs = []
-    job_ids_seen = set() 
-
-    keywords_list = [k.strip() for k in args.keywords.split(',')]
-
-    # LinkedIn jobs
-    try:
-        linkedin_fetcher = LinkedInJobFetcher()
+                        help='Output CSV file name (suffixed with the resume name when matching several resumes)')
+    parser.add_argument('--store', type=str, default='data/job_store.db',
+                        help='SQLite job store the output CSV is exported from (suffixed like --output)')
+    parser.add_argument('--refetch-known', action='store_true',
+                        help='Fetch details of postings already evaluated in previous runs')
+    parser.add_argument('--near-dup-threshold', type=float, default=0.8,
+                        help='Similarity (0-1) of title, company and description above which two postings are the same job')
+    parser.add_argument('--no-near-dedupe', action='store_true',
+                        help='Only drop exact duplicates (same job id or title and company)')
+    parser.add_argument('--cache', type=str, default='cache/job_matcher.db',
+                        help='SQLite file used to cache results between runs')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Disable the persistent cache')
+    parser.add_argument('--match-cache-ttl-days', type=float, default=30,
+                        help='How long cached Gemini match results stay valid')
+    parser.add_argument('--rating-cache-ttl-days', type=float, default=14,
+                        help='How long cached Glassdoor company ratings stay valid')
+    parser.add_argument('--page-fresh-hours', type=float, default=24,
+                        help='How long a cached job detail page is reused without contacting the site')
+    parser.add_argument('--page-cache-ttl-days', type=float, default=30,
+                        help='How long cached job detail pages are kept for revalidation (ETag/Last-Modified)')
+    parser.add_argument('--cache-max-mb', type=float, default=256,
+                        help='Maximum size of each cache namespace in megabytes')
+    parser.add_argument('--enrich-workers', type=int, default=5,
+                        help='Number of concurrent Glassdoor enrichment workers')
+    parser.add_argument('--match-workers', type=int, default=5,
+                        help='Maximum number of concurrent Gemini calls (adapted to quota, latency and 429s)')
+    parser.add_argument('--gemini-rpm', type=int, default=None,
+                        help="Gemini requests-per-minute quota to schedule calls within")
+    parser.add_argument('--gemini-tpm', type=int, default=None,
+                        help="Gemini tokens-per-minute quota to schedule calls within")
+    parser.add_argument('--queue-size', type=int, default=50,
+                        help='Capacity of the queues between pipeline stages (backpressure)')
+    parser.add_argument('--match-batch-size', type=int, default=1,
+                        help='Score up to this many jobs per Gemini call (1 disables batching)')
+    parser.add_argument('--match-batch-tokens', type=int, default=30000,
+                        help='Approximate token budget per batched Gemini call')
+    parser.add_argument('--resume-tokens', type=int, default=2000,
+                        help='Token budget of the condensed resume sent to Gemini')
+    parser.add_argument('--description-tokens', type=int, default=1500,
+                        help='Token budget of each cleaned job description sent to Gemini')
+    parser.add_argument('--no-compaction', action='store_true',
+                        help='Send the raw resume and descriptions (cut at fixed limits) instead of compacting them')
+    parser.add_argument('--deferred-wait', type=float, default=120,
+                        help='Longest wait (seconds) for Gemini to recover before failed matches are left for the next run')
+    parser.add_argument('--prefilter-top-k', type=int, default=None,
+                        help='Only send the K jobs most similar to the resume (local TF-IDF) to Gemini')
+    parser.add_argument('--prefilter-threshold', type=float, default=None,
+                        help='Only send jobs with a local similarity score (0-100) of at least this value to Gemini')
+    parser.add_argument('--log-format', choices=['text', 'json'], default='text',
+                        help='Console progress lines (text) or one JSON object per log record (json)')
+    parser.add_argument('--log-level', type=str, default='INFO',
+                        help='Minimum level of log records to output (DEBUG, INFO, WARNING, ERROR)')
+    parser.add_argument('--metrics-report', type=str, default='data/run_report.json',
+                        help='JSON run report with per-stage counts, request latency histograms, retries, '
+                             'cache hits and bytes received (empty to disable)')
+    parser.add_argument('--metrics-prometheus', type=str, default=None,
+                        help='Also write the run metrics to this Prometheus text-format file '
+                             '(e.g. for the node_exporter textfile collector)')
+    parser.add_argument('--run-dir', type=str, default='data/runs',
+                        help='Directory of the per-run checkpoints (fetched jobs, enrichment and match results)')
+    parser.add_argument('--resume-run', type=str, nargs='?', const='latest', default=None,
+                        help='Continue an interrupted run from its checkpoints without refetching, re-enriching '
+                             'or rescoring finished jobs: the latest unfinished run, or the given run id. '
+                             'Pass the same --resume, --keywords, --location and --limit as the original run')
+    parser.add_argument('--no-checkpoint', action='store_true',
+                        help='Do not checkpoint the run (it cannot be resumed)')
+    args = parser.parse_args(argv)
+    if args.resume_run and args.no_checkpoint:
+        parser.error('--resume-run cannot be combined with --no-checkpoint')
+    return args
+
+def build_compactor(args):
+    """
+    Create the prompt compactor configured on the command line.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments
+
+    Returns:
+        PromptCompactor: The compactor, or None when compaction is disabled
+    """
+    if args.no_compaction:
+        return None
+    return PromptCompactor(resume_tokens=args.resume_tokens, description_tokens=args.description_tokens)
+
+def build_quota_controller(args):
+    """
+    Create the controller scheduling Gemini calls within the configured quota.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments
+
+    Returns:
+        QuotaController: Controller bounded by --match-workers concurrent calls
+    """
+    return QuotaController(rpm=args.gemini_rpm, tpm=args.gemini_tpm, max_concurrency=args.match_workers)
+
+def build_sources(args, keywords_list, known_jobs=None, fetcher_options=None, checkpoint=None):
+    """
+    Create the job sources feeding the streaming pipeline.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments
+        keywords_list (list): Search keywords
+        known_jobs (KnownJobs, optional): Postings to skip without fetching their details
+        fetcher_options (dict, optional): Extra keyword arguments for the fetcher constructors
+        checkpoint (RunCheckpoint, optional): Checkpoints fetched jobs, and replays those of an
+                                              interrupted run instead of fetching them again
+
+    Returns:
+        dict: Mapping of source name to a callable taking an `emit` function
+    """
+    def linkedin_source(emit, limit=args.limit, known_jobs=known_jobs):
+        linkedin_fetcher = LinkedInJobFetcher(**(fetcher_options or {}))
         processed_linkedin_keywords = []
         for kw in keywords_list:
             if ' ' in kw:
@@ -72,215 +227,661 @@ def main():
             else:
                 processed_linkedin_keywords.append(kw)
 
-        print(f"    - Searching LinkedIn for: {processed_linkedin_keywords}") # Show what's being searched
-        linkedin_jobs = linkedin_fetcher.fetch_jobs(keywords = processed_linkedin_keywords, location= args.location, days_ago=3, limit = args.limit)
-
-        new_linkedin_jobs_count = 0
-        for job in linkedin_jobs:
-             if job.get('job_id') and job['job_id'] not in job_ids_seen:
-                 all_jobs.append(job)
-                 job_ids_seen.add(job['job_id'])
-                 new_linkedin_jobs_count += 1
-        print(f"    - LinkedIn: Added {new_linkedin_jobs_count} unique jobs (found {len(linkedin_jobs)} total)")
-
-    except Exception as e:
-        print(f"    - LinkedIn fetching error: {str(e)}")
-
-    # SEEK jobs
-    try:
-        seek_fetcher = SeekJobFetcher()
-        print(f"    - Searching SEEK for: {args.keywords}") 
-        seek_jobs = seek_fetcher.fetch_jobs(keywords= args.keywords, location=args.location, limit=args.limit, max_days_old=3)
-
-        new_seek_jobs_count = 0
-        for job in seek_jobs:
-            if job.get('job_id') and job['job_id'] not in job_ids_seen:
-                all_jobs.append(job)
-                job_ids_seen.add(job['job_id'])
-                new_seek_jobs_count += 1
-        print(f"    - SEEK: Added {new_seek_jobs_count} unique jobs (found {len(seek_jobs)} total)")
-
-    except Exception as e:
-        print(f"    - SEEK fetching error: {str(e)}")
-
-    print(f"\n    - Total unique jobs found across sources: {len(all_jobs)}")
-
-
+        logger.info(f"    - Searching LinkedIn for: {processed_linkedin_keywords}") # Show what's being searched
+        linkedin_fetcher.fetch_jobs(keywords=processed_linkedin_keywords, location=args.location,
+                                    days_ago=3, limit=limit, on_job=emit, known_jobs=known_jobs)
+        if linkedin_fetcher.skipped_known:
+            logger.info(f"    - LinkedIn: skipped {linkedin_fetcher.skipped_known} known postings")
+
+    def seek_source(emit, limit=args.limit, known_jobs=known_jobs):
+        seek_fetcher = SeekJobFetcher(**(fetcher_options or {}))
+        logger.info(f"    - Searching SEEK for: {args.keywords}")
+        seek_fetcher.fetch_jobs(keywords=args.keywords, location=args.location,
+                                limit=limit, max_days_old=3, on_job=emit, known_jobs=known_jobs)
+        if seek_fetcher.skipped_known:
+            logger.info(f"    - SEEK: skipped {seek_fetcher.skipped_known} known postings")
+
+    sources = {'LinkedIn': linkedin_source, 'SEEK': seek_source}
+    if checkpoint is None:
+        return sources
+    return {name: checkpoint.source(name, source, args.limit, known_jobs) for name, source in sources.items()}
+
+def score_jobs(jobs, resume_text, match_many):
+    """
+    Match jobs against the resume, or against every resume in multi-resume mode.
+
+    With several resumes each job keeps one result per candidate in
+    'resume_matches', and its own match fields hold the first failed result (so
+    the job is rescored until every resume is matched) or else the best one.
+
+    Args:
+        jobs (list): Job dictionaries, updated in place
+        resume_text (str or dict): Text of the resume, or candidate name -> resume text
+        match_many (callable): Takes (jobs, resume_text) and returns one match result per job
+    """
+    if not isinstance(resume_text, dict):
+        for job, match_result in zip(jobs, match_many(jobs, resume_text)):
+            job.update(match_result)
+        return
+
+    results = {name: match_many(jobs, text) for name, text in resume_text.items()}
+    for position, job in enumerate(jobs):
+        resume_matches = {name: match_results[position] for name, match_results in results.items()}
+        failed = [result for result in resume_matches.values() if is_failed_match(result)]
+        job.update(failed[0] if failed else max(resume_matches.values(), key=lambda r: r.get('match_score', 0)))
+        job['resume_matches'] = resume_matches
+
+def candidate_jobs(all_jobs, name):
+    """
+    Select the jobs matched for one candidate in multi-resume mode.
+
+    Args:
+        all_jobs (list): Jobs that went through the pipeline
+        name (str): Candidate name
+
+    Returns:
+        list: Copies of the jobs carrying the candidate's own match result
+    """
+    jobs = []
+    for job in all_jobs:
+        if name not in job.get('resume_matches', {}):
+            continue
+        fields = {key: value for key, value in job.items() if key != 'resume_matches'}
+        jobs.append({**fields, **job['resume_matches'][name]})
+    return jobs
+
+def checkpoint_match(checkpoint, job):
+    """
+    Checkpoint a job's match result once it is scored.
+
+    Failed matches are not checkpointed, so a resumed run scores them again.
+
+    Args:
+        checkpoint (RunCheckpoint): Run checkpoints, or None when checkpointing is disabled
+        job (dict): Scored job
+    """
+    if checkpoint is not None and not is_failed_match(job):
+        checkpoint.record('matched', job, {key: job[key] for key in MATCH_FIELDS if key in job})
+
+def build_stages(args, glassdoor_enricher, gemini_matcher, resume_text, enriched_jobs, prefilter=None,
+                 seen_jobs=None, deferred_jobs=None, near_duplicates=None, checkpoint=None):
+    """
+    Create the dedupe, enrichment and matching stages of the streaming pipeline.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments
+        glassdoor_enricher (GlassdoorEnricher): Company rating enricher
+        gemini_matcher (GeminiMatcher): Resume matcher
+        resume_text (str or dict): Text of the resume, or candidate name -> resume text to
+                                   match every job against several resumes
+        enriched_jobs (list): Receives every job that passes the rating filter
+        prefilter (ResumePrefilter, optional): Local pre-ranking applied before matching
+        seen_jobs (list, optional): Receives every job that was fully evaluated (rejected for
+                                    its rating or scored without an API error)
+        deferred_jobs (list, optional): Receives every job whose match failed at the API
+        near_duplicates (NearDuplicateDetector, optional): Drops reposts of the same job
+                                                           before enrichment and matching
+        checkpoint (RunCheckpoint, optional): Checkpoints enrichment and match results, and
+                                              applies those of an interrupted run instead of
+                                              calling Glassdoor and Gemini again
+
+    Returns:
+        list: Ordered list of Stage objects
+    """
     exclude_keywords = []
     exclude_companies = []
-    
-    # Filter out jobs with titles containing any of the exclude keywords
+
+    job_ids_seen = set()
     seen = set()
-    unique_jobs = []
-    
-    for job in all_jobs:
+
+    def dedupe(job):
+        # Runs with a single worker, so the seen sets need no locking
+        job_id = scoped_job_id(job.get('source'), job.get('job_id'))
+        if not job_id or job_id in job_ids_seen:
+            return None
+        job_ids_seen.add(job_id)
+
         title = job.get('title', '').strip().lower()
         company = job.get('company', '').strip().lower()
         identifier = (title, company)
-    
-        if identifier not in seen:
-            seen.add(identifier)
-            unique_jobs.append(job)
-
-    print('all jobs:', len(all_jobs))
-    all_jobs = [
-        job for job in unique_jobs
-        if not any(kw.lower() in job.get('title', '').lower() for kw in exclude_keywords)
-        if not any(kw.lower() in job.get('company', '').lower() for kw in exclude_companies)
+        if identifier in seen:
+            return None
+        seen.add(identifier)
+
+        # Filter out jobs with titles or companies containing any of the exclude keywords
+        if any(kw.lower() in job.get('title', '').lower() for kw in exclude_keywords):
+            return None
+        if any(kw.lower() in job.get('company', '').lower() for kw in exclude_companies):
+            return None
+
+        # Same role reposted with a slightly different title, company suffix or description
+        if near_duplicates is not None and not near_duplicates.add(job):
+            return None
+        return job
+
+    enriched_count = [0]
+    matched_count = [0]
+    lock = threading.Lock()
+
+    def mark_seen(job):
+        # Failed matches are rescored at the end of the run (or in the next one)
+        if is_failed_match(job):
+            if deferred_jobs is not None:
+                with lock:
+                    deferred_jobs.append(job)
+            return
+        if seen_jobs is None:
+            return
+        with lock:
+            seen_jobs.append(job)
+
+    def enrich(job):
+        restored = checkpoint.restore('enriched', job) if checkpoint is not None else None
+        try:
+            if restored is not None:
+                glassdoor_data = restored
+            else:
+                glassdoor_data = glassdoor_enricher.get_company_insights(job['company'])
+                if checkpoint is not None:
+                    checkpoint.record('enriched', job, glassdoor_data)
+            job.update(glassdoor_data)
+            with lock:
+                enriched_count[0] += 1
+                logger.info(f"    - Enriched {enriched_count[0]}: {job['company']} - Rating: {job.get('rating', 'N/A')}"
+                            f"{' (checkpoint)' if restored is not None else ''}",
+                            extra={'job_id': job.get('job_id'), 'company': job['company'], 'rating': job.get('rating')})
+        except Exception as e:
+            logger.warning(f"    - Error enriching {job['company']}: {str(e)}")
+
+        # Allow if rating is missing (0) or >= 3.9
+        if not (job.get('rating', 0) == 0 or job.get('rating', 0) >= 3.9):
+            mark_seen(job)
+            return None
+        with lock:
+            enriched_jobs.append(job)
+        return job
+
+    def restore_match(job):
+        restored = checkpoint.restore('matched', job) if checkpoint is not None else None
+        if restored is not None:
+            job.update(restored)
+        return restored is not None
+
+    def match(job):
+        try:
+            restored = restore_match(job)
+            if not restored:
+                score_jobs([job], resume_text, lambda jobs, text: [gemini_matcher.match_job(jobs[0], text)])
+                checkpoint_match(checkpoint, job)
+            with lock:
+                matched_count[0] += 1
+                logger.info(f"    - Matched job {matched_count[0]}: {job['title']} ({job['company']}) - Score: {job['match_score']}"
+                            f"{' (checkpoint)' if restored else ''}",
+                            extra={'job_id': job.get('job_id'), 'match_score': job['match_score']})
+            mark_seen(job)
+        except Exception as e:
+            logger.warning(f"    - Error matching job {job['title']}: {str(e)}")
+        return job
+
+    def match_batch(jobs):
+        pending = [job for job in jobs if not restore_match(job)]
+        try:
+            if pending:
+                score_jobs(pending, resume_text,
+                           lambda jobs, text: gemini_matcher.match_jobs(jobs, text, token_budget=args.match_batch_tokens,
+                                                                        max_batch_size=args.match_batch_size))
+            for job in pending:
+                checkpoint_match(checkpoint, job)
+        except Exception as e:
+            logger.warning(f"    - Error matching batch of {len(jobs)} jobs: {str(e)}")
+            return jobs
+        for job in jobs:
+            with lock:
+                matched_count[0] += 1
+                logger.info(f"    - Matched job {matched_count[0]}: {job['title']} ({job['company']}) - Score: {job['match_score']}",
+                            extra={'job_id': job.get('job_id'), 'match_score': job['match_score']})
+            mark_seen(job)
+        return jobs
+
+    if args.match_batch_size > 1:
+        match_stage = Stage('match', match_batch, workers=args.match_workers, queue_size=args.queue_size,
+                            batch_size=args.match_batch_size)
+    else:
+        match_stage = Stage('match', match, workers=args.match_workers, queue_size=args.queue_size)
+
+    stages = [
+        Stage('dedupe', dedupe, workers=1, queue_size=args.queue_size),
+        Stage('enrich', enrich, workers=args.enrich_workers, queue_size=args.queue_size),
     ]
-    print('deleted keywords:',len(all_jobs))
-    # 4. Enrich with Glassdoor data
-    print("\n[+] Enriching with Glassdoor data...")
-    glassdoor_enricher = GlassdoorEnricher()  # No parameters needed if using environment variables
-    
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        future_to_job = {
-            executor.submit(glassdoor_enricher.get_company_insights, job['company']): job 
-            for job in all_jobs
-        }
-        
-        for i, future in enumerate(as_completed(future_to_job)):
-            job = future_to_job[future]
-            try:
-                glassdoor_data = future.result()
-                job.update(glassdoor_data)
-                print(f"    - Enriched {i+1}/{len(all_jobs)}: {job['company']} - Rating: {job.get('rating', 'N/A')}")
-            except Exception as e:
-                print(f"    - Error enriching {job['company']}: {str(e)}")
-
-    all_jobs = [
-    job for job in all_jobs
-    if (
-        (job.get('rating', 0) == 0 or job.get('rating', 0) >= 3.9))]  # Allow if rating is missing (0) or >= 3.9
-       # and "Contract" not in job.get('employment_type', "")        # Exclude if employment type includes "Contract"
-      #  and job.get('title', "") != ""                
-
-    print('filtered jobs:',len(all_jobs))
-    
-    df = pd.DataFrame(all_jobs)
-    df.to_csv('test.csv', index=False, encoding='utf-8', errors='replace')
-    print('df saved')
 
+    if prefilter is not None:
+        def prefilter_jobs(jobs):
+            selected = prefilter.select(jobs, top_k=args.prefilter_top_k, threshold=args.prefilter_threshold)
+            # Jobs the prefilter drops are evaluated too, so later runs skip them
+            forwarded = {id(job) for job in selected}
+            for job in jobs:
+                if id(job) not in forwarded:
+                    mark_seen(job)
+            return selected
+
+        if args.prefilter_top_k:
+            # Top-K needs every job before it can rank them: run as a barrier
+            stages.append(Stage('prefilter', prefilter_jobs, workers=1, queue_size=args.queue_size,
+                                batch_size=float('inf'), batch_timeout=None))
+        else:
+            stages.append(Stage('prefilter', prefilter_jobs, workers=1, queue_size=args.queue_size,
+                                batch_size=args.queue_size))
+
+    stages.append(match_stage)
+    return stages
+
+def retry_deferred(gemini_matcher, resume_text, deferred_jobs, seen_jobs, max_wait, checkpoint=None):
+    """
+    Rescore the jobs whose match failed during the run, once Gemini accepts calls again.
+
+    Args:
+        gemini_matcher (GeminiMatcher): Resume matcher
+        resume_text (str or dict): Text of the resume, or candidate name -> resume text
+        deferred_jobs (list): Jobs whose match failed
+        seen_jobs (list): Receives the jobs rescored successfully
+        max_wait (float): Longest wait in seconds for the circuit breaker to allow calls
+        checkpoint (RunCheckpoint, optional): Checkpoints the jobs rescored successfully
+
+    Returns:
+        list: Jobs that still have no match and are left for the next run
+    """
+    if not deferred_jobs:
+        return []
+
+    logger.info(f"\n[+] Rescoring {len(deferred_jobs)} jobs whose match failed...")
+    deadline = time.time() + max_wait
+    still_failed = []
+    for position, job in enumerate(deferred_jobs):
+        # Wait out the circuit breaker's cool-down between attempts, up to the deadline
+        wait = gemini_matcher.breaker.wait_time()
+        if time.time() + wait > deadline:
+            logger.warning(f"    - Gemini unavailable for another {wait:.0f}s, leaving the remaining jobs for the next run")
+            still_failed.extend(deferred_jobs[position:])
+            break
+        time.sleep(wait)
+
+        score_jobs([job], resume_text, lambda jobs, text: [gemini_matcher.match_job(jobs[0], text)])
+        if is_failed_match(job):
+            still_failed.append(job)
+            continue
+        seen_jobs.append(job)
+        checkpoint_match(checkpoint, job)
+        logger.info(f"    - Rescored {job['title']} ({job['company']}) - Score: {job['match_score']}")
+    return still_failed
+
+def output_results(args, all_jobs, job_store, output_file=None):
+    """
+    Rank the matched jobs, print the top matches and save them.
+
+    New and changed jobs are upserted into the job store. The output CSV is
+    exported from the store only when the store changed (or the CSV is missing);
+    `python -m pipeline.job_store --export` re-exports it on demand.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments
+        all_jobs (list): Matched jobs above the score cutoff
+        job_store (JobStore): Job history store
+        output_file (str, optional): Output CSV path (defaults to --output)
+    """
+    # Convert to DataFrame for easier manipulation
+    df = pd.DataFrame(all_jobs)
+    logger.debug(df)
     
-    # 3. Match jobs with resume using Gemini API
-    print("\n[+] Matching jobs with resume...")
-    gemini_matcher = GeminiMatcher()
+    # Convert rating to numeric (invalid parsing results in NaN)
+    df['rating'] = pd.to_numeric(df['rating'], errors='coerce')
     
-    # Use ThreadPoolExecutor for parallel processing
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        future_to_job = {
-            executor.submit(gemini_matcher.match_job, job, resume_text): job 
-            for job in all_jobs
-        }
-        
-        for i, future in enumerate(as_completed(future_to_job)):
-            job = future_to_job[future]
-            try:
-                match_result = future.result()
-                job.update(match_result)
-                print(f"    - Matched job {i+1}/{len(all_jobs)}: {job['title']} ({job['company']}) - Score: {job['match_score']}")
-            except Exception as e:
-                print(f"    - Error matching job {job['title']}: {str(e)}")
-
-    all_jobs = [job for job in all_jobs if job.get('match_score', 0) > 55]
-
-    print('matched jobs:',len(all_jobs))
+    df = df.sort_values(by=['match_score', 'rating'], ascending=False)
     
-    # 5. Rank and output results
-    print("\n[+] Ranking and outputting results...")
-
-    try:
-        # Convert to DataFrame for easier manipulation
-        df = pd.DataFrame(all_jobs)
-        print(df)
-        
-        # Convert rating to numeric (invalid parsing results in NaN)
-        df['rating'] = pd.to_numeric(df['rating'], errors='coerce')
-        
-        df = df.sort_values(by=['match_score', 'rating'], ascending=False)
-        
-        # Display top matches
-        top_matches = df.head(10)
-        display_columns = ['title', 'company', 'match_score', 'rating', 'match_reason']
-        print("\n=== TOP 10 JOB MATCHES ===")
-        print(tabulate(top_matches[display_columns], headers='keys', tablefmt='pretty'))
-        
-        output_file = args.output
-
-        EXPECTED_COLUMNS = [
-    'job_id',
-    'title',
-    'company',
-    'location',
-    'job_url',
-    'apply',
-    'comments',
-    'match_score',
-    'rating',
-    'source',
-    'seniority',
-    'employment_type',
-    'match_reason',
-    'description',
-    'skill_matches',
-    'skill_gaps'
-]
-        
-        # Check if output file already exists
-        if os.path.exists(output_file):
-            # Read existing data
-            try:
-                if os.path.exists(output_file):
-                    existing_df = pd.read_csv(output_file)
-                    print(f"[+] Found existing file with {len(existing_df)} records")
-                
-                    for col in EXPECTED_COLUMNS:
-                        if col not in existing_df.columns:
-                            existing_df[col] = None 
-                
-                    for col in EXPECTED_COLUMNS:
-                        if col not in df.columns:
-                            df[col] = None 
-                
-                    df = df.reindex(columns=EXPECTED_COLUMNS)
-                
-                    if 'title' in existing_df.columns and 'company' in existing_df.columns and \
-                       'title' in df.columns and 'company' in df.columns:
-                
-                        existing_df['job_identifier'] = existing_df['title'].astype(str).str.lower() + '|' + existing_df['company'].astype(str).str.lower()
-                        df['job_identifier'] = df['title'].astype(str).str.lower() + '|' + df['company'].astype(str).str.lower()
-                
-                        # Identify new jobs (not in existing file)
-                        existing_identifiers = set(existing_df['job_identifier'].tolist())
-                        df_new = df[~df['job_identifier'].isin(existing_identifiers)].copy()  
-                        df_new = df_new.reindex(columns=existing_df.columns)
-                        combined_df = pd.concat([df_new,existing_df], ignore_index=True)
-                
-                        combined_df = combined_df.drop('job_identifier', axis=1)
-                
-                        print(f"[+] Added {len(df_new)} new jobs to the existing file")
-                
-                        # Save the combined dataframe
-                        combined_df.to_csv(output_file, index=False)
-                        print(f"[+] Complete results saved to {output_file} (total: {len(combined_df)} jobs)")
-                
-                    else:
-                        print("[-] 'title' or 'company' column missing in one of the DataFrames. Cannot create job identifier for deduplication.")
-
-        
-            except Exception as e:
-                print(f"[!] Error reading existing file: {str(e)}. Creating new file.")
-                df.to_csv(output_file, index=False)
-                print(f"[+] Complete results saved to {output_file}")
+    # Display top matches
+    top_matches = df.head(10)
+    display_columns = ['title', 'company', 'match_score', 'rating', 'match_reason']
+    logger.info("\n=== TOP 10 JOB MATCHES ===")
+    logger.info(tabulate(top_matches[display_columns], headers='keys', tablefmt='pretty'))
+    
+    output_file = output_file or args.output
+
+    # Upsert new and changed jobs into the store and export the dashboard CSV from it
+    synced = job_store.sync_user_columns(output_file)
+    if synced:
+        logger.info(f"[+] Synced dashboard edits for {synced} jobs from {output_file}")
+
+    df = df.reindex(columns=EXPECTED_COLUMNS)
+    added, updated = job_store.upsert(df.to_dict('records'))
+    logger.info(f"[+] Added {added} new jobs and updated {updated} existing jobs in {job_store.path}")
+
+    if not (added or updated or synced) and os.path.exists(output_file):
+        logger.info(f"[+] No changes, {output_file} is up to date")
+        return
+    total = job_store.export_csv(output_file, EXPECTED_COLUMNS)
+    logger.info(f"[+] Complete results saved to {output_file} (total: {total} jobs)")
+
+def record_stats(metrics, name, stats, **labels):
+    """
+    Copy a component's numeric statistics into the run metrics as gauges.
+
+    Args:
+        metrics (MetricsRegistry): Run metrics
+        name (str): Prefix of the gauge names
+        stats (dict): Statistics as returned by the component's stats()
+        **labels: Labels of the gauges
+    """
+    for key, value in stats.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            metrics.set_gauge(f"{name}_{key}", value, **labels)
+
+def write_run_report(args, metrics, run):
+    """
+    Write the JSON run report (and the Prometheus file when requested) and log where the time went.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments
+        metrics (MetricsRegistry): Run metrics
+        run (dict): Run information included in the JSON report
+    """
+    if args.metrics_report:
+        metrics.write_json(args.metrics_report, run)
+        logger.info(f"[+] Run report saved to {args.metrics_report}")
+    if args.metrics_prometheus:
+        metrics.write_prometheus(args.metrics_prometheus)
+        logger.info(f"[+] Prometheus metrics saved to {args.metrics_prometheus}")
+
+    time_spent = metrics.report()['time_spent'][:5]
+    if time_spent:
+        logger.info("[+] Time spent, largest first:")
+    for entry in time_spent:
+        labels = ', '.join(f"{name}={value}" for name, value in entry['labels'].items())
+        logger.info(f"    - {entry['name']} ({labels}): {entry['seconds']:.1f}s over {entry['count']} samples",
+                    extra={'metric': entry['name'], 'labels': entry['labels'], 'seconds': entry['seconds']})
+
+def main():
+    """Main execution function."""
+    args = parse_arguments()
+    configure_logging(json_format=args.log_format == 'json', level=args.log_level)
+    metrics = shared_metrics()
+    logger.info(f"Running at: {datetime.now()}")
+    logger.info(f"[+] Job Matcher Pipeline Started - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    candidates = build_candidates(find_resumes(args.resume), args.output, args.store)
+    if not candidates:
+        logger.warning("[!] No resume PDFs found")
+        return
+
+    checkpoint = None
+    arguments = {'resume': args.resume, 'keywords': args.keywords, 'location': args.location, 'limit': args.limit}
+    if args.resume_run:
+        checkpoint = RunCheckpoint.open(args.run_dir, args.resume_run, metrics=metrics)
+        if checkpoint is None:
+            logger.warning(f"[!] No run '{args.resume_run}' to resume in {args.run_dir}")
+            return
+        counts = checkpoint.summary()
+        logger.info(f"[+] Resuming run {checkpoint.run_id}: {counts['fetched']} fetched, {counts['enriched']} enriched "
+                    f"and {counts['matched']} matched jobs checkpointed")
+        mismatched = checkpoint.mismatched_arguments(arguments)
+        if mismatched:
+            logger.warning(f"[!] {', '.join('--' + name for name in mismatched)} differ from the interrupted run; "
+                           f"its checkpointed jobs are reused as they are")
+    elif not args.no_checkpoint:
+        checkpoint = RunCheckpoint.create(args.run_dir, arguments, metrics=metrics)
+        logger.info(f"[+] Checkpointing run {checkpoint.run_id} to {checkpoint.path}")
+
+    logger.info("\n[+] Parsing resume..." if len(candidates) == 1 else f"\n[+] Parsing {len(candidates)} resumes...")
+    resume_cache = None
+    if not args.no_cache:
+        resume_cache = DiskCache(args.cache, namespace='parsed_resumes', max_entries=50)
+    resumes = {}
+    for candidate in candidates:
+        resume_parser = ResumeParser(candidate.resume_path, cache=resume_cache)
+        resumes[candidate.name] = resume_parser.extract_text()
+        if resume_parser.cache_hit:
+            logger.info(f"    - Reusing the parsed resume {candidate.resume_path} from the cache (PDF unchanged)")
+        elif len(resume_parser.page_timings) > 1:
+            timings = resume_parser.page_timings
+            slowest = max(timings, key=lambda timing: timing['seconds'])
+            fallback = sum(1 for timing in timings if timing['method'] == 'pdfminer')
+            for timing in timings:
+                metrics.observe('resume_page_seconds', timing['seconds'], method=timing['method'])
+            logger.info(f"    - Extracted {len(timings)} pages of {candidate.resume_path} in "
+                        f"{sum(timing['seconds'] for timing in timings):.2f}s (slowest: page {slowest['page']}, "
+                        f"{slowest['seconds']:.2f}s; {fallback} via pdfminer)")
+    if resume_cache is not None:
+        resume_cache.close()
+    # A single resume keeps the original single-text matching path
+    resume_text = resumes if len(candidates) > 1 else resumes[candidates[0].name]
+
+    logger.info("\n[+] Running streaming pipeline (fetch -> dedupe -> enrich -> match)...")
+    keywords_list = [k.strip() for k in args.keywords.split(',')]
+
+    match_cache = None
+    if not args.no_cache:
+        match_cache = DiskCache(args.cache, namespace='gemini_matches',
+                                ttl=args.match_cache_ttl_days * 86400,
+                                max_bytes=int(args.cache_max_mb * 1024 * 1024))
+
+    rating_cache = None
+    if not args.no_cache:
+        rating_cache = DiskCache(args.cache, namespace='company_ratings',
+                                 ttl=args.rating_cache_ttl_days * 86400,
+                                 max_bytes=int(args.cache_max_mb * 1024 * 1024))
+
+    http_cache = None
+    if not args.no_cache:
+        http_cache = HttpCache(DiskCache(args.cache, namespace='http_pages',
+                                         ttl=args.page_cache_ttl_days * 86400,
+                                         max_bytes=int(args.cache_max_mb * 1024 * 1024)),
+                               freshness=args.page_fresh_hours * 3600)
+
+    glassdoor_enricher = GlassdoorEnricher(cache=rating_cache)  # Keys are loaded from environment variables
+    compactor = build_compactor(args)
+    gemini_matcher = GeminiMatcher(cache=match_cache, compactor=compactor, quota=build_quota_controller(args))
+
+    job_stores = {}
+    for candidate in candidates:
+        job_store = JobStore(candidate.store)
+        if job_store.count() == 0 and os.path.exists(candidate.output):
+            imported = job_store.import_csv(candidate.output)
+            logger.info(f"    - Imported {imported} existing jobs from {candidate.output} into {candidate.store}")
+        job_stores[candidate.name] = job_store
+
+    prefilter = None
+    if args.prefilter_top_k or args.prefilter_threshold is not None:
+        # IDF weights are fitted once on postings from previous runs, so a job's score
+        # does not depend on the jobs it is batched with
+        corpus = {}
+        for job_store in job_stores.values():
+            stored = job_store.to_dataframe(['title', 'company', 'description']).head(PREFILTER_CORPUS_JOBS)
+            for job in stored.fillna('').to_dict('records'):
+                corpus.setdefault(job_identifier(job['title'], job['company']), job)
+        # With several resumes a job goes on to Gemini when it is relevant to any of them
+        prefilter = ResumePrefilter('\n'.join(resumes.values()), corpus=list(corpus.values())[:PREFILTER_CORPUS_JOBS])
+        logger.info(f"    - Prefilter weights fitted on {prefilter.corpus_size} stored postings")
+
+    known_jobs = None
+    if not args.refetch_known:
+        # Only postings every candidate has already evaluated can be skipped
+        for job_store in job_stores.values():
+            store_known = job_store.known_jobs()
+            known_jobs = store_known if known_jobs is None else known_jobs.intersection(store_known)
+        logger.info(f"    - {len(known_jobs)} postings from previous runs will be skipped")
+
+    near_duplicates = None
+    if not args.no_near_dedupe:
+        near_duplicates = NearDuplicateDetector(threshold=args.near_dup_threshold)
+        if known_jobs is not None:
+            # Reposts of jobs every candidate already has are skipped like known postings
+            history = {}
+            for job_store in job_stores.values():
+                for job in job_store.to_dataframe(['source', 'job_id', 'title', 'company', 'description']).to_dict('records'):
+                    if known_jobs.is_known(job['job_id'], job['title'], job['company'], job['source']):
+                        history.setdefault(job_identifier(job['title'], job['company']), job)
+            near_duplicates.seed(history.values())
+
+    sources = build_sources(args, keywords_list, known_jobs, fetcher_options={'http_cache': http_cache},
+                            checkpoint=checkpoint)
+    carried_over = {}
+    for job_store in job_stores.values():
+        for job in job_store.deferred_jobs():
+            carried_over.setdefault(job_identifier(job.get('title'), job.get('company')), job)
+    if carried_over:
+        logger.info(f"    - Rescoring {len(carried_over)} jobs whose match failed in previous runs")
+
+        def deferred_source(emit):
+            for job in carried_over.values():
+                for key in ('match_reason', 'skill_matches', 'skill_gaps', 'resume_matches'):
+                    job.pop(key, None)
+                emit(intern_job(job))
+
+        sources['Deferred'] = deferred_source
+
+    enriched_jobs = []
+    seen_jobs = []
+    deferred_jobs = []
+    pipeline = StreamingPipeline(
+        sources=sources,
+        stages=build_stages(args, glassdoor_enricher, gemini_matcher, resume_text, enriched_jobs, prefilter,
+                            seen_jobs, deferred_jobs, near_duplicates, checkpoint),
+        queue_size=args.queue_size
+    )
+    all_jobs = pipeline.run()
+
+    still_failed = retry_deferred(gemini_matcher, resume_text, deferred_jobs, seen_jobs, args.deferred_wait,
+                                  checkpoint)
+    for job_store in job_stores.values():
+        job_store.mark_seen(seen_jobs)
+        job_store.resolve_deferred(seen_jobs)
+        if still_failed:
+            job_store.defer(still_failed)
+    if still_failed:
+        logger.warning(f"    - {len(still_failed)} jobs could not be matched and will be rescored in the next run")
+
+    for name, count in pipeline.source_counts.items():
+        logger.info(f"    - {name}: fetched {count} jobs")
+    for stats in pipeline.summary():
+        record_stats(metrics, 'stage', stats, stage=stats['stage'])
+        logger.info(f"    - Stage {stats['stage']} ({stats['workers']} workers): processed {stats['processed']}, "
+                    f"dropped {stats['dropped']}, errors {stats['errors']}, busy {stats['busy_time']:.1f}s")
+    if pipeline.first_result_at is not None:
+        logger.info(f"    - First scored job after {pipeline.first_result_at - pipeline.started_at:.1f}s, "
+                    f"pipeline finished in {pipeline.finished_at - pipeline.started_at:.1f}s")
+
+    logger.info(f"filtered jobs: {len(enriched_jobs)}")
+
+    if near_duplicates is not None:
+        stats = near_duplicates.stats()
+        record_stats(metrics, 'near_duplicates', stats)
+        logger.info(f"    - Near-duplicates: dropped {stats['duplicates']} reposts ({stats['history_duplicates']} of jobs "
+                    f"from previous runs, {stats['merged']} merged into the kept record), {stats['indexed']} postings indexed")
+
+    if prefilter is not None:
+        metrics.set_gauge('prefilter_forwarded', prefilter.forwarded)
+        metrics.set_gauge('prefilter_scored', prefilter.scored)
+        logger.info(f"    - Prefilter: forwarded {prefilter.forwarded} of {prefilter.scored} jobs to Gemini")
+
+    output_failed = False
+    for candidate in candidates:
+        jobs = all_jobs if len(candidates) == 1 else candidate_jobs(all_jobs, candidate.name)
+        jobs = [job for job in jobs if job.get('match_score', 0) > MIN_MATCH_SCORE]
+
+        if len(candidates) > 1:
+            logger.info(f"\n[+] Resume {candidate.name} ({candidate.resume_path})")
+        logger.info(f"matched jobs: {len(jobs)}")
+
+        if not jobs:
+            logger.info(f"No new jobs.")
+            job_stores[candidate.name].close()
+            continue
+
+        # 5. Rank and output results
+        logger.info("\n[+] Ranking and outputting results...")
+
+        try:
+            output_results(args, jobs, job_stores[candidate.name], candidate.output)
+        except Exception:
+            logger.exception(f"    - Error saving results to {candidate.store} and {candidate.output}")
+            output_failed = True
+        job_stores[candidate.name].close()
+    if checkpoint is not None:
+        if output_failed:
+            # Results are still checkpointed; --resume-run saves them without calling the APIs again
+            logger.warning(f"[!] Results were not saved; resume with --resume-run {checkpoint.run_id}")
         else:
-            # No existing file, create new one
-            df.to_csv(output_file, index=False)
-            print(f"[+] Complete results saved to {output_file}")
-        
-        print(f"\n[+] Job Matcher Pipeline Completed - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-
-    except Exception as e:
-            print(f"No new jobs.")
+            # Every result is in the job stores now; the run no longer needs resuming
+            checkpoint.complete()
+        checkpoint.close()
+    logger.info(f"\n[+] Job Matcher Pipeline Completed - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    enricher_stats = glassdoor_enricher.stats()
+    if enricher_stats['lookups']:
+        record_stats(metrics, 'glassdoor', enricher_stats)
+        logger.info(f"[+] Glassdoor lookups: {enricher_stats['lookups']} requested, {enricher_stats['api_calls']} CSE queries "
+                    f"({enricher_stats['saved_calls']} saved: {enricher_stats['memory_hits'] + enricher_stats['disk_hits']} cache hits, "
+                    f"{enricher_stats['coalesced']} coalesced, {enricher_stats['hit_rate']:.0%} hit rate)")
+    if rating_cache is not None:
+        rating_cache.close()
+
+    if gemini_matcher.batch_calls:
+        logger.info(f"[+] Gemini batching: {gemini_matcher.batched_jobs} jobs scored in {gemini_matcher.batch_calls} "
+                    f"batched calls, {gemini_matcher.fallback_jobs} fell back to single-job calls")
+
+    stats = gemini_matcher.quota.stats()
+    if stats['calls']:
+        record_stats(metrics, 'gemini_quota', stats)
+        logger.info(f"[+] Gemini quota: {stats['calls']} calls, concurrency {stats['concurrency']} "
+                    f"(peak {stats['peak_concurrency']}), {stats['throttled']} throttled, "
+                    f"{stats['wait_time']:.1f}s waited for quota, {stats['latency']:.1f}s smoothed latency")
+
+    if gemini_matcher.breaker.opened or gemini_matcher.retry_budget.retries or gemini_matcher.retry_budget.denied:
+        metrics.set_gauge('gemini_circuit_opened', gemini_matcher.breaker.opened)
+        metrics.set_gauge('gemini_retries_denied', gemini_matcher.retry_budget.denied)
+        logger.info(f"[+] Gemini resilience: circuit opened {gemini_matcher.breaker.opened} times, "
+                    f"{gemini_matcher.retry_budget.retries} retries, {gemini_matcher.retry_budget.denied} retries denied by budget")
+
+    if compactor is not None and compactor.descriptions:
+        stats = compactor.stats(prompts=gemini_matcher.single_calls + gemini_matcher.batch_calls)
+        record_stats(metrics, 'compaction', stats)
+        logger.info(f"[+] Prompt compaction: resume {stats['resume_tokens_in']} -> {stats['resume_tokens_out']} tokens, "
+                    f"{stats['descriptions']} descriptions {stats['description_tokens_in']} -> "
+                    f"{stats['description_tokens_out']} tokens, ~{stats['tokens_saved']} tokens saved this run")
+
+    if match_cache is not None:
+        stats = match_cache.stats()
+        record_stats(metrics, 'cache', stats, cache='gemini_matches')
+        logger.info(f"[+] Gemini match cache: {stats['hits']} hits, {stats['misses']} misses "
+                    f"({stats['hit_rate']:.0%} hit rate, {stats['entries']} entries stored)")
+        match_cache.close()
+
+    if http_cache is not None:
+        stats = http_cache.stats()
+        record_stats(metrics, 'cache', stats, cache='http_pages')
+        if stats['fresh_hits'] + stats['revalidated'] + stats['misses']:
+            logger.info(f"[+] Job page cache: {stats['requests_saved']} requests saved, {stats['revalidated']} revalidated (304), "
+                        f"{stats['misses']} misses, {stats['bytes_saved'] / 1024:.0f} KB not downloaded "
+                        f"({stats['entries']} pages, {stats['bytes'] / 1024:.0f} KB stored)")
+        http_cache.cache.close()
+
+    for host, stats in shared_rate_limiter().metrics().items():
+        record_stats(metrics, 'rate_limit', stats, host=host)
+        logger.info(f"[+] Rate limit {host}: {stats['requests']} requests, now {stats['rate']:.2f} req/s "
+                    f"({stats['throttled']} throttled, {stats['blocked']} blocked)")
+
+    write_run_report(args, metrics, {
+        'run_id': checkpoint.run_id if checkpoint is not None else None,
+        'resumed': checkpoint is not None and checkpoint.resumed,
+        'resumes': [candidate.resume_path for candidate in candidates],
+        'keywords': keywords_list,
+        'location': args.location,
+        'limit': args.limit,
+        'fetched': dict(pipeline.source_counts),
+        'evaluated': len(seen_jobs),
+        'deferred': len(still_failed),
+        'first_result_seconds': (pipeline.first_result_at - pipeline.started_at
+                                 if pipeline.first_result_at is not None else None),
+        'pipeline_seconds': pipeline.finished_at - pipeline.started_at,
+    })
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,345 @@
+"""
+Prompt Compaction Module
+
+This module shrinks the inputs of the Gemini prompts. The resume is condensed
+once per run into its most relevant sections (skills and experience first,
+email addresses, phone numbers, links and street addresses removed), and every job description is cleaned of equal
+opportunity boilerplate, benefits lists, repeated lines and redundant
+whitespace before being trimmed to a token budget at a line or sentence
+boundary. Token counts are estimated with a subword-style heuristic that
+tracks real tokenizers much more closely than a characters / 4 rule.
+"""
+
+import re
+import hashlib
+import threading
+
+from match_resume.parse_resume import split_sections
+
+# Words, single digits and punctuation marks, the pieces a subword tokenizer starts from
+TOKEN_PIECES = re.compile(r"[A-Za-z]+|\d|[^\sA-Za-z\d]")
+
+# Resume sections in the order they are kept. The splitter files any short line
+# mentioning "information" or "details" (e.g. "Bachelor of Information
+# Technology") under 'contact', so that section is kept like the others and
+# only the contact details themselves are removed (CONTACT_DETAIL)
+RESUME_SECTION_ORDER = ('skills', 'experience', 'projects', 'certifications', 'education', 'contact', 'other')
+
+# Sections added to the prompt without a heading
+UNLABELLED_SECTIONS = ('contact', 'other')
+
+# Email addresses, links and street or state/postcode addresses
+CONTACT_DETAIL = re.compile(
+    r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+"
+    r"|(?:https?://|www\.)\S+|\b(?:linkedin|github)\.com/\S*"
+    r"|\b\d{1,5}[A-Za-z]?\s+(?:[A-Z][\w'-]*\s+){1,3}"
+    r"(?i:street|st|road|rd|avenue|ave|drive|dr|lane|ln|court|ct|place|pl|parade|pde|crescent|cres|way|"
+    r"highway|hwy|terrace|tce|boulevard|blvd)\b\.?"
+    r"|\b(?:NSW|VIC|QLD|WA|SA|TAS|ACT|NT)\s+\d{4}\b"
+)
+
+# Digit runs that may be phone numbers; removed when they hold 8 or more digits
+# besides years and month/year dates (so "2015 - 2018" and "01.2019 - 03.2023"
+# stay) and are shaped like a phone number: a leading "+", "0" or area code, a
+# phone label on the line, or 9+ digits grouped without "." or "," that are not
+# thousands groups like "150 000 000"
+PHONE_NUMBER = re.compile(r"(?<![\w/])\+?(?:\(\d{1,4}\)|\d)[\d\s().-]{6,}\d(?![\w/])")
+PHONE_LABEL = re.compile(r"\b(?:phone|mobile|mob|tel|telephone)\b", re.IGNORECASE)
+MONTH_YEAR = re.compile(r"\b(?:0?[1-9]|1[0-2])[./](?:19|20)\d\d\b")
+THOUSANDS = re.compile(r"\d{1,3}(?:[ .,]\d{3})+")
+YEAR = re.compile(r"(?:19|20)\d\d")
+
+# Labels and separators left behind once the contact details of a line are removed
+CONTACT_LABEL = re.compile(
+    r"\b(?:e-?mail|phone|mobile|mob|tel|telephone|address|linkedin|github|website|web|portfolio)\b\s*:?"
+    r"|[|•·,;:/()\[\]-]", re.IGNORECASE)
+
+# Headings that open a section with no bearing on the fit (benefits, application instructions)
+SKIPPED_HEADING = re.compile(
+    r"^\W*(benefits|perks|what we offer|we offer|our offer|what'?s in it for you|why (join|work)|"
+    r"what you'?ll get|in return|the package|how to apply|apply now)\b", re.IGNORECASE)
+
+# Headings that open a relevant section again
+KEPT_HEADING = re.compile(
+    r"^\W*(about (you|the role|the team|the job|the position)|the role|your role|role overview|"
+    r"responsibilit|key (skills|responsibilities|requirements)|requirements|skills|qualifications|"
+    r"experience|what you'?ll (do|bring|need)|what we'?re looking for|who you are|must have|"
+    r"nice to have|essential|desirable|duties)", re.IGNORECASE)
+
+# Sentences of equal opportunity / diversity boilerplate
+BOILERPLATE_SENTENCE = re.compile(
+    r"equal (employment )?opportunit|regardless of (their )?(race|gender|age|background)|"
+    r"aboriginal and(/or)? torres strait|people with (a )?disabilit|reasonable adjustment|"
+    r"(diverse|inclusive) (and inclusive )?(workplace|workforce|environment|culture)|"
+    r"encourage[sd]? (applications|people|candidates|applicants) from|lgbt|veteran status|"
+    r"traditional (owners|custodians)|recruitment agenc|unsolicited", re.IGNORECASE)
+
+SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+')
+SPACES = re.compile(r'[ \t\u00a0]+')
+
+MAX_HEADING_LENGTH = 80
+
+# Short lines without sentence punctuation, e.g. "Tech stack" or "Our team:"
+HEADING_LIKE = re.compile(r"^[^\W\d_][^.,;!?]{0,38}:?$")
+
+
+def estimate_tokens(text):
+    """
+    Estimate the number of tokens a subword tokenizer produces for a text.
+
+    Short words count as one token and long words as several, while every
+    digit and punctuation mark counts on its own.
+
+    Args:
+        text (str): Text to measure
+
+    Returns:
+        int: Estimated token count
+    """
+    tokens = 0
+    for piece in TOKEN_PIECES.findall(text or ''):
+        tokens += 1 + max(0, len(piece) - 7) // 4
+    return tokens
+
+
+def truncate_to_tokens(text, max_tokens):
+    """
+    Cut a text to at most max_tokens estimated tokens.
+
+    The cut is moved back to the last line break or sentence end when one is
+    close, so the text does not end mid-sentence.
+
+    Args:
+        text (str): Text to truncate
+        max_tokens (int): Token budget
+
+    Returns:
+        str: The text, or its longest prefix within the budget
+    """
+    tokens = 0
+    cut = None
+    for match in TOKEN_PIECES.finditer(text):
+        tokens += 1 + max(0, len(match.group()) - 7) // 4
+        if tokens > max_tokens:
+            cut = match.start()
+            break
+    if cut is None:
+        return text
+
+    # Prefer a clean boundary within the last fifth of the kept text
+    boundary = max(text.rfind('\n', 0, cut), text.rfind('. ', 0, cut) + 1)
+    if boundary > cut * 0.8:
+        cut = boundary
+    return text[:cut].rstrip()
+
+
+def collapse_lines(text):
+    """
+    Normalise whitespace and drop empty and repeated lines.
+
+    Args:
+        text (str): Text with one paragraph or bullet per line
+
+    Returns:
+        str: Text with single spaces and each distinct line once
+    """
+    kept = []
+    seen = set()
+    for line in (text or '').split('\n'):
+        line = SPACES.sub(' ', line).strip()
+        if line and line.lower() not in seen:
+            seen.add(line.lower())
+            kept.append(line)
+    return '\n'.join(kept)
+
+
+def strip_contact_details(text):
+    """
+    Remove email addresses, phone numbers, links and addresses from a resume.
+
+    Only the contact details are removed; a line is dropped when nothing but
+    labels and separators is left of it.
+
+    Args:
+        text (str): Resume text
+
+    Returns:
+        str: Resume text without contact details
+    """
+    def is_phone_number(number, labelled):
+        groups = re.findall(r'\d+', MONTH_YEAR.sub(' ', number))
+        digits = sum(len(group) for group in groups)
+        if digits < 8 or all(YEAR.fullmatch(group) for group in groups):
+            return False
+        if labelled or number.startswith(('+', '0', '(')):
+            return True
+        return digits >= 9 and not re.search(r'[.,]', number) and not THOUSANDS.fullmatch(number)
+
+    kept = []
+    for line in (text or '').split('\n'):
+        labelled = bool(PHONE_LABEL.search(line))
+        stripped = PHONE_NUMBER.sub(
+            lambda match: ' ' if is_phone_number(match.group(0).strip(), labelled) else match.group(0),
+            CONTACT_DETAIL.sub(' ', line))
+        if stripped != line:
+            line = SPACES.sub(' ', stripped).strip(' |•·,;')
+            if not CONTACT_LABEL.sub('', line).strip():
+                continue
+        kept.append(line)
+    return '\n'.join(kept)
+
+
+def clean_description(text):
+    """
+    Remove boilerplate from a job description.
+
+    Drops equal opportunity / diversity sentences, benefits and application
+    sections, repeated lines, empty lines and redundant whitespace. A skipped
+    section covers the line after its heading and ends at the next
+    heading-like line that does not open another skipped section.
+
+    Args:
+        text (str): Job description with one paragraph or bullet per line
+
+    Returns:
+        str: Cleaned description
+    """
+    kept = []
+    seen = set()
+    skipping = False
+    after_heading = False
+    for line in (text or '').split('\n'):
+        line = SPACES.sub(' ', line).strip()
+        if not line:
+            continue
+
+        if len(line) <= MAX_HEADING_LENGTH:
+            if SKIPPED_HEADING.match(line):
+                skipping = after_heading = True
+                continue
+            if KEPT_HEADING.match(line) or (skipping and not after_heading and HEADING_LIKE.match(line)):
+                skipping = False
+        after_heading = False
+        if skipping:
+            continue
+
+        sentences = [s for s in SENTENCE_SPLIT.split(line) if not BOILERPLATE_SENTENCE.search(s)]
+        line = ' '.join(sentences)
+        normalized = line.lower()
+        if not line or normalized in seen:
+            continue
+        seen.add(normalized)
+        kept.append(line)
+    return '\n'.join(kept)
+
+
+class PromptCompactor:
+    """Condenses the resume and job descriptions to token budgets and tracks the savings."""
+
+    def __init__(self, resume_tokens=2000, description_tokens=1500):
+        """
+        Initialize the compactor.
+
+        Args:
+            resume_tokens (int): Token budget of the condensed resume
+            description_tokens (int): Token budget of each cleaned job description
+        """
+        self.resume_tokens = resume_tokens
+        self.description_tokens = description_tokens
+
+        self.resumes = 0
+        self.resume_tokens_in = 0
+        self.resume_tokens_out = 0
+        self.descriptions = 0
+        self.description_tokens_in = 0
+        self.description_tokens_out = 0
+        self._resume_cache = {}
+        self._description_cache = {}
+        self._lock = threading.Lock()
+
+    def compact_resume(self, resume_text):
+        """
+        Condense the resume into its relevant sections within the token budget.
+
+        The result is computed once per distinct resume text and reused.
+
+        Args:
+            resume_text (str): Full resume text
+
+        Returns:
+            str: Condensed resume
+        """
+        with self._lock:
+            if resume_text in self._resume_cache:
+                return self._resume_cache[resume_text]
+
+        sections = split_sections(strip_contact_details(resume_text), keep_headers=('contact',))
+        parts = []
+        remaining = self.resume_tokens
+        for name in RESUME_SECTION_ORDER:
+            content = collapse_lines(sections.get(name, ''))
+            if not content or remaining <= 0:
+                continue
+            block = f"{name.upper()}:\n{content}" if name not in UNLABELLED_SECTIONS else content
+            block = truncate_to_tokens(block, remaining)
+            parts.append(block)
+            remaining -= estimate_tokens(block)
+        summary = '\n\n'.join(parts) or truncate_to_tokens(resume_text, self.resume_tokens)
+
+        with self._lock:
+            if resume_text not in self._resume_cache:
+                self._resume_cache[resume_text] = summary
+                self.resumes += 1
+                self.resume_tokens_in += estimate_tokens(resume_text)
+                self.resume_tokens_out += estimate_tokens(summary)
+        return summary
+
+    def compact_description(self, description):
+        """
+        Clean a job description and trim it to the token budget.
+
+        Args:
+            description (str): Job description
+
+        Returns:
+            str: Compacted description (each distinct description is counted once)
+        """
+        description = description or ''
+        key = hashlib.sha1(description.encode('utf-8', errors='replace')).digest()
+        with self._lock:
+            if key in self._description_cache:
+                return self._description_cache[key]
+
+        compacted = truncate_to_tokens(clean_description(description), self.description_tokens)
+
+        with self._lock:
+            if key not in self._description_cache:
+                self._description_cache[key] = compacted
+                self.descriptions += 1
+                self.description_tokens_in += estimate_tokens(description)
+                self.description_tokens_out += estimate_tokens(compacted)
+        return compacted
+
+    def stats(self, prompts=1):
+        """
+        Summarise the tokens saved during the run.
+
+        Args:
+            prompts (int): Number of model calls that carried a resume
+
+        Returns:
+            dict: Token counts before and after compaction (summed over distinct resumes
+                  and descriptions) and the total saved
+        """
+        with self._lock:
+            # Average saving per prompt when several resumes were matched
+            resume_saved = max(0, self.resume_tokens_in - self.resume_tokens_out) // max(1, self.resumes)
+            description_saved = self.description_tokens_in - self.description_tokens_out
+            return {
+                'resume_tokens_in': self.resume_tokens_in,
+                'resume_tokens_out': self.resume_tokens_out,
+                'descriptions': self.descriptions,
+                'description_tokens_in': self.description_tokens_in,
+                'description_tokens_out': self.description_tokens_out,
+                'tokens_saved': resume_saved * prompts + description_saved,
+            }
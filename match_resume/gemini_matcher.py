@@ -8,20 +8,54 @@ providing a match score and insights into skill matches and gaps.
 import os
 import json
 import time
-import random
+import logging
 import google.generativeai as genai
 from dotenv import load_dotenv
 
+from common.disk_cache import make_key
+from common.metrics import shared_metrics
+from match_resume.compaction import estimate_tokens
+from match_resume.resilience import (CircuitBreaker, CircuitOpenError, RetryBudget, ERROR_QUOTA, ERROR_TRANSIENT,
+                                     FAILED_MATCH_PREFIX, backoff_delay, classify_error, is_failed_match,
+                                     suggested_delay)
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the single-job or batched prompt (or their parsing) changes so
+# cached results produced by an older prompt are not reused. Both prompts ask
+# for the same scoring, so their results share cache entries.
+PROMPT_VERSION = 1
+
 class GeminiMatcher:
     """Class to match job descriptions with resume using Google's Gemini API."""
+
+    # Add reasonable text limits to avoid exceeding token limits
+    # These are just examples, adjust based on typical input size and model limits
+    MAX_RESUME_TOKENS = 8000
+    MAX_JOB_DESC_TOKENS = 4000
+    # Tokens reserved per job in a batched response
+    BATCH_OUTPUT_TOKENS_PER_JOB = 250
     
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, model_name='gemini-1.5-pro', cache=None, compactor=None, breaker=None,
+                 retry_budget=None, quota=None, metrics=None):
         """
         Initialize the Gemini Matcher.
         
         Args:
             api_key (str, optional): Google API key for Gemini. If not provided,
                                      it will try to load from environment variables.
+            model_name (str): Gemini model used for matching
+            cache (DiskCache, optional): Persistent cache for match results. Results are
+                                         keyed by a hash of all prompt inputs, so only new
+                                         or changed postings reach the model.
+            compactor (PromptCompactor, optional): Condenses the resume and cleans job
+                                                   descriptions to token budgets. Without it
+                                                   inputs are cut at the MAX_*_TOKENS limits.
+            breaker (CircuitBreaker, optional): Circuit breaker shared by all matching workers
+            retry_budget (RetryBudget, optional): Retry budget shared by all matching workers
+            quota (QuotaController, optional): Schedules calls within the model's RPM/TPM
+                                               quota and adapts how many run concurrently
+            metrics (MetricsRegistry, optional): Run metrics; defaults to the process-wide registry
         """
         # Load API key from environment if not provided
         if api_key is None:
@@ -35,11 +69,31 @@ class GeminiMatcher:
         genai.configure(api_key=api_key)
         
         # Get available models
-        self.model = genai.GenerativeModel('gemini-1.5-pro')
+        self.model_name = model_name
+        self.model = genai.GenerativeModel(model_name)
+        self.cache = cache
+        self.compactor = compactor
+        self.breaker = breaker or CircuitBreaker()
+        self.retry_budget = retry_budget or RetryBudget()
+        self.quota = quota
+        self.metrics = metrics or shared_metrics()
+
+        # Model calls carrying the resume (used to report tokens saved by compaction)
+        self.single_calls = 0
+
+        # Batched scoring statistics
+        self.batch_calls = 0
+        self.batched_jobs = 0
+        self.fallback_jobs = 0
     
     def match_job(self, job, resume_text):
         """
         Match a job description with the resume content.
+
+        Transient errors are retried with jittered back-off while the shared retry
+        budget allows it. Quota errors, fatal errors, an open circuit breaker or an
+        exhausted budget end the attempt with a failed result (see is_failed_match())
+        so the job can be rescored later instead of being scored 0.
     
         Args:
             job (dict): Job information including description
@@ -48,74 +102,343 @@ class GeminiMatcher:
         Returns:
             dict: Dictionary with match score and insights
         """
-        max_retries = 3
-        retry_delay = 2
-    
-        # Add reasonable text limits to avoid exceeding token limits
-        # These are just examples, adjust based on typical input size and model limits
-        max_resume_tokens = 8000 # Example limit, adjust as needed
-        max_job_desc_tokens = 4000 # Example limit, adjust as needed
-        
-        # Simple truncation - consider using a more sophisticated tokenizer if needed
-        resume_text = resume_text[:max_resume_tokens * 4] # Rough estimate, ~4 chars per token
-        job_description = job.get('description', '')
-        job_description = job_description[:max_job_desc_tokens * 4]
+        resume_text, job_description = self._truncate_inputs(resume_text, job)
     
         if not job_description:
-            return {
-                'match_score': 0,
-                'skill_matches': [],
-                'skill_gaps': [],
-                'match_reason': 'No job description available'
-            }
+            return self._no_description_result()
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self._cache_key(resume_text, job_description, job.get('title', ''), job.get('company', ''))
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        return self._match_single(job, resume_text, job_description, cache_key)
+
+    def _match_single(self, job, resume_text, job_description, cache_key=None):
+        """
+        Score one job in its own model call, after the cache has been checked.
+
+        Args:
+            job (dict): Job information
+            resume_text (str): Compacted resume text
+            job_description (str): Compacted job description
+            cache_key (str, optional): Key the result is cached under
+
+        Returns:
+            dict: Dictionary with match score and insights
+        """
+        max_retries = 3
+        retry_delay = 2
+        title = job.get('title', '')
+        company = job.get('company', '')
+
+        # Construct the prompt for Gemini
+        prompt = self._construct_prompt(resume_text, job_description, title, company)
+        self.retry_budget.record_attempt()
     
         for attempt in range(max_retries):
             try:
-                # Construct the prompt for Gemini
-                prompt = self._construct_prompt(resume_text, job_description, job.get('title', ''), job.get('company', ''))
-    
-                # Call the Gemini API with the correct parameter name
-                response = self.model.generate_content(
-                    prompt,
-                    generation_config={"response_mime_type": "application/json"}  # Changed from request_options
-                )
-    
-                # Access the text property of the response content
-                response_text = response.text
+                response = self._generate(prompt)
+                self.single_calls += 1
     
                 # Parse the response
-                match_result = self._parse_response(response_text)
+                match_result = self._parse_response(response.text)
     
                 # If parsing was successful, return the result
-                if match_result.get('match_reason') != 'Unable to parse API response':
+                if not match_result.get('match_reason', '').startswith(('Unable to parse API response', 'Error parsing response')):
+                     if cache_key is not None:
+                         self.cache.set(cache_key, match_result)
                      return match_result
     
                 # If parsing failed but no API exception, it means the model didn't return valid JSON
                 # Treat as an API error.
                 raise ValueError("API returned non-parseable content despite JSON response type request.")
-    
+
+            except CircuitOpenError:
+                return self._failed_result('Gemini circuit breaker is open')
             except Exception as e:
-                if attempt < max_retries - 1:
-                    sleep_time = retry_delay * (2 ** attempt) + random.uniform(0, 1)
-                    print(f"Gemini API error: {str(e)}. Retrying in {sleep_time:.1f}s...")
-                    # Optionally log the raw response text here if available, for debugging
-                    # print(f"Raw response causing error: {getattr(response, 'text', 'N/A')}")
+                kind = classify_error(e)
+                retry = (kind == ERROR_TRANSIENT and attempt < max_retries - 1
+                         and self.retry_budget.try_retry())
+                if retry:
+                    sleep_time = backoff_delay(attempt, retry_delay)
+                    self.metrics.increment('retries_total', service='gemini', kind='single')
+                    logger.warning(f"Gemini API error ({kind}): {str(e)}. Retrying in {sleep_time:.1f}s...")
                     time.sleep(sleep_time)
-                else:
-                    print(f"Failed to match job after {max_retries} attempts: {str(e)}")
-                    # Include the specific inputs that failed for debugging
-                    print(f"Job Description: {job_description[:200]}...") # Print first 200 chars
-                    print(f"Job Title: {job.get('title', 'N/A')}")
-                    print(f"Company: {job.get('company', 'N/A')}")
-                    print(f"Resume Text: {resume_text[:200]}...") # Print first 200 chars
-    
-                    return {
-                        'match_score': 0,
-                        'skill_matches': [],
-                        'skill_gaps': [],
-                        'match_reason': f'API error after retries: {str(e)}'
-                    }
-    
+                    continue
+
+                logger.warning(f"Failed to match {title} ({company}) after {attempt + 1} attempts ({kind}): {str(e)}",
+                               extra={'job_id': job.get('job_id'), 'error_kind': kind, 'attempts': attempt + 1})
+                return self._failed_result(f'{kind}: {str(e)}')
+
+    def _generate(self, prompt, kind='single'):
+        """
+        Call the model through the shared circuit breaker and quota controller.
+
+        Args:
+            prompt (str): Prompt text
+            kind (str): 'single' or 'batch', the request type label of the recorded metrics
+
+        Raises:
+            CircuitOpenError: When the breaker is open and the call was not attempted
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError()
+        tokens = estimate_tokens(prompt)
+        waited = time.perf_counter()
+        started = self.quota.acquire(tokens) if self.quota is not None else None
+        call_started = time.perf_counter()
+        self.metrics.observe('rate_limit_wait_seconds', call_started - waited, service='gemini')
+        self.metrics.increment('prompt_tokens_total', tokens, service='gemini', kind=kind)
+        try:
+            response = self.model.generate_content(
+                prompt,
+                generation_config={"response_mime_type": "application/json"}
+            )
+        except Exception as e:
+            error_kind = classify_error(e)
+            self.metrics.record_request('gemini', kind, time.perf_counter() - call_started, error_kind)
+            if started is not None:
+                self.quota.release(started, throttled=error_kind == ERROR_QUOTA)
+            self.breaker.record_failure(error_kind, suggested_delay(e))
+            raise
+        self.metrics.record_request('gemini', kind, time.perf_counter() - call_started)
+        if started is not None:
+            self.quota.release(started)
+        self.breaker.record_success()
+        return response
+
+    def match_jobs(self, jobs, resume_text, token_budget=30000, max_batch_size=10):
+        """
+        Match several jobs against the resume, batching them into shared model calls.
+
+        The resume is sent once per batch instead of once per job. Batches are sized
+        so that the resume, the job descriptions and the expected output stay within
+        token_budget. Jobs whose batched result is missing or fails validation fall
+        back to an individual call. When a batch fails on quota or is refused by the
+        open circuit breaker, its jobs get failed results (see is_failed_match())
+        instead, as single calls would fail the same way.
+
+        Args:
+            jobs (list): Job dictionaries including descriptions
+            resume_text (str): Text content of the resume
+            token_budget (int): Approximate maximum tokens (input + output) per call
+            max_batch_size (int): Maximum number of jobs per call
+
+        Returns:
+            list: Match result dictionaries aligned with `jobs`
+        """
+        results = [None] * len(jobs)
+        pending = []
+
+        cache_keys = {}
+        truncated_resume = None
+        for index, job in enumerate(jobs):
+            truncated_resume, job_description = self._truncate_inputs(resume_text, job)
+            if not job_description:
+                results[index] = self._no_description_result()
+                continue
+
+            if self.cache is not None:
+                cache_keys[index] = self._cache_key(truncated_resume, job_description,
+                                                    job.get('title', ''), job.get('company', ''))
+                cached = self.cache.get(cache_keys[index])
+                if cached is not None:
+                    results[index] = cached
+                    continue
+
+            pending.append((index, job, job_description))
+
+        for batch in self._plan_batches(truncated_resume or '', pending, token_budget, max_batch_size):
+            if len(batch) == 1:
+                # Already looked up in the cache above
+                index, job, job_description = batch[0]
+                results[index] = self._match_single(job, truncated_resume, job_description, cache_keys.get(index))
+                continue
+
+            batch_results = self._match_batch(truncated_resume, batch)
+            for index, job, job_description in batch:
+                result = batch_results.get(index)
+                if result is None:
+                    # Missing or invalid in the batched response: score individually
+                    self.fallback_jobs += 1
+                    result = self._match_single(job, truncated_resume, job_description, cache_keys.get(index))
+                elif self.cache is not None and not is_failed_match(result):
+                    self.cache.set(cache_keys[index], result)
+                results[index] = result
+
+        return results
+
+    def _plan_batches(self, resume_text, pending, token_budget, max_batch_size):
+        """Group pending jobs into batches that fit within the token budget."""
+        base_tokens = estimate_tokens(resume_text) + 500  # Resume plus instructions
+        batches = []
+        batch = []
+        batch_tokens = base_tokens
+        for entry in pending:
+            _, job, job_description = entry
+            job_tokens = (estimate_tokens(job_description) + estimate_tokens(job.get('title', ''))
+                          + self.BATCH_OUTPUT_TOKENS_PER_JOB + 20)
+            if batch and (len(batch) >= max_batch_size or batch_tokens + job_tokens > token_budget):
+                batches.append(batch)
+                batch = []
+                batch_tokens = base_tokens
+            batch.append(entry)
+            batch_tokens += job_tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _match_batch(self, resume_text, batch):
+        """
+        Score one batch of jobs in a single model call.
+
+        Returns:
+            dict: Mapping of job index to validated match result (invalid items are omitted);
+                  every job gets a failed result when the call failed on quota or the
+                  circuit breaker is open, and none when it failed otherwise
+        """
+        batch_ids = {f"J{position + 1}": index for position, (index, _, _) in enumerate(batch)}
+        prompt = self._construct_batch_prompt(resume_text, [
+            (f"J{position + 1}", job.get('title', ''), job.get('company', ''), job_description)
+            for position, (_, job, job_description) in enumerate(batch)
+        ])
+
+        try:
+            response = self._generate(prompt, kind='batch')
+            self.batch_calls += 1
+            parsed = self._parse_batch_response(response.text, batch_ids)
+        except CircuitOpenError:
+            return {index: self._failed_result('Gemini circuit breaker is open') for index, _, _ in batch}
+        except Exception as e:
+            kind = classify_error(e)
+            if kind == ERROR_QUOTA:
+                # Single-job calls would hit the same quota: defer the whole batch
+                logger.warning(f"Batched Gemini call failed ({len(batch)} jobs, {kind}): {str(e)}. Deferring the batch.")
+                return {index: self._failed_result(f'{kind}: {str(e)}') for index, _, _ in batch}
+            logger.warning(f"Batched Gemini call failed ({len(batch)} jobs, {kind}): {str(e)}. "
+                           f"Falling back to single-job calls.")
+            return {}
+
+        self.batched_jobs += len(parsed)
+        return parsed
+
+    def _construct_batch_prompt(self, resume_text, batch_jobs):
+        """Construct a prompt scoring several jobs against the resume in one call."""
+        jobs_block = "\n".join(
+            f"""=== JOB {job_id} ===
+Title: {job_title}
+Company: {company}
+Description: {job_description}
+"""
+            for job_id, job_title, company, job_description in batch_jobs
+        )
+        return f"""
+You are a seasoned recruitment analyst evaluating how well a candidate's resume aligns with several job descriptions.
+
+INPUT:
+RESUME:
+{resume_text}
+
+JOBS:
+{jobs_block}
+TASK:
+Analyze the resume against each job description independently and return only a JSON array with one object per job. Each object has the following fields:
+
+1. "job_id": The id from the job's header (for example "J1"), copied exactly.
+2. "match_score": Integer (0–100). Overall fit between resume and job.
+3. "skill_matches": List of 5 key skills, qualifications, or experiences from the resume that clearly align with the job requirements.
+4. "skill_gaps": List of 5 job requirements not present or weak in the resume.
+5. "match_reason": 1-2 sentence explanation of the score.
+
+FORMAT:
+Respond only with a JSON array like this:
+[
+  {{
+    "job_id": "J1",
+    "match_score": 85,
+    "skill_matches": ["Python programming", "Data analysis", "Machine learning experience", "Project management"],
+    "skill_gaps": ["Knowledge of AWS", "Hadoop experience"],
+    "match_reason": "Strong analytical and technical alignment."
+  }}
+]
+"""
+
+    def _parse_batch_response(self, response_text, batch_ids):
+        """
+        Parse and validate a batched response.
+
+        Args:
+            response_text (str): Text response from the API (expected to be a JSON array)
+            batch_ids (dict): Mapping of batch job id ("J1", ...) to job index
+
+        Returns:
+            dict: Mapping of job index to match result, for valid items only
+        """
+        try:
+            items = json.loads(response_text)
+        except json.JSONDecodeError as e:
+            logger.warning(f"JSON decoding error in batched response: {e}")
+            return {}
+
+        # Tolerate the array being wrapped in an object, e.g. {"results": [...]}
+        if isinstance(items, dict):
+            items = next((value for value in items.values() if isinstance(value, list)), [])
+        if not isinstance(items, list):
+            return {}
+
+        parsed = {}
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            index = batch_ids.get(str(item.get('job_id', '')).strip())
+            if index is None or index in parsed:
+                continue
+            # A batched item is only accepted with a usable score; anything else is rescored
+            try:
+                int(item.get('match_score'))
+            except (ValueError, TypeError):
+                continue
+            result = {key: item.get(key) for key in ['match_score', 'skill_matches', 'skill_gaps', 'match_reason']}
+            parsed[index] = self._normalize_result(result)
+        return parsed
+
+    def _truncate_inputs(self, resume_text, job):
+        """Compact (or truncate) the resume and job description to the configured token limits."""
+        if self.compactor is not None:
+            return (self.compactor.compact_resume(resume_text),
+                    self.compactor.compact_description(job.get('description', '')))
+
+        # Simple truncation when no compactor is configured
+        resume_text = resume_text[:self.MAX_RESUME_TOKENS * 4] # Rough estimate, ~4 chars per token
+        job_description = job.get('description', '')
+        job_description = job_description[:self.MAX_JOB_DESC_TOKENS * 4]
+        return resume_text, job_description
+
+    def _failed_result(self, reason):
+        """Result of a match that failed at the API and should be rescored later."""
+        return {
+            'match_score': 0,
+            'skill_matches': [],
+            'skill_gaps': [],
+            'match_reason': f'{FAILED_MATCH_PREFIX}: {reason}'
+        }
+
+    def _no_description_result(self):
+        """Result returned for jobs without a description."""
+        return {
+            'match_score': 0,
+            'skill_matches': [],
+            'skill_gaps': [],
+            'match_reason': 'No job description available'
+        }
+
+    def _cache_key(self, resume_text, job_description, job_title, company):
+        """Content-addressed cache key covering every input of the prompt."""
+        return make_key(resume_text, job_description, job_title, company, self.model_name, PROMPT_VERSION)
+
     def _construct_prompt(self, resume_text, job_description, job_title, company):
         """Construct an effective prompt for the Gemini API."""
         return f"""
@@ -161,38 +484,13 @@ Respond only with a JSON object like this:
         try:
             # With mime_type='application/json', the entire response should be the JSON object
             result = json.loads(response_text)
-            print(result)
-
-            # Ensure all expected keys are present (still a good practice)
-            required_keys = ['match_score', 'skill_matches', 'skill_gaps', 'match_reason']
-            for key in required_keys:
-                if key not in result:
-                    # Provide sensible defaults if a key is missing
-                    result[key] = [] if key in ['skill_matches', 'skill_gaps'] else None if key == 'match_score' else ''
-
-            # Ensure match_score is an integer between 0-100
-            try:
-                score = int(result.get('match_score', 50)) # Default to 50 if key missing or not number
-                result['match_score'] = max(0, min(100, score))
-            except (ValueError, TypeError):
-                 result['match_score'] = 50 # Default if conversion fails
-
-
-            # Ensure skill_matches and skill_gaps are lists
-            if not isinstance(result.get('skill_matches'), list):
-                result['skill_matches'] = []
-            if not isinstance(result.get('skill_gaps'), list):
-                 result['skill_gaps'] = []
+            logger.debug(result)
 
-            # Ensure match_reason is a string
-            if not isinstance(result.get('match_reason'), str):
-                 result['match_reason'] = ''
-
-            return result
+            return self._normalize_result(result)
 
         except json.JSONDecodeError as e:
-            print(f"JSON decoding error: {e}")
-            print(f"Raw response text: {response_text}") # Log the problematic response
+            logger.warning(f"JSON decoding error: {e}")
+            logger.warning(f"Raw response text: {response_text}") # Log the problematic response
             return {
                 'match_score': 50,
                 'skill_matches': [],
@@ -200,11 +498,48 @@ Respond only with a JSON object like this:
                 'match_reason': f'Unable to parse API response (JSON Error: {e})'
             }
         except Exception as e:
-            print(f"Error parsing Gemini response: {str(e)}")
-            print(f"Raw response text: {response_text}") # Log the problematic response
+            logger.warning(f"Error parsing Gemini response: {str(e)}")
+            logger.warning(f"Raw response text: {response_text}") # Log the problematic response
             return {
                 'match_score': 50,
                 'skill_matches': [],
                 'skill_gaps': [],
                 'match_reason': f'Error parsing response: {str(e)}'
-            }
\ No newline at end of file
+            }
+
+    def _normalize_result(self, result):
+        """
+        Fill in missing keys and coerce field types of a parsed match result.
+
+        Args:
+            result (dict): Parsed match result
+
+        Returns:
+            dict: Normalized match result
+        """
+        # Ensure all expected keys are present (still a good practice)
+        required_keys = ['match_score', 'skill_matches', 'skill_gaps', 'match_reason']
+        for key in required_keys:
+            if key not in result:
+                # Provide sensible defaults if a key is missing
+                result[key] = [] if key in ['skill_matches', 'skill_gaps'] else None if key == 'match_score' else ''
+
+        # Ensure match_score is an integer between 0-100
+        try:
+            score = int(result.get('match_score', 50)) # Default to 50 if key missing or not number
+            result['match_score'] = max(0, min(100, score))
+        except (ValueError, TypeError):
+             result['match_score'] = 50 # Default if conversion fails
+
+
+        # Ensure skill_matches and skill_gaps are lists
+        if not isinstance(result.get('skill_matches'), list):
+            result['skill_matches'] = []
+        if not isinstance(result.get('skill_gaps'), list):
+             result['skill_gaps'] = []
+
+        # Ensure match_reason is a string
+        if not isinstance(result.get('match_reason'), str):
+             result['match_reason'] = ''
+
+        return result
@@ -2,24 +2,146 @@
 Resume Parser Module
 
 This module extracts text from a PDF resume using PyMuPDF (fitz).
-It handles various PDF formats and cleans the extracted text.
+It handles various PDF formats and cleans the extracted text. Pages are
+extracted one by one (in a process pool across page ranges for long PDFs),
+and only the pages PyMuPDF fails on are re-read with pdfminer. Parsed text and
+sections can be cached on disk by the PDF's content hash, so repeated runs
+with an unchanged resume skip PDF parsing entirely.
 """
 
 import fitz  # PyMuPDF
 import re
 import os
+import time
+import logging
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+from common.disk_cache import make_key
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever text extraction, cleaning or section splitting changes so
+# cached results of an older parser are not reused.
+PARSER_VERSION = 2
+
+# PDFs with fewer pages are extracted in-process: starting the worker processes
+# costs more than extracting a few dozen text pages
+PARALLEL_MIN_PAGES = 48
+
+MULTIPLE_NEWLINES = re.compile(r'\n{2,}')
+MULTIPLE_SPACES = re.compile(r' {2,}')
+
+# Runs of characters other than printable ASCII and newlines; only these can
+# contain non-printable characters, so plain ASCII text is skipped at regex speed
+NON_ASCII_RUN = re.compile(r'[^\n -~]+')
+
+# Section headers in priority order: a line naming several sections belongs to the first one
+SECTION_PATTERNS = {
+    'education': r'education|academic|qualifications',
+    'experience': r'experience|work|employment|job|career',
+    'skills': r'skills|competencies|technologies|tools|technical',
+    'projects': r'projects|portfolio',
+    'certifications': r'certifications|certificates|awards',
+    'contact': r'contact|personal|details|information'
+}
+
+# One pass over each line: the branches are tried in order at the start of the
+# line and each looks ahead for its keywords, so the matched group is the first
+# section in priority order (as with one search per pattern)
+SECTION_HEADER = re.compile(
+    '|'.join(f'(?=.*?(?:{pattern}))(?P<{name}>)' for name, pattern in SECTION_PATTERNS.items()),
+    re.IGNORECASE | re.DOTALL
+)
+
+# Headers are short lines
+MAX_HEADER_LENGTH = 50
+
+
+class _NonPrintableTable(dict):
+    """str.translate table deleting non-printable characters except newlines, filled lazily per code point."""
+
+    def __missing__(self, codepoint):
+        value = codepoint if codepoint == 10 or chr(codepoint).isprintable() else None
+        self[codepoint] = value
+        return value
+
+
+# Latin-1 is filled up front, other code points on first use
+NON_PRINTABLE = _NonPrintableTable(
+    (codepoint, codepoint if codepoint == 10 or chr(codepoint).isprintable() else None) for codepoint in range(256)
+)
+
+
+def _drop_non_printable(match):
+    """Remove the non-printable characters of a NON_ASCII_RUN match."""
+    run = match.group()
+    return run if run.isprintable() else run.translate(NON_PRINTABLE)
+
+
+def _extract_page_range(pdf_path, start, stop):
+    """
+    Extract the text of a range of pages with PyMuPDF.
+
+    Runs in a worker process, so the document is opened here rather than shared.
+
+    Args:
+        pdf_path (str): Path to the PDF file
+        start (int): First page number (0-based)
+        stop (int): Page number after the last page
+
+    Returns:
+        list: (page number, text or None when PyMuPDF failed, seconds) per page
+    """
+    pages = []
+    with fitz.open(pdf_path) as doc:
+        for number in range(start, stop):
+            started = time.perf_counter()
+            try:
+                text = doc[number].get_text()
+            except Exception:
+                text = None
+            pages.append((number, text, time.perf_counter() - started))
+    return pages
+
+
+def _page_ranges(page_count, parts):
+    """Split page numbers into up to `parts` contiguous (start, stop) ranges of similar size."""
+    parts = max(1, min(parts, page_count))
+    size, extra = divmod(page_count, parts)
+    ranges = []
+    start = 0
+    for index in range(parts):
+        stop = start + size + (1 if index < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
 
 class ResumeParser:
     """Class to parse and extract text from resume PDFs."""
     
-    def __init__(self, pdf_path):
+    def __init__(self, pdf_path, cache=None, workers=None, parallel_min_pages=PARALLEL_MIN_PAGES):
         """
         Initialize the resume parser.
         
         Args:
             pdf_path (str): Path to the resume PDF file
+            cache (DiskCache, optional): Persistent cache of parsed resumes, keyed by the
+                                         PDF's content hash and PARSER_VERSION
+            workers (int, optional): Processes used for long PDFs (default: CPU count)
+            parallel_min_pages (int): Page count from which pages are extracted in parallel
         """
         self.pdf_path = pdf_path
+        self.cache = cache
+        self.workers = workers or os.cpu_count() or 1
+        self.parallel_min_pages = parallel_min_pages
+        self.cache_hit = False
+        # Per-page extraction details of the last parse: page, seconds and method
+        self.page_timings = []
+        self._text = None
+        self._sections = None
+        self._cache_key = None
         
         # Verify the file exists
         if not os.path.exists(pdf_path):
@@ -29,36 +151,112 @@ class ResumeParser:
         if not pdf_path.lower().endswith('.pdf'):
             raise ValueError("Resume file must be a PDF")
     
+    def content_hash(self):
+        """
+        Hash the PDF's bytes.
+
+        Returns:
+            str: Hex SHA-256 digest of the file content
+        """
+        digest = hashlib.sha256()
+        with open(self.pdf_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _load_cached(self):
+        """Fill the parsed text and sections from the cache; returns True on a hit."""
+        if self.cache is None:
+            return False
+        self._cache_key = make_key('resume', self.content_hash(), PARSER_VERSION)
+        cached = self.cache.get(self._cache_key)
+        if cached is None:
+            return False
+        self._text = cached['text']
+        self._sections = cached.get('sections')
+        self.cache_hit = True
+        return True
+
+    def _store_cached(self):
+        """Save the parsed text and sections (failed extractions are not cached)."""
+        if self.cache is not None and self._cache_key is not None and self._text:
+            self.cache.set(self._cache_key, {'text': self._text, 'sections': self._sections})
+
     def extract_text(self):
         """
         Extract text content from the PDF resume.
+
+        The text is parsed at most once per instance, and not at all when the
+        cache holds a result for the same PDF content and parser version.
         
         Returns:
             str: Cleaned text extracted from the resume
         """
-        text = ""
-        
+        if self._text is None and not self._load_cached():
+            self._text = self._parse_pdf()
+            self._store_cached()
+        return self._text
+
+    def _parse_pdf(self):
+        """
+        Parse the PDF page by page with PyMuPDF, falling back to pdfminer per page.
+
+        Long PDFs are split into page ranges extracted in a process pool. Pages
+        PyMuPDF fails on are re-read with pdfminer; if the document cannot be
+        opened at all, pdfminer extracts the whole file.
+
+        Returns:
+            str: Cleaned text extracted from the resume
+        """
+        self.page_timings = []
         try:
-            # Open the PDF document
-            doc = fitz.open(self.pdf_path)
-            
-            # Extract text from each page
-            for page in doc:
-                text += page.get_text()
-                
-            # Close the document
-            doc.close()
-            
-            # Clean the extracted text
-            cleaned_text = self._clean_text(text)
-            
-            return cleaned_text
-            
+            # Open the PDF document to count its pages
+            with fitz.open(self.pdf_path) as doc:
+                page_count = doc.page_count
         except Exception as e:
-            print(f"Error extracting text from resume: {str(e)}")
+            logger.warning(f"Error extracting text from resume: {str(e)}")
             
             # Try alternate method if primary fails
             return self._extract_text_alternate()
+
+        pages = self._extract_pages(page_count)
+
+        texts = []
+        for number, text, seconds in pages:
+            method = 'pymupdf'
+            if text is None:
+                started = time.perf_counter()
+                text = self._extract_page_alternate(number)
+                seconds += time.perf_counter() - started
+                method = 'pdfminer'
+            texts.append(text)
+            self.page_timings.append({'page': number + 1, 'seconds': seconds, 'method': method})
+
+        # Clean the extracted text
+        return self._clean_text(''.join(texts))
+
+    def _extract_pages(self, page_count):
+        """
+        Extract every page with PyMuPDF, in parallel for long documents.
+
+        Args:
+            page_count (int): Number of pages in the PDF
+
+        Returns:
+            list: (page number, text or None, seconds) per page, in page order
+        """
+        if page_count < self.parallel_min_pages or self.workers < 2:
+            return _extract_page_range(self.pdf_path, 0, page_count)
+
+        ranges = _page_ranges(page_count, self.workers)
+        try:
+            with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+                futures = [executor.submit(_extract_page_range, self.pdf_path, start, stop) for start, stop in ranges]
+                return [page for future in futures for page in future.result()]
+        except Exception as e:
+            # Process pools are not available everywhere (e.g. some sandboxes)
+            logger.warning(f"Parallel page extraction failed ({str(e)}), extracting pages sequentially")
+            return _extract_page_range(self.pdf_path, 0, page_count)
     
     def _clean_text(self, text):
         """
@@ -71,13 +269,13 @@ class ResumeParser:
             str: Cleaned text
         """
         # Replace multiple newlines with a single one
-        text = re.sub(r'\n+', '\n', text)
+        text = MULTIPLE_NEWLINES.sub('\n', text)
         
         # Replace multiple spaces with a single one
-        text = re.sub(r' +', ' ', text)
+        text = MULTIPLE_SPACES.sub(' ', text)
         
         # Remove any non-printable characters
-        text = ''.join(c for c in text if c.isprintable() or c == '\n')
+        text = NON_ASCII_RUN.sub(_drop_non_printable, text)
         
         # Strip whitespace from each line
         lines = [line.strip() for line in text.split('\n')]
@@ -105,70 +303,97 @@ class ResumeParser:
             return cleaned_text
             
         except ImportError:
-            print("pdfminer.six is not installed. Cannot use alternate extraction method.")
+            logger.warning("pdfminer.six is not installed. Cannot use alternate extraction method.")
+            return ""
+        except Exception as e:
+            logger.warning(f"Error in alternate text extraction: {str(e)}")
+            return ""
+
+    def _extract_page_alternate(self, number):
+        """
+        Extract a single page with pdfminer, for a page PyMuPDF failed on.
+
+        Args:
+            number (int): Page number (0-based)
+
+        Returns:
+            str: Raw page text, or an empty string if it failed
+        """
+        try:
+            from pdfminer.high_level import extract_text as pm_extract_text
+            return pm_extract_text(self.pdf_path, page_numbers=[number])
+        except ImportError:
+            logger.warning(f"pdfminer.six is not installed. Cannot re-read page {number + 1}.")
             return ""
         except Exception as e:
-            print(f"Error in alternate text extraction: {str(e)}")
+            logger.warning(f"Error in alternate text extraction of page {number + 1}: {str(e)}")
             return ""
     
     def extract_sections(self):
         """
         Attempt to extract common resume sections.
+
+        Reuses the already extracted (or cached) text instead of parsing the PDF again.
         
         Returns:
             dict: Dictionary with resume sections and their content
         """
         text = self.extract_text()
-        
-        # Common section headers in resumes
-        sections = {
-            'education': r'(?i)education|academic|qualifications',
-            'experience': r'(?i)experience|work|employment|job|career',
-            'skills': r'(?i)skills|competencies|technologies|tools|technical',
-            'projects': r'(?i)projects|portfolio',
-            'certifications': r'(?i)certifications|certificates|awards',
-            'contact': r'(?i)contact|personal|details|information'
-        }
-        
-        extracted_sections = {}
-        
-        # Split the text into lines
-        lines = text.split('\n')
-        
-        current_section = 'other'
-        section_content = []
-        
-        # Process each line
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-                
-            # Check if line is a section header
-            section_found = False
-            for section_name, pattern in sections.items():
-                if re.search(pattern, line) and len(line) < 50:  # Assuming headers are not too long
-                    # Save previous section content
-                    if section_content:
-                        if current_section in extracted_sections:
-                            extracted_sections[current_section] += '\n'.join(section_content)
-                        else:
-                            extracted_sections[current_section] = '\n'.join(section_content)
-                    
-                    # Start new section
-                    current_section = section_name
-                    section_content = []
-                    section_found = True
-                    break
+        if self._sections is None:
+            self._sections = split_sections(text)
+            self._store_cached()
+        return self._sections
+
+
+def split_sections(text, keep_headers=()):
+    """
+    Split resume text into common sections using header keywords.
+
+    Args:
+        text (str): Cleaned resume text
+        keep_headers (iterable, optional): Sections whose header lines are kept as the first
+                                           line of their content instead of being dropped
+
+    Returns:
+        dict: Dictionary with resume sections and their content
+    """
+    extracted_sections = {}
+    
+    # Split the text into lines
+    lines = text.split('\n')
+    
+    current_section = 'other'
+    section_content = []
+
+    def save_section():
+        # A section header seen twice appends to the earlier content
+        content = '\n'.join(section_content)
+        if current_section in extracted_sections:
+            extracted_sections[current_section] += '\n' + content
+        else:
+            extracted_sections[current_section] = content
+    
+    # Process each line
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
             
-            if not section_found:
-                section_content.append(line)
-        
-        # Save the last section
-        if section_content:
-            if current_section in extracted_sections:
-                extracted_sections[current_section] += '\n'.join(section_content)
-            else:
-                extracted_sections[current_section] = '\n'.join(section_content)
-        
-        return extracted_sections
\ No newline at end of file
+        # Check if line is a section header (headers are not too long)
+        header = SECTION_HEADER.match(line) if len(line) < MAX_HEADER_LENGTH else None
+        if header:
+            # Save previous section content
+            if section_content:
+                save_section()
+            
+            # Start new section
+            current_section = header.lastgroup
+            section_content = [line] if current_section in keep_headers else []
+        else:
+            section_content.append(line)
+    
+    # Save the last section
+    if section_content:
+        save_section()
+    
+    return extracted_sections
@@ -0,0 +1,165 @@
+"""
+Resume Prefilter Module
+
+This module ranks jobs against the resume locally, before any Gemini call,
+using TF-IDF weighted word and bigram vectors and cosine similarity computed
+with NumPy. The IDF weights are fitted once, on the resume plus a corpus of
+postings from previous runs, so a job's score does not depend on the other
+jobs it happens to be scored with. All jobs of a batch are scored in one
+vectorized pass, and only the top-K (or above-threshold) jobs are forwarded
+to the Gemini matcher.
+"""
+
+import re
+from collections import Counter
+
+import numpy as np
+
+# Words that carry no signal about job fit
+STOP_WORDS = frozenset("""
+a about above after again all also am an and any are as at be because been before being below
+between both but by can could did do does doing down during each few for from further had has
+have having he her here hers him his how i if in into is it its itself just me more most my no
+nor not now of off on once only or other our ours out over own same she should so some such than
+that the their theirs them then there these they this those through to too under until up very
+was we were what when where which while who whom why will with would you your yours
+role job work working team teams company opportunity experience looking join including across
+""".split())
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+
+class ResumePrefilter:
+    """Class to pre-rank jobs against a resume with TF-IDF cosine similarity."""
+
+    def __init__(self, resume_text, corpus=(), title_weight=2, use_bigrams=True):
+        """
+        Initialize the prefilter and fit the IDF weights.
+
+        Args:
+            resume_text (str): Text content of the resume
+            corpus (iterable, optional): Job dictionaries ('title', 'description') the IDF weights
+                                         are fitted on together with the resume, e.g. postings
+                                         stored by previous runs
+            title_weight (int): How many times the job title is counted relative to the description
+            use_bigrams (bool): Include word bigrams in addition to single words
+        """
+        self.resume_tokens = self._tokenize(resume_text)
+        self.title_weight = title_weight
+        self.use_bigrams = use_bigrams
+        self._fit(corpus)
+
+        self.scored = 0
+        self.forwarded = 0
+
+    def _fit(self, corpus):
+        """
+        Fit smoothed IDF weights on the resume and the corpus, and weight the resume vector.
+
+        Terms missing from the fitted documents get the IDF of a term seen in none of them.
+        """
+        resume_features = self._features(self.resume_tokens)
+        document_frequency = Counter(set(resume_features))
+        documents = 1
+        for job in corpus:
+            document_frequency.update(set(self._features(self._job_tokens(job))))
+            documents += 1
+
+        self.vocabulary = np.array(sorted(document_frequency)) if document_frequency else np.array([''])
+        df = np.array([document_frequency.get(term, 0) for term in self.vocabulary])
+        self.idf = np.log((1 + documents) / (1 + df)) + 1.0
+        self.unseen_idf = np.log(1 + documents) + 1.0
+        self.corpus_size = documents - 1
+
+        # Sublinear TF of the resume terms, aligned with the vocabulary (zero for corpus-only terms)
+        resume_tf = Counter(resume_features)
+        tf = np.array([resume_tf.get(term, 0) for term in self.vocabulary], dtype=float)
+        self.resume_weights = np.where(tf > 0, 1.0 + np.log(np.maximum(tf, 1)), 0.0) * self.idf
+        self.resume_norm = np.sqrt(np.sum(self.resume_weights ** 2))
+
+    def _tokenize(self, text):
+        """Split text into lowercase word tokens without stop words."""
+        words = [word.rstrip('.') for word in TOKEN_PATTERN.findall(str(text or '').lower())]
+        return [word for word in words if len(word) > 1 and word not in STOP_WORDS]
+
+    def _features(self, tokens):
+        """Turn a token list into the feature list (words plus optional bigrams)."""
+        if not self.use_bigrams or len(tokens) < 2:
+            return tokens
+        return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    def _job_tokens(self, job):
+        """Tokens of a job: the title (weighted) followed by the description."""
+        title_tokens = self._tokenize(job.get('title', ''))
+        return title_tokens * self.title_weight + self._tokenize(job.get('description', ''))
+
+    def score(self, jobs):
+        """
+        Score jobs against the resume in a single vectorized pass.
+
+        Args:
+            jobs (list): Job dictionaries with 'title' and 'description'
+
+        Returns:
+            numpy.ndarray: Cosine similarity scores in the range 0-100, aligned with `jobs`
+        """
+        if not jobs:
+            return np.zeros(0)
+
+        documents = [self._features(self._job_tokens(job)) for job in jobs]
+        lengths = np.array([len(doc) for doc in documents])
+        if self.resume_norm == 0 or lengths.sum() == 0:
+            return np.zeros(len(jobs))
+
+        # Map every feature to a batch vocabulary index and count term frequencies per document
+        flat = np.array([feature for doc in documents for feature in doc])
+        doc_ids = np.repeat(np.arange(len(documents)), lengths)
+        vocabulary, term_ids = np.unique(flat, return_inverse=True)
+        vocab_size = len(vocabulary)
+
+        pairs, tf = np.unique(doc_ids * vocab_size + term_ids, return_counts=True)
+        pair_docs = pairs // vocab_size
+        pair_terms = pairs % vocab_size
+
+        # Look the batch terms up in the fitted vocabulary for their IDF and resume weight
+        positions = np.minimum(np.searchsorted(self.vocabulary, vocabulary), len(self.vocabulary) - 1)
+        fitted = self.vocabulary[positions] == vocabulary
+        idf = np.where(fitted, self.idf[positions], self.unseen_idf)
+        resume_vector = np.where(fitted, self.resume_weights[positions], 0.0)
+
+        # Sublinear TF with the fitted IDF
+        weights = (1.0 + np.log(tf)) * idf[pair_terms]
+        norms = np.sqrt(np.bincount(pair_docs, weights=weights ** 2, minlength=len(documents)))
+        dots = np.bincount(pair_docs, weights=weights * resume_vector[pair_terms], minlength=len(documents))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            similarity = np.where(norms > 0, dots / (norms * self.resume_norm), 0.0)
+
+        return np.round(similarity * 100, 1)
+
+    def select(self, jobs, top_k=None, threshold=None):
+        """
+        Score jobs and keep only the most promising ones.
+
+        Every job gets a 'prefilter_score' key, whether it is kept or not.
+
+        Args:
+            jobs (list): Job dictionaries
+            top_k (int, optional): Keep at most this many highest-scoring jobs
+            threshold (float, optional): Keep only jobs scoring at least this much (0-100)
+
+        Returns:
+            list: Selected jobs, highest score first
+        """
+        scores = self.score(jobs)
+        for job, score in zip(jobs, scores):
+            job['prefilter_score'] = float(score)
+
+        order = np.argsort(-scores, kind='stable')
+        if threshold is not None:
+            order = order[scores[order] >= threshold]
+        if top_k is not None:
+            order = order[:top_k]
+
+        self.scored += len(jobs)
+        self.forwarded += len(order)
+        return [jobs[i] for i in order]
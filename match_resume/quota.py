@@ -0,0 +1,156 @@
+"""
+Quota Controller Module
+
+This module schedules Gemini calls against the model's requests-per-minute
+(RPM) and tokens-per-minute (TPM) quotas. Every call reserves one request and
+its estimated prompt tokens in a sliding one-minute window and waits when the
+window is full, so the matcher saturates the quota without exceeding it. The
+number of calls in flight is adapted AIMD-style: it grows (quickly at first,
+then by one call per round trip) while calls succeed with stable latency,
+and is halved on a 429 or reduced when latency climbs.
+"""
+
+import time
+import threading
+from collections import deque
+
+# Length of the quota window in seconds
+WINDOW_SECONDS = 60.0
+
+
+class QuotaController:
+    """Thread-safe RPM/TPM scheduler with adaptive concurrency for model calls."""
+
+    def __init__(self, rpm=None, tpm=None, max_concurrency=5, min_concurrency=1, latency_tolerance=2.0):
+        """
+        Initialize the quota controller.
+
+        Args:
+            rpm (int, optional): Requests per minute allowed by the quota (None = unlimited)
+            tpm (int, optional): Prompt tokens per minute allowed by the quota (None = unlimited)
+            max_concurrency (int): Upper bound of concurrent calls
+            min_concurrency (int): Lower bound of concurrent calls
+            latency_tolerance (float): Concurrency is reduced once the smoothed latency
+                                       exceeds this multiple of the best smoothed latency seen
+        """
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.latency_tolerance = latency_tolerance
+
+        # Slow start from the minimum until the first sign of congestion
+        self.limit = float(self.min_concurrency)
+        self.slow_start = True
+        self.in_flight = 0
+
+        self.calls = 0
+        self.throttled = 0
+        self.peak_concurrency = 0
+        self.wait_time = 0.0
+        self._latency = None
+        self._best_latency = None
+        self._window = deque()
+        self._window_tokens = 0
+        self._cond = threading.Condition()
+
+    def _prune(self, now):
+        """Drop reservations older than the window; the caller must hold the lock."""
+        while self._window and self._window[0][0] <= now - WINDOW_SECONDS:
+            _, tokens = self._window.popleft()
+            self._window_tokens -= tokens
+
+    def _quota_wait(self, now, tokens):
+        """Seconds until a call of `tokens` fits the RPM/TPM window; the caller must hold the lock."""
+        wait = 0.0
+        if self.rpm and len(self._window) >= self.rpm:
+            wait = self._window[len(self._window) - self.rpm][0] + WINDOW_SECONDS - now
+        if self.tpm and self._window and self._window_tokens + tokens > self.tpm:
+            # Find the oldest reservation whose expiry frees enough tokens
+            excess = self._window_tokens + tokens - self.tpm
+            for started, reserved in self._window:
+                excess -= reserved
+                if excess <= 0:
+                    wait = max(wait, started + WINDOW_SECONDS - now)
+                    break
+        return max(0.0, wait)
+
+    def acquire(self, tokens=0):
+        """
+        Block until a call with the given prompt size may start, then reserve it.
+
+        Args:
+            tokens (int): Estimated prompt tokens of the call
+
+        Returns:
+            float: Start time (time.monotonic()) to pass to release()
+        """
+        waited_from = time.monotonic()
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._prune(now)
+                if self.in_flight >= int(self.limit):
+                    self._cond.wait()
+                    continue
+                wait = self._quota_wait(now, tokens)
+                if wait > 0:
+                    self._cond.wait(timeout=wait)
+                    continue
+
+                self._window.append((now, tokens))
+                self._window_tokens += tokens
+                self.in_flight += 1
+                self.calls += 1
+                self.peak_concurrency = max(self.peak_concurrency, self.in_flight)
+                self.wait_time += now - waited_from
+                return now
+
+    def release(self, started, throttled=False):
+        """
+        Finish a call and adapt the concurrency limit.
+
+        Args:
+            started (float): Value returned by acquire()
+            throttled (bool): Whether the call was rejected for exceeding the quota (429)
+        """
+        latency = time.monotonic() - started
+        with self._cond:
+            saturated = self.in_flight >= int(self.limit)
+            self.in_flight -= 1
+
+            if throttled:
+                self.throttled += 1
+                self.slow_start = False
+                self.limit = max(self.min_concurrency, self.limit / 2)
+            else:
+                self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+                self._best_latency = min(self._best_latency or self._latency, self._latency)
+                if self._latency > self.latency_tolerance * self._best_latency:
+                    # Calls are queueing on the server side: back off gently
+                    self.slow_start = False
+                    self.limit = max(self.min_concurrency, self.limit * 0.9)
+                elif saturated:
+                    # Only grow when the current limit is actually in use
+                    self.limit += 1 if self.slow_start else 1 / self.limit
+                self.limit = min(self.limit, self.max_concurrency)
+
+            self._cond.notify_all()
+
+    def stats(self):
+        """
+        Return the controller state.
+
+        Returns:
+            dict: Calls, 429s, current and peak concurrency, time spent waiting for
+                  quota and the smoothed call latency
+        """
+        with self._cond:
+            return {
+                'calls': self.calls,
+                'throttled': self.throttled,
+                'concurrency': int(self.limit),
+                'peak_concurrency': self.peak_concurrency,
+                'wait_time': self.wait_time,
+                'latency': self._latency or 0.0,
+            }
@@ -0,0 +1,229 @@
+"""
+Resilience Module
+
+This module keeps the Gemini matching workers from hammering a degraded API.
+A circuit breaker shared by all workers stops calls after repeated failures
+(immediately on quota errors) and lets a single probe through once the
+cool-down has passed, a retry budget caps retries to a fraction of the calls
+made, and back-off delays are jittered so workers never sleep in lockstep.
+Jobs whose match fails are marked as deferred instead of being scored 0, so
+they can be rescored at the end of the run or in the next one.
+"""
+
+import re
+import time
+import random
+import threading
+
+# Error classes
+ERROR_QUOTA = 'quota'
+ERROR_TRANSIENT = 'transient'
+ERROR_FATAL = 'fatal'
+
+# Match results starting with this reason are failures to rescore later
+FAILED_MATCH_PREFIX = 'API error'
+
+QUOTA_ERROR_NAMES = {'ResourceExhausted', 'TooManyRequests'}
+FATAL_ERROR_NAMES = {'InvalidArgument', 'PermissionDenied', 'Unauthenticated', 'Unauthorized', 'NotFound',
+                     'FailedPrecondition', 'BadRequest'}
+FATAL_STATUS_CODES = {400, 401, 403, 404}
+QUOTA_MESSAGE = re.compile(r'quota|rate limit|resource.?exhausted|429', re.IGNORECASE)
+# Gemini quota errors carry the suggested delay, e.g. "retry_delay { seconds: 23 }"
+RETRY_DELAY_PATTERN = re.compile(r'retry_delay\s*\{\s*seconds:\s*(\d+)|retry in (\d+(?:\.\d+)?)\s*s', re.IGNORECASE)
+
+# Circuit breaker states
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half-open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the API while the circuit breaker is open."""
+
+
+def classify_error(error):
+    """
+    Classify an exception raised by a model call.
+
+    Args:
+        error (Exception): The exception
+
+    Returns:
+        str: ERROR_QUOTA (rate or quota exhausted), ERROR_FATAL (the request itself is
+             wrong and retrying cannot help) or ERROR_TRANSIENT (anything else)
+    """
+    code = getattr(error, 'code', None)
+    name = type(error).__name__
+    if code == 429 or name in QUOTA_ERROR_NAMES or QUOTA_MESSAGE.search(str(error)):
+        return ERROR_QUOTA
+    if code in FATAL_STATUS_CODES or name in FATAL_ERROR_NAMES:
+        return ERROR_FATAL
+    return ERROR_TRANSIENT
+
+
+def suggested_delay(error):
+    """
+    Extract the retry delay suggested by a quota error, if any.
+
+    Args:
+        error (Exception): The exception
+
+    Returns:
+        float: Seconds to wait, or None when the error does not say
+    """
+    match = RETRY_DELAY_PATTERN.search(str(error))
+    if not match:
+        return None
+    return float(match.group(1) or match.group(2))
+
+
+def backoff_delay(attempt, base=2.0, cap=60.0):
+    """
+    Jittered exponential back-off ("equal jitter").
+
+    Args:
+        attempt (int): Zero-based retry attempt
+        base (float): Delay of the first retry in seconds
+        cap (float): Maximum delay in seconds
+
+    Returns:
+        float: Seconds to sleep, between half and all of the exponential delay
+    """
+    delay = min(cap, base * (2 ** attempt))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def is_failed_match(result):
+    """Whether a match result records a failed API call (and should be rescored)."""
+    return str(result.get('match_reason', '')).startswith(FAILED_MATCH_PREFIX)
+
+
+class CircuitBreaker:
+    """Thread-safe circuit breaker shared by every worker calling the same API."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, max_reset_timeout=300.0):
+        """
+        Initialize the circuit breaker.
+
+        Args:
+            failure_threshold (int): Consecutive failures that open the circuit
+            reset_timeout (float): Seconds the circuit stays open before a probe is allowed
+            max_reset_timeout (float): Upper bound of the cool-down, which doubles every
+                                       time a probe fails
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.opened = 0
+        self._timeout = reset_timeout
+        self._open_until = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """
+        Check whether a call may go ahead.
+
+        Returns:
+            bool: True when closed, or for the single probe once the cool-down is over
+        """
+        with self._lock:
+            if self.state == STATE_CLOSED:
+                return True
+            if self.state == STATE_OPEN and time.monotonic() >= self._open_until:
+                self.state = STATE_HALF_OPEN
+            if self.state == STATE_HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        """Close the circuit after a successful call."""
+        with self._lock:
+            self.state = STATE_CLOSED
+            self.failures = 0
+            self._timeout = self.reset_timeout
+            self._probe_in_flight = False
+
+    def record_failure(self, kind=ERROR_TRANSIENT, retry_after=None):
+        """
+        Count a failed call and open the circuit when needed.
+
+        Quota errors open the circuit straight away (for retry_after seconds when the
+        API suggested a delay). A failed probe reopens it with a doubled cool-down.
+        Fatal errors concern a single request and are not counted.
+
+        Args:
+            kind (str): Error class from classify_error()
+            retry_after (float, optional): Delay suggested by the API
+        """
+        if kind == ERROR_FATAL:
+            with self._lock:
+                self._probe_in_flight = False
+            return
+
+        with self._lock:
+            self.failures += 1
+            if self.state == STATE_HALF_OPEN:
+                self._timeout = min(self.max_reset_timeout, self._timeout * 2)
+                self._open_locked(retry_after)
+            elif kind == ERROR_QUOTA or self.failures >= self.failure_threshold:
+                if self.state != STATE_OPEN:
+                    self._open_locked(retry_after)
+
+    def _open_locked(self, retry_after=None):
+        """Open the circuit; the caller must hold the lock."""
+        self.state = STATE_OPEN
+        self.opened += 1
+        self._open_until = time.monotonic() + max(self._timeout, retry_after or 0)
+        self._probe_in_flight = False
+
+    def wait_time(self):
+        """Seconds until the next call may be attempted (0 when the circuit is closed)."""
+        with self._lock:
+            if self.state == STATE_CLOSED:
+                return 0.0
+            return max(0.0, self._open_until - time.monotonic())
+
+
+class RetryBudget:
+    """Caps retries across all workers to a fraction of the calls made."""
+
+    def __init__(self, ratio=0.2, initial=10, capacity=20):
+        """
+        Initialize the retry budget.
+
+        Args:
+            ratio (float): Retries earned by each first attempt
+            initial (float): Retries available before any call has been made
+            capacity (float): Maximum number of retries that can be saved up
+        """
+        self.ratio = ratio
+        self.capacity = capacity
+        self.tokens = float(initial)
+        self.retries = 0
+        self.denied = 0
+        self._lock = threading.Lock()
+
+    def record_attempt(self):
+        """Earn retry credit for a first attempt."""
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + self.ratio)
+
+    def try_retry(self):
+        """
+        Spend one retry if the budget allows it.
+
+        Returns:
+            bool: True when the retry may go ahead
+        """
+        with self._lock:
+            if self.tokens >= 1:
+                self.tokens -= 1
+                self.retries += 1
+                return True
+            self.denied += 1
+            return False
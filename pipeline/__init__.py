@@ -0,0 +1 @@
+"""Pipeline package for the job matcher system."""
\ No newline at end of file
@@ -0,0 +1,96 @@
+"""
+Candidates
+
+This module resolves the resumes given on the command line into candidates.
+Several resumes share one fetch and enrichment pass, and only the matching
+stage scales with jobs x resumes. Each candidate keeps its own output CSV and
+job store so histories and dashboard edits stay separate; with a single resume
+the configured paths are used unchanged.
+"""
+
+import os
+import re
+import glob
+
+# Characters kept in a candidate name when it is used in file names
+NAME_PATTERN = re.compile(r'[^A-Za-z0-9_-]+')
+
+
+class Candidate:
+    """One resume matched in a run, with its own output CSV and job store."""
+
+    def __init__(self, name, resume_path, output, store):
+        """
+        Initialize the candidate.
+
+        Args:
+            name (str): Short name derived from the resume file name
+            resume_path (str): Path of the resume PDF
+            output (str): Output CSV path
+            store (str): Job store path
+        """
+        self.name = name
+        self.resume_path = resume_path
+        self.output = output
+        self.store = store
+
+
+def find_resumes(paths):
+    """
+    Expand resume arguments into PDF paths.
+
+    Args:
+        paths (list): Resume PDFs and/or directories containing resume PDFs
+
+    Returns:
+        list: PDF paths in argument order (directories sorted by file name)
+    """
+    resumes = []
+    for path in paths:
+        if os.path.isdir(path):
+            resumes.extend(sorted(glob.glob(os.path.join(path, '*.pdf')) + glob.glob(os.path.join(path, '*.PDF'))))
+        else:
+            resumes.append(path)
+
+    unique = []
+    for path in resumes:
+        if os.path.abspath(path) not in {os.path.abspath(p) for p in unique}:
+            unique.append(path)
+    return unique
+
+
+def _suffixed(path, name):
+    """Insert the candidate name before a path's extension."""
+    root, ext = os.path.splitext(path)
+    return f"{root}_{name}{ext}"
+
+
+def build_candidates(resume_paths, output, store):
+    """
+    Create one candidate per resume.
+
+    Args:
+        resume_paths (list): Resume PDF paths
+        output (str): Configured output CSV path
+        store (str): Configured job store path
+
+    Returns:
+        list: Candidate objects. A single resume keeps the configured paths; with
+              several, each path gets the candidate name as a suffix.
+    """
+    candidates = []
+    names = set()
+    for path in resume_paths:
+        base = NAME_PATTERN.sub('_', os.path.splitext(os.path.basename(path))[0]).strip('_') or 'resume'
+        name = base
+        counter = 2
+        while name in names:
+            name = f"{base}_{counter}"
+            counter += 1
+        names.add(name)
+
+        if len(resume_paths) == 1:
+            candidates.append(Candidate(name, path, output, store))
+        else:
+            candidates.append(Candidate(name, path, _suffixed(output, name), _suffixed(store, name)))
+    return candidates
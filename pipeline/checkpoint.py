@@ -0,0 +1,343 @@
+"""
+Run Checkpoints
+
+This module persists the progress of a pipeline run so an interrupted run
+(quota exhaustion, network drop, Ctrl-C) can be continued without redoing its
+network and model work. Every run gets a directory under the run root with
+one append-only JSON Lines file per stage:
+
+    fetched.jsonl   jobs emitted by the fetchers, with their detail pages
+    enriched.jsonl  Glassdoor results per job
+    matched.jsonl   Gemini match results per job
+    sources.jsonl   fetchers that ran to completion
+    run.json        run arguments and status
+
+Records are appended and flushed as each job completes, so a checkpoint costs
+one short write per job and stage; nothing is rewritten. A process crash loses
+at most the line being written, which is dropped when the run is loaded again.
+On resume, checkpointed jobs are replayed through the pipeline, stored results
+are applied instead of calling Glassdoor or Gemini, and unfinished fetchers
+only look for the postings still missing from their limit.
+"""
+
+import os
+import json
+import time
+import shutil
+import logging
+import threading
+from datetime import datetime
+
+from common.job import intern_job
+from common.metrics import shared_metrics
+from pipeline.job_store import KnownJobs, job_identifier, scoped_job_id, _has_job_id
+
+logger = logging.getLogger(__name__)
+
+# Append-only files of a run, one per checkpointed stage
+CHECKPOINT_STAGES = ('fetched', 'enriched', 'matched', 'sources')
+
+# Arguments that must match for a resumed run to reuse the checkpointed results
+RESUME_ARGUMENTS = ('resume', 'keywords', 'location', 'limit')
+
+# Completed runs kept in the run root; older ones are removed when a new run starts
+KEEP_COMPLETED_RUNS = 10
+
+
+def checkpoint_key(job):
+    """Key of a fetched posting: its source and job_id, else its title|company pair."""
+    if _has_job_id(job.get('job_id')):
+        return f"{job.get('source', '')}:{job['job_id']}"
+    return job_identifier(job.get('title'), job.get('company'))
+
+
+def result_key(job):
+    """
+    Key of a job's enrichment and match results: its title|company pair.
+
+    Deduplication keeps one posting per pair, but which source's posting wins
+    depends on timing, so results must not be tied to the posting's job_id.
+    """
+    return job_identifier(job.get('title'), job.get('company'))
+
+
+def _read_records(path):
+    """
+    Read the records of one checkpoint file.
+
+    A torn final line (the process died mid-write) is cut off, so the next
+    record appended to the file starts on a line of its own.
+
+    Returns:
+        list: Decoded records in write order
+    """
+    if not os.path.exists(path):
+        return []
+
+    records = []
+    valid_bytes = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+            valid_bytes += len(line)
+
+    if valid_bytes < os.path.getsize(path):
+        logger.warning(f"    - Dropping an incomplete record at the end of {path}")
+        with open(path, 'r+b') as f:
+            f.truncate(valid_bytes)
+    return records
+
+
+def _write_json(path, data):
+    """Write a small JSON file through a temporary file, so it is never left half written."""
+    temporary = f"{path}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, default=str)
+    os.replace(temporary, path)
+
+
+class RunCheckpoint:
+    """Append-only checkpoints of one pipeline run, loaded back when the run is resumed."""
+
+    def __init__(self, path, arguments=None, metrics=None):
+        """
+        Open (or create) the checkpoints of a run.
+
+        Args:
+            path (str): Run directory
+            arguments (dict, optional): Run arguments saved with a new run
+            metrics (MetricsRegistry, optional): Run metrics receiving checkpoint write and
+                                                 restore counts; defaults to the process-wide registry
+        """
+        self.path = path
+        self.run_id = os.path.basename(os.path.normpath(path))
+        self.metrics = metrics or shared_metrics()
+        os.makedirs(path, exist_ok=True)
+
+        info_path = os.path.join(path, 'run.json')
+        self.resumed = os.path.exists(info_path)
+        if self.resumed:
+            with open(info_path, encoding='utf-8') as f:
+                self.info = json.load(f)
+        else:
+            self.info = {'run_id': self.run_id, 'started_at': time.time(), 'status': 'running',
+                         'arguments': arguments or {}}
+            _write_json(info_path, self.info)
+
+        # Later records of a job replace earlier ones
+        self.records = {stage: {} for stage in CHECKPOINT_STAGES}
+        self.sources = {}
+        for stage in CHECKPOINT_STAGES:
+            for record in _read_records(self._file_path(stage)):
+                if stage == 'fetched':
+                    self.sources.setdefault(record['source'], {})[record['key']] = record['data']
+                self.records[stage][record['key']] = record.get('data')
+
+        self._files = {stage: open(self._file_path(stage), 'a', encoding='utf-8') for stage in CHECKPOINT_STAGES}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, root, arguments=None, metrics=None):
+        """
+        Start the checkpoints of a new run and remove old completed runs.
+
+        Args:
+            root (str): Directory holding the run directories
+            arguments (dict, optional): Run arguments saved with the run
+            metrics (MetricsRegistry, optional): Run metrics
+
+        Returns:
+            RunCheckpoint: Checkpoints of the new run
+        """
+        prune_runs(root, keep=KEEP_COMPLETED_RUNS)
+        run_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        return cls(os.path.join(root, run_id), arguments=arguments, metrics=metrics)
+
+    @classmethod
+    def open(cls, root, run_id='latest', metrics=None):
+        """
+        Open the checkpoints of an earlier run to resume it.
+
+        Args:
+            root (str): Directory holding the run directories
+            run_id (str): Run to resume, or 'latest' for the most recent unfinished run
+            metrics (MetricsRegistry, optional): Run metrics
+
+        Returns:
+            RunCheckpoint: Checkpoints of the run, or None when there is no such run
+        """
+        if run_id == 'latest':
+            unfinished = [run for run in list_runs(root) if run['status'] != 'completed']
+            if not unfinished:
+                return None
+            run_id = unfinished[-1]['run_id']
+        path = os.path.join(root, run_id)
+        if not os.path.exists(os.path.join(path, 'run.json')):
+            return None
+        return cls(path, metrics=metrics)
+
+    def _file_path(self, stage):
+        """Path of a stage's checkpoint file."""
+        return os.path.join(self.path, f"{stage}.jsonl")
+
+    def _append(self, stage, record):
+        """Append one record to a stage's file and flush it to the operating system."""
+        line = json.dumps(record, default=str, separators=(',', ':')) + '\n'
+        with self._lock:
+            self._files[stage].write(line)
+            self._files[stage].flush()
+        self.metrics.increment('checkpoint_records_total', stage=stage)
+
+    def record(self, stage, job, data):
+        """
+        Checkpoint the result of a stage for one job.
+
+        Args:
+            stage (str): 'enriched' or 'matched'
+            job (dict): The job the result belongs to
+            data (dict): Fields the stage added to the job
+        """
+        key = result_key(job)
+        self.records[stage][key] = data
+        self._append(stage, {'key': key, 'data': data})
+
+    def restore(self, stage, job):
+        """
+        Checkpointed result of a stage for one job.
+
+        Args:
+            stage (str): 'enriched' or 'matched'
+            job (dict): The job to look up
+
+        Returns:
+            dict: Fields to update the job with, or None when the stage has not completed for it
+        """
+        data = self.records[stage].get(result_key(job))
+        if data is not None:
+            self.metrics.increment('checkpoint_restored_total', stage=stage)
+        return data
+
+    def fetched_jobs(self, source):
+        """Jobs a source emitted before the run was interrupted."""
+        return [intern_job(dict(data)) for data in self.sources.get(source, {}).values()]
+
+    def source(self, name, fetch, limit, known_jobs=None):
+        """
+        Wrap a job source so its jobs are checkpointed and replayed on resume.
+
+        Args:
+            name (str): Source name
+            fetch (callable): Takes (emit, limit, known_jobs) and emits the jobs it fetches
+            limit (int): Maximum number of jobs the source fetches in the whole run
+            known_jobs (KnownJobs, optional): Postings to skip without fetching their details
+
+        Returns:
+            callable: Source taking an `emit` function, for the StreamingPipeline
+        """
+        def checkpointed_source(emit):
+            restored = self.fetched_jobs(name)
+            for job in restored:
+                self.metrics.increment('checkpoint_restored_total', stage='fetched')
+                emit(job)
+            if name in self.records['sources']:
+                logger.info(f"    - {name}: replayed {len(restored)} checkpointed jobs, fetching already complete")
+                return
+
+            skip = known_jobs
+            if restored:
+                # Postings already checkpointed are skipped like those from previous runs
+                restored_known = KnownJobs((scoped_job_id(job.get('source'), job['job_id'])
+                                            for job in restored if _has_job_id(job.get('job_id'))),
+                                           (job_identifier(job.get('title'), job.get('company')) for job in restored))
+                skip = restored_known if known_jobs is None else known_jobs.union(restored_known)
+                logger.info(f"    - {name}: replayed {len(restored)} checkpointed jobs, "
+                            f"fetching up to {max(0, limit - len(restored))} more")
+
+            def record_and_emit(job):
+                key = checkpoint_key(job)
+                data = dict(job)
+                self.sources.setdefault(name, {})[key] = data
+                self._append('fetched', {'key': key, 'source': name, 'data': data})
+                emit(job)
+
+            if limit - len(restored) > 0:
+                fetch(record_and_emit, limit - len(restored), skip)
+            self.records['sources'][name] = {'fetched': len(self.sources.get(name, {}))}
+            self._append('sources', {'key': name, 'data': self.records['sources'][name]})
+
+        return checkpointed_source
+
+    def summary(self):
+        """Number of checkpointed jobs per stage."""
+        return {stage: len(self.records[stage]) for stage in CHECKPOINT_STAGES}
+
+    def mismatched_arguments(self, arguments):
+        """
+        Arguments that differ from those the run was started with.
+
+        Args:
+            arguments (dict): Arguments of the resuming invocation
+
+        Returns:
+            list: Names of the RESUME_ARGUMENTS whose values differ
+        """
+        saved = self.info.get('arguments', {})
+        return [name for name in RESUME_ARGUMENTS if name in saved and saved[name] != arguments.get(name)]
+
+    def complete(self):
+        """Mark the run as completed, so 'latest' no longer resumes it."""
+        self.info.update({'status': 'completed', 'finished_at': time.time()})
+        _write_json(os.path.join(self.path, 'run.json'), self.info)
+
+    def close(self):
+        """Close the checkpoint files."""
+        with self._lock:
+            for f in self._files.values():
+                f.close()
+
+
+def list_runs(root):
+    """
+    List the runs in a run root.
+
+    Args:
+        root (str): Directory holding the run directories
+
+    Returns:
+        list: Dicts with run_id, status and started_at, oldest first
+    """
+    if not os.path.isdir(root):
+        return []
+
+    runs = []
+    for run_id in os.listdir(root):
+        try:
+            with open(os.path.join(root, run_id, 'run.json'), encoding='utf-8') as f:
+                info = json.load(f)
+        except (OSError, ValueError):
+            continue
+        runs.append({'run_id': run_id, 'status': info.get('status'), 'started_at': info.get('started_at', 0)})
+    return sorted(runs, key=lambda run: (run['started_at'], run['run_id']))
+
+
+def prune_runs(root, keep=KEEP_COMPLETED_RUNS):
+    """
+    Remove all but the most recent completed runs (unfinished runs are kept for resuming).
+
+    Args:
+        root (str): Directory holding the run directories
+        keep (int): Number of completed runs to keep
+
+    Returns:
+        int: Number of runs removed
+    """
+    completed = [run for run in list_runs(root) if run['status'] == 'completed']
+    removed = completed[:max(0, len(completed) - keep)]
+    for run in removed:
+        shutil.rmtree(os.path.join(root, run['run_id']), ignore_errors=True)
+    return len(removed)
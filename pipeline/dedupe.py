@@ -0,0 +1,322 @@
+"""
+Near-Duplicate Detection
+
+This module finds the same role posted more than once, e.g. on LinkedIn and
+SEEK with a slightly different title or "Pty Ltd" appended to the company.
+Each job is reduced to a MinHash signature of the word shingles of its title,
+company and description, and a locality-sensitive hashing (LSH) index over
+bands of the signature only compares jobs that share a band. Adding or
+looking up a job costs the same whatever the number of jobs already indexed,
+so the index can be seeded with the whole job history.
+"""
+
+import re
+import zlib
+import threading
+
+import numpy as np
+
+from glassdoor_cse import normalize_company_name
+
+# Words per shingle
+SHINGLE_SIZE = 3
+
+# Signature length and LSH banding: 16 bands of 8 rows make jobs with a Jaccard
+# similarity of 0.8 candidates with ~95% probability, and 0.5 with ~6%
+NUM_PERM = 128
+BANDS = 16
+
+# Minimum estimated Jaccard similarity for two jobs to be duplicates
+DEFAULT_THRESHOLD = 0.8
+
+# Odd 64-bit multiplier combining consecutive word hashes into a shingle hash
+SHINGLE_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+WORD_PATTERN = re.compile(r'[a-z0-9]+')
+
+# Fields whose content makes a record richer
+RICH_FIELDS = ('description', 'location', 'seniority', 'employment_type', 'job_url')
+
+
+def job_text(job):
+    """Normalised title, company and description of a job, the text that is shingled."""
+    title = str(job.get('title') or '').lower()
+    company = normalize_company_name(job.get('company'))
+    return f"{title} {company} {str(job.get('description') or '').lower()}"
+
+
+def richness(job):
+    """
+    Rank how complete a job record is.
+
+    Returns:
+        tuple: (number of non-empty RICH_FIELDS, description length), higher is richer
+    """
+    filled = sum(1 for field in RICH_FIELDS if job.get(field) not in (None, '', 'N/A'))
+    return filled, len(str(job.get('description') or ''))
+
+
+def merge_records(kept, duplicate):
+    """
+    Complete a kept record with what only its duplicate has.
+
+    Empty fields of the kept record are filled from the duplicate, and its
+    description is replaced by the duplicate's when that one is longer. Fields
+    already set, such as the job id and source, are left as they are.
+
+    Args:
+        kept (dict): Record that stays in the pipeline
+        duplicate (dict): Record being dropped
+
+    Returns:
+        dict: The kept record
+    """
+    for field, value in duplicate.items():
+        if value not in (None, '', 'N/A') and kept.get(field) in (None, '', 'N/A'):
+            kept[field] = value
+    if len(str(duplicate.get('description') or '')) > len(str(kept.get('description') or '')):
+        kept['description'] = duplicate['description']
+    return kept
+
+
+class MinHasher:
+    """Computes MinHash signatures of word shingles."""
+
+    def __init__(self, num_perm=NUM_PERM, shingle_size=SHINGLE_SIZE, seed=1):
+        """
+        Initialize the hasher.
+
+        Args:
+            num_perm (int): Signature length (number of hash permutations)
+            shingle_size (int): Words per shingle
+            seed (int): Seed of the permutations; signatures are only comparable
+                        between hashers with the same seed and length
+        """
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        # Multiply-shift hash functions h(x) = (a * x + b) >> 32 with odd a, one per permutation
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(0, 1 << 62, size=(num_perm, 1), dtype=np.int64).astype(np.uint64)
+        self._a = (self._a << np.uint64(1)) | np.uint64(1)
+        self._b = rng.randint(0, 1 << 62, size=(num_perm, 1), dtype=np.int64).astype(np.uint64)
+
+    def shingles(self, text):
+        """
+        Hash the word shingles of a text.
+
+        Each word is hashed once and the hashes of consecutive words are combined
+        arithmetically, instead of building and hashing every shingle string.
+
+        Args:
+            text (str): Normalised text
+
+        Returns:
+            numpy.ndarray: Distinct 64-bit shingle hashes
+        """
+        words = WORD_PATTERN.findall(text) or ['']
+        hashes = np.fromiter(map(zlib.crc32, map(str.encode, words)), dtype=np.uint64, count=len(words))
+        size = min(self.shingle_size, len(words))
+        count = len(words) - size + 1
+        shingles = hashes[:count].copy()
+        for offset in range(1, size):
+            shingles = shingles * SHINGLE_MIX + hashes[offset:offset + count]
+        return np.unique(shingles)
+
+    def signature(self, text):
+        """
+        Compute the MinHash signature of a text.
+
+        Args:
+            text (str): Normalised text
+
+        Returns:
+            numpy.ndarray: num_perm minimum hash values
+        """
+        shingles = self.shingles(text)
+        # Every hash function applied to every shingle at once: (num_perm, shingles)
+        return ((self._a * shingles[np.newaxis, :] + self._b) >> np.uint64(32)).min(axis=1)
+
+
+class NearDuplicateDetector:
+    """Streaming LSH index of job signatures that reports near-duplicates."""
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, num_perm=NUM_PERM, bands=BANDS):
+        """
+        Initialize the detector.
+
+        Args:
+            threshold (float): Minimum estimated Jaccard similarity of duplicates
+            num_perm (int): Signature length
+            bands (int): LSH bands; num_perm must be a multiple of it
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm=num_perm)
+
+        self._buckets = [{} for _ in range(bands)]
+        self._signatures = []
+        self._jobs = []
+        self._lock = threading.Lock()
+
+        self.duplicates = 0
+        self.history_duplicates = 0
+        self.merged = 0
+        self.comparisons = 0
+
+    def _band_keys(self, signature):
+        """Hashable key of each band of a signature."""
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def _find(self, signature, keys):
+        """Index of the most similar indexed job at or above the threshold; the caller must hold the lock."""
+        candidates = set()
+        for band, key in enumerate(keys):
+            candidates.update(self._buckets[band].get(key, ()))
+        best, best_similarity = None, self.threshold
+        for index in candidates:
+            self.comparisons += 1
+            similarity = float(np.mean(self._signatures[index] == signature))
+            if similarity >= best_similarity:
+                best, best_similarity = index, similarity
+        return best
+
+    def _insert(self, signature, keys, job):
+        """Index a signature; the caller must hold the lock."""
+        index = len(self._signatures)
+        self._signatures.append(signature)
+        self._jobs.append(job)
+        for band, key in enumerate(keys):
+            self._buckets[band].setdefault(key, []).append(index)
+        return index
+
+    def seed(self, jobs):
+        """
+        Index jobs from earlier runs, so reposts of them count as duplicates.
+
+        Args:
+            jobs (iterable): Job dictionaries with title, company and description
+
+        Returns:
+            int: Number of jobs indexed
+        """
+        count = 0
+        for job in jobs:
+            signature = self.hasher.signature(job_text(job))
+            with self._lock:
+                self._insert(signature, self._band_keys(signature), None)
+            count += 1
+        return count
+
+    def add(self, job):
+        """
+        Check a job against the index and index it when it is new.
+
+        A duplicate of a job seen earlier in the run is merged into that job
+        (see merge_records), so the record that stays in the pipeline is the
+        richest of the two.
+
+        Args:
+            job (dict): Job dictionary
+
+        Returns:
+            bool: True if the job is new, False if it duplicates an indexed job
+        """
+        signature = self.hasher.signature(job_text(job))
+        keys = self._band_keys(signature)
+        with self._lock:
+            match = self._find(signature, keys)
+            if match is None:
+                self._insert(signature, keys, job)
+                return True
+
+            self.duplicates += 1
+            kept = self._jobs[match]
+            if kept is None:
+                # Duplicates a job from the history
+                self.history_duplicates += 1
+            elif richness(job) > richness(kept):
+                merge_records(kept, job)
+                self.merged += 1
+            return False
+
+    def stats(self):
+        """
+        Return detection statistics.
+
+        Returns:
+            dict: Indexed signatures, duplicates found (of which from history), merged
+                  records and signature comparisons made
+        """
+        with self._lock:
+            return {
+                'indexed': len(self._signatures),
+                'duplicates': self.duplicates,
+                'history_duplicates': self.history_duplicates,
+                'merged': self.merged,
+                'comparisons': self.comparisons,
+            }
+
+
+def cluster_duplicates(jobs, threshold=DEFAULT_THRESHOLD, num_perm=NUM_PERM, bands=BANDS):
+    """
+    Group a list of jobs into clusters of near-duplicates.
+
+    Args:
+        jobs (list): Job dictionaries
+        threshold (float): Minimum estimated Jaccard similarity of duplicates
+        num_perm (int): Signature length
+        bands (int): LSH bands
+
+    Returns:
+        list: Clusters as lists of indexes into `jobs`, in order of first appearance
+    """
+    detector = NearDuplicateDetector(threshold=threshold, num_perm=num_perm, bands=bands)
+    signatures = [detector.hasher.signature(job_text(job)) for job in jobs]
+
+    # Union-find over LSH candidate pairs that pass the similarity check
+    parent = list(range(len(jobs)))
+
+    def root(index):
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    for band in range(bands):
+        buckets = {}
+        for index, signature in enumerate(signatures):
+            buckets.setdefault(signature[band * detector.rows:(band + 1) * detector.rows].tobytes(), []).append(index)
+        for members in buckets.values():
+            first = members[0]
+            for other in members[1:]:
+                if root(first) != root(other) and np.mean(signatures[first] == signatures[other]) >= threshold:
+                    parent[root(other)] = root(first)
+
+    clusters = {}
+    for index in range(len(jobs)):
+        clusters.setdefault(root(index), []).append(index)
+    return sorted(clusters.values(), key=lambda members: members[0])
+
+
+def deduplicate(jobs, threshold=DEFAULT_THRESHOLD):
+    """
+    Keep the richest record of each cluster of near-duplicates.
+
+    Args:
+        jobs (list): Job dictionaries
+        threshold (float): Minimum estimated Jaccard similarity of duplicates
+
+    Returns:
+        list: One job per cluster, completed with the fields only its duplicates had
+    """
+    kept = []
+    for members in cluster_duplicates(jobs, threshold):
+        records = sorted((jobs[index] for index in members), key=richness, reverse=True)
+        best = dict(records[0])
+        for record in records[1:]:
+            merge_records(best, record)
+        kept.append(best)
+    return kept
@@ -0,0 +1,500 @@
+"""
+Job Store
+
+This module keeps the history of matched jobs in an indexed SQLite database.
+Each run upserts only new or changed jobs (matched on the source-scoped
+job_id, then on the title/company pair) instead of reading, merging and rewriting the whole output
+CSV. The dashboard CSV is an export generated from the store on demand.
+
+The store also remembers every posting a run has already evaluated, so the
+fetchers can skip detail requests for jobs seen before (see KnownJobs), and
+keeps the jobs whose Gemini match failed so the next run can rescore them.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import argparse
+import threading
+
+import pandas as pd
+
+# Columns edited in the dashboard; pipeline runs never overwrite them
+USER_COLUMNS = ('apply', 'comments')
+
+# How long an evaluated posting that did not make it into the output stays known
+SEEN_TTL_DAYS = 30
+
+# Runs a job whose match keeps failing is carried over before it is given up
+MAX_DEFER_ATTEMPTS = 3
+
+
+def job_identifier(title, company):
+    """Build the title|company identifier used to deduplicate jobs across sources."""
+    return f"{str(title or '').strip().lower()}|{str(company or '').strip().lower()}"
+
+
+def _has_job_id(job_id):
+    """Whether a job_id is usable for matching (fetchers use 'unknown' as a placeholder)."""
+    return job_id is not None and str(job_id) not in ('', 'unknown', 'nan', 'None')
+
+
+def scoped_job_id(source, job_id):
+    """
+    Build the source:job_id key jobs are matched on.
+
+    LinkedIn and SEEK both use plain numeric ids, so an id alone does not
+    identify a posting.
+
+    Returns:
+        str: Scoped id, or None when the job has no usable job_id
+    """
+    if not _has_job_id(job_id):
+        return None
+    return f"{str(source or '').strip().lower()}:{job_id}"
+
+
+def _clean_record(record):
+    """Replace NaN/NA values with None so records serialise to JSON cleanly."""
+    cleaned = {}
+    for key, value in record.items():
+        try:
+            if pd.isna(value):
+                value = None
+        except (TypeError, ValueError):
+            pass  # Lists and other containers are never NA
+        cleaned[key] = value
+    return cleaned
+
+
+class KnownJobs:
+    """In-memory lookup of job_ids and title/company pairs evaluated in previous runs."""
+
+    def __init__(self, job_ids=(), identifiers=()):
+        """
+        Initialize the lookup.
+
+        Args:
+            job_ids (iterable): Known source-scoped job ids (see scoped_job_id())
+            identifiers (iterable): Known title|company identifiers
+        """
+        self.job_ids = set(job_ids)
+        self.identifiers = set(identifiers)
+
+    def is_known(self, job_id=None, title=None, company=None, source=None):
+        """
+        Check whether a posting was already evaluated.
+
+        Args:
+            job_id (str, optional): Job id from the job card
+            title (str, optional): Job title from the job card
+            company (str, optional): Company name from the job card
+            source (str, optional): Site the job_id belongs to ('LinkedIn', 'SEEK')
+
+        Returns:
+            bool: True if the source's job_id or the title/company pair is known
+        """
+        if _has_job_id(job_id) and scoped_job_id(source, job_id) in self.job_ids:
+            return True
+        if title and company:
+            return job_identifier(title, company) in self.identifiers
+        return False
+
+    def intersection(self, other):
+        """
+        Postings known to both lookups.
+
+        Args:
+            other (KnownJobs): Another lookup, e.g. from a second candidate's store
+
+        Returns:
+            KnownJobs: Lookup of the job_ids and identifiers present in both
+        """
+        return KnownJobs(self.job_ids & other.job_ids, self.identifiers & other.identifiers)
+
+    def union(self, other):
+        """
+        Postings known to either lookup.
+
+        Args:
+            other (KnownJobs): Another lookup, e.g. of the jobs checkpointed in an interrupted run
+
+        Returns:
+            KnownJobs: Lookup of the job_ids and identifiers present in either
+        """
+        return KnownJobs(self.job_ids | other.job_ids, self.identifiers | other.identifiers)
+
+    def __len__(self):
+        return len(self.identifiers)
+
+
+class JobStore:
+    """Indexed SQLite store of matched jobs with upsert semantics."""
+
+    def __init__(self, path):
+        """
+        Initialize the job store.
+
+        Args:
+            path (str): Path of the SQLite database file
+        """
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id TEXT,
+                identifier TEXT NOT NULL UNIQUE,
+                data TEXT NOT NULL,
+                run INTEGER NOT NULL,
+                first_seen REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute('CREATE INDEX IF NOT EXISTS jobs_job_id ON jobs (job_id)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS jobs_export_order ON jobs (run DESC, id)')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS seen (
+                identifier TEXT PRIMARY KEY,
+                job_id TEXT,
+                seen_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute('CREATE INDEX IF NOT EXISTS seen_seen_at ON seen (seen_at)')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS deferred (
+                identifier TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                attempts INTEGER NOT NULL,
+                deferred_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        self._scope_job_ids()
+        self._conn.commit()
+
+    def _scope_job_ids(self):
+        """Migrate stores written before job_ids were scoped by their source."""
+        if self._get_meta('scoped_job_ids'):
+            return
+        rows = self._conn.execute('SELECT id, job_id, data FROM jobs WHERE job_id IS NOT NULL').fetchall()
+        self._conn.executemany('UPDATE jobs SET job_id = ? WHERE id = ?', [
+            (scoped_job_id(json.loads(data).get('source'), job_id), row_id) for row_id, job_id, data in rows
+        ])
+        # Seen postings did not record their source; they stay known by title/company
+        self._conn.execute('UPDATE seen SET job_id = NULL')
+        self._set_meta('scoped_job_ids', 1)
+
+    def count(self):
+        """Return the number of stored jobs."""
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM jobs').fetchone()[0]
+
+    def _get_meta(self, key, default=None):
+        row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, key, value):
+        self._conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, str(value)))
+
+    def _find(self, job_id, identifier):
+        """Find an existing row by source-scoped job_id, then by identifier."""
+        if job_id is not None:
+            row = self._conn.execute(
+                'SELECT id, identifier, data FROM jobs WHERE job_id = ? LIMIT 1', (job_id,)
+            ).fetchone()
+            if row:
+                return row
+        return self._conn.execute(
+            'SELECT id, identifier, data FROM jobs WHERE identifier = ?', (identifier,)
+        ).fetchone()
+
+    def upsert(self, jobs, keep_user_columns=True):
+        """
+        Insert new jobs and update changed ones.
+
+        Args:
+            jobs (iterable): Job dictionaries (or DataFrame records)
+            keep_user_columns (bool): Never overwrite dashboard-edited columns of existing rows
+
+        Returns:
+            tuple: (number of jobs added, number of jobs updated)
+        """
+        added = 0
+        updated = 0
+        now = time.time()
+
+        with self._lock:
+            run = int(self._get_meta('last_run', 0)) + 1
+            self._set_meta('last_run', run)
+
+            for job in jobs:
+                job = _clean_record(dict(job))
+                job_id = scoped_job_id(job.get('source'), job.get('job_id'))
+                identifier = job_identifier(job.get('title'), job.get('company'))
+                row = self._find(job_id, identifier)
+
+                if row is None:
+                    self._conn.execute(
+                        'INSERT INTO jobs (job_id, identifier, data, run, first_seen, updated_at) '
+                        'VALUES (?, ?, ?, ?, ?, ?)',
+                        (job_id, identifier, json.dumps(job, sort_keys=True, default=str), run, now, now)
+                    )
+                    added += 1
+                    continue
+
+                row_id, old_identifier, old_data = row
+                merged = json.loads(old_data)
+                for key, value in job.items():
+                    if keep_user_columns and key in USER_COLUMNS and merged.get(key) is not None:
+                        continue
+                    merged[key] = value
+                data = json.dumps(merged, sort_keys=True, default=str)
+                if data == old_data:
+                    continue
+
+                # Keep the old identifier if the new one already belongs to another row
+                if identifier != old_identifier and self._conn.execute(
+                        'SELECT 1 FROM jobs WHERE identifier = ?', (identifier,)).fetchone():
+                    identifier = old_identifier
+                self._conn.execute(
+                    'UPDATE jobs SET job_id = COALESCE(?, job_id), identifier = ?, data = ?, updated_at = ? WHERE id = ?',
+                    (job_id, identifier, data, now, row_id)
+                )
+                updated += 1
+
+            self._conn.commit()
+
+        return added, updated
+
+    def mark_seen(self, jobs):
+        """
+        Remember postings evaluated in this run, whether or not they were kept.
+
+        Args:
+            jobs (iterable): Job dictionaries
+
+        Returns:
+            int: Number of postings recorded
+        """
+        now = time.time()
+        rows = []
+        for job in jobs:
+            rows.append((job_identifier(job.get('title'), job.get('company')),
+                         scoped_job_id(job.get('source'), job.get('job_id')), now))
+        with self._lock:
+            self._conn.executemany('INSERT OR REPLACE INTO seen (identifier, job_id, seen_at) VALUES (?, ?, ?)', rows)
+            self._conn.execute('DELETE FROM seen WHERE seen_at < ?', (now - SEEN_TTL_DAYS * 86400,))
+            self._conn.commit()
+        return len(rows)
+
+    def defer(self, jobs):
+        """
+        Keep jobs whose match failed so the next run rescores them.
+
+        Args:
+            jobs (iterable): Job dictionaries
+
+        Returns:
+            int: Number of jobs deferred
+        """
+        now = time.time()
+        rows = [(job_identifier(job.get('title'), job.get('company')),
+                 json.dumps(_clean_record(job), default=str), now) for job in jobs]
+        with self._lock:
+            self._conn.executemany(
+                'INSERT INTO deferred (identifier, data, attempts, deferred_at) VALUES (?, ?, 1, ?) '
+                'ON CONFLICT(identifier) DO UPDATE SET data = excluded.data, attempts = attempts + 1',
+                rows
+            )
+            self._conn.commit()
+        return len(rows)
+
+    def resolve_deferred(self, jobs):
+        """
+        Forget deferred jobs that have now been evaluated.
+
+        Args:
+            jobs (iterable): Job dictionaries
+        """
+        rows = [(job_identifier(job.get('title'), job.get('company')),) for job in jobs]
+        with self._lock:
+            self._conn.executemany('DELETE FROM deferred WHERE identifier = ?', rows)
+            self._conn.commit()
+
+    def deferred_jobs(self):
+        """
+        Load the jobs left to rescore by previous runs.
+
+        Jobs already deferred MAX_DEFER_ATTEMPTS times are dropped instead.
+
+        Returns:
+            list: Job dictionaries
+        """
+        with self._lock:
+            self._conn.execute('DELETE FROM deferred WHERE attempts >= ?', (MAX_DEFER_ATTEMPTS,))
+            self._conn.commit()
+            rows = self._conn.execute('SELECT data FROM deferred ORDER BY deferred_at').fetchall()
+        return [json.loads(data) for data, in rows]
+
+    def known_jobs(self):
+        """
+        Build the lookup of postings the fetchers do not need to download again.
+
+        Returns:
+            KnownJobs: Stored jobs plus postings seen within SEEN_TTL_DAYS
+        """
+        cutoff = time.time() - SEEN_TTL_DAYS * 86400
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT job_id, identifier FROM jobs '
+                'UNION ALL SELECT job_id, identifier FROM seen WHERE seen_at >= ?', (cutoff,)
+            ).fetchall()
+        return KnownJobs(job_ids=(job_id for job_id, _ in rows if job_id),
+                         identifiers=(identifier for _, identifier in rows))
+
+    def import_csv(self, csv_path):
+        """
+        Import an existing output CSV (used once to migrate to the store).
+
+        Rows keep their order, so a following export reproduces the file.
+
+        Args:
+            csv_path (str): Path of the CSV file
+
+        Returns:
+            int: Number of rows imported
+        """
+        df = pd.read_csv(csv_path)
+        now = time.time()
+        imported = 0
+        with self._lock:
+            for record in df.to_dict('records'):
+                record = _clean_record(record)
+                cursor = self._conn.execute(
+                    'INSERT OR IGNORE INTO jobs (job_id, identifier, data, run, first_seen, updated_at) '
+                    'VALUES (?, ?, ?, 0, ?, ?)',
+                    (scoped_job_id(record.get('source'), record.get('job_id')),
+                     job_identifier(record.get('title'), record.get('company')),
+                     json.dumps(record, sort_keys=True, default=str), now, now)
+                )
+                imported += cursor.rowcount
+            self._conn.commit()
+        return imported
+
+    def sync_user_columns(self, csv_path):
+        """
+        Pull dashboard edits (apply/comments) from the exported CSV back into the store.
+
+        Only runs when the CSV was modified after the last export.
+
+        Args:
+            csv_path (str): Path of the dashboard CSV
+
+        Returns:
+            int: Number of rows whose user columns changed
+        """
+        if not os.path.exists(csv_path):
+            return 0
+
+        with self._lock:
+            exported_mtime = float(self._get_meta('exported_mtime', 0))
+        if os.path.getmtime(csv_path) <= exported_mtime:
+            return 0
+
+        wanted = {'title', 'company'} | set(USER_COLUMNS)
+        df = pd.read_csv(csv_path, usecols=lambda column: column in wanted)
+        if 'title' not in df.columns or 'company' not in df.columns:
+            return 0
+
+        changed = 0
+        with self._lock:
+            for record in df.to_dict('records'):
+                record = _clean_record(record)
+                row = self._conn.execute(
+                    'SELECT id, data FROM jobs WHERE identifier = ?',
+                    (job_identifier(record.get('title'), record.get('company')),)
+                ).fetchone()
+                if row is None:
+                    continue
+                data = json.loads(row[1])
+                edits = {column: record.get(column) for column in USER_COLUMNS if column in record}
+                if all(data.get(column) == value for column, value in edits.items()):
+                    continue
+                data.update(edits)
+                self._conn.execute('UPDATE jobs SET data = ?, updated_at = ? WHERE id = ?',
+                                   (json.dumps(data, sort_keys=True, default=str), time.time(), row[0]))
+                changed += 1
+            self._conn.commit()
+        return changed
+
+    def to_dataframe(self, columns=None):
+        """
+        Load the stored jobs as a DataFrame, newest runs first.
+
+        Args:
+            columns (list, optional): Columns to include, in order
+
+        Returns:
+            pandas.DataFrame: Stored jobs
+        """
+        with self._lock:
+            rows = self._conn.execute('SELECT data FROM jobs ORDER BY run DESC, id').fetchall()
+        df = pd.DataFrame([json.loads(data) for (data,) in rows])
+        if columns is not None:
+            df = df.reindex(columns=columns)
+        return df
+
+    def export_csv(self, csv_path, columns=None):
+        """
+        Write the dashboard CSV from the store.
+
+        Args:
+            csv_path (str): Output path
+            columns (list, optional): Columns to export, in order
+
+        Returns:
+            int: Number of exported jobs
+        """
+        df = self.to_dataframe(columns)
+        directory = os.path.dirname(os.path.abspath(csv_path))
+        os.makedirs(directory, exist_ok=True)
+
+        # Write to a temporary file first so the dashboard never reads a partial CSV
+        tmp_path = f"{csv_path}.tmp"
+        df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, csv_path)
+
+        with self._lock:
+            self._set_meta('exported_mtime', os.path.getmtime(csv_path))
+            self._conn.commit()
+        return len(df)
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+def main():
+    """Export the store to CSV from the command line."""
+    parser = argparse.ArgumentParser(description='Job store maintenance')
+    parser.add_argument('--store', type=str, default='data/job_store.db', help='Path of the job store')
+    parser.add_argument('--export', type=str, default='public/job_matches.csv', help='CSV file to write')
+    args = parser.parse_args()
+
+    store = JobStore(args.store)
+    store.sync_user_columns(args.export)
+    total = store.export_csv(args.export)
+    store.close()
+    print(f"[+] Exported {total} jobs to {args.export}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""
+Streaming Pipeline
+
+This module runs the job matcher as a set of concurrent stages connected by
+bounded queues. Sources (the job fetchers) push jobs into the first queue as
+soon as they are produced, and every stage processes items with its own pool
+of worker threads. Full queues block the upstream stage, which provides
+backpressure so a fast fetcher cannot flood a slow matcher.
+"""
+
+import time
+import queue
+import logging
+import threading
+
+from common.metrics import shared_metrics
+
+logger = logging.getLogger(__name__)
+
+# Marker pushed through the queues once all upstream work is finished
+_DONE = object()
+
+
+class Stage:
+    """A pipeline stage applying a function to each item with N worker threads."""
+
+    def __init__(self, name, func, workers=1, queue_size=100, batch_size=None, batch_timeout=2.0):
+        """
+        Initialize a pipeline stage.
+
+        Args:
+            name (str): Stage name used in progress output
+            func (callable): Function called with each item. It returns the item to pass
+                             downstream, or None to drop it. In batch mode it is called
+                             with a list of items and returns the list of items to pass
+                             downstream (items left out are dropped).
+            workers (int): Number of worker threads
+            queue_size (int): Capacity of the stage's input queue
+            batch_size (int, optional): Collect up to this many items per call (batch mode)
+            batch_timeout (float, optional): Seconds to wait for a batch to fill before
+                                             processing a partial batch. None waits until the
+                                             batch is full or the upstream stage has finished,
+                                             which turns the stage into a barrier.
+        """
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.busy_time = 0.0
+        self._lock = threading.Lock()
+
+    def _record(self, elapsed, processed=1, dropped=0, errors=0):
+        """Update the stage counters (called from worker threads)."""
+        with self._lock:
+            self.processed += processed
+            self.busy_time += elapsed
+            self.dropped += dropped
+            self.errors += errors
+
+
+class StreamingPipeline:
+    """Connects job sources and stages with bounded queues and runs them concurrently."""
+
+    def __init__(self, sources, stages, queue_size=100, metrics=None):
+        """
+        Initialize the pipeline.
+
+        Args:
+            sources (dict): Mapping of source name to a callable taking an `emit` function.
+                            The callable must call emit(item) for every item it produces.
+            stages (list): Ordered list of Stage objects
+            queue_size (int): Capacity of the output queue
+            metrics (MetricsRegistry, optional): Run metrics receiving per-source counts and
+                                                 per-stage item counts and processing times;
+                                                 defaults to the process-wide registry
+        """
+        self.sources = sources
+        self.stages = stages
+        self.queue_size = queue_size
+        self.metrics = metrics or shared_metrics()
+
+        self.source_counts = {name: 0 for name in sources}
+        self.first_result_at = None
+        self.started_at = None
+        self.finished_at = None
+
+    def run(self, on_result=None):
+        """
+        Run all sources and stages until every item has been processed.
+
+        Args:
+            on_result (callable, optional): Called with each item leaving the last stage
+
+        Returns:
+            list: Items that made it through every stage, in completion order
+        """
+        self.started_at = time.time()
+        queues = [queue.Queue(maxsize=stage.queue_size) for stage in self.stages]
+        queues.append(queue.Queue(maxsize=self.queue_size))
+
+        threads = []
+        for index, stage in enumerate(self.stages):
+            next_workers = self.stages[index + 1].workers if index + 1 < len(self.stages) else 1
+            remaining = {'workers': stage.workers}
+            for worker_id in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._stage_worker,
+                    args=(stage, queues[index], queues[index + 1], remaining, next_workers),
+                    name=f"{stage.name}-{worker_id}",
+                    daemon=True
+                )
+                thread.start()
+                threads.append(thread)
+
+        first_workers = self.stages[0].workers if self.stages else 1
+        source_threads = []
+        for name, source in self.sources.items():
+            thread = threading.Thread(target=self._source_worker, args=(name, source, queues[0]),
+                                      name=f"source-{name}", daemon=True)
+            thread.start()
+            source_threads.append(thread)
+
+        def close_sources():
+            for thread in source_threads:
+                thread.join()
+            for _ in range(first_workers):
+                queues[0].put(_DONE)
+
+        threading.Thread(target=close_sources, name='source-closer', daemon=True).start()
+
+        results = []
+        while True:
+            item = queues[-1].get()
+            if item is _DONE:
+                break
+            if self.first_result_at is None:
+                self.first_result_at = time.time()
+            results.append(item)
+            if on_result is not None:
+                # Keep draining the last queue, or the workers would block on it for good
+                try:
+                    on_result(item)
+                except Exception as e:
+                    logger.error(f"    - Error in result callback: {str(e)}")
+                    self.metrics.increment('result_callback_errors_total')
+
+        for thread in threads:
+            thread.join()
+        self.finished_at = time.time()
+        return results
+
+    def _source_worker(self, name, source, out_queue):
+        """Run one source, forwarding everything it emits into the first queue."""
+        def emit(item):
+            self.source_counts[name] += 1
+            self.metrics.increment('source_jobs_total', source=name)
+            out_queue.put(item)
+
+        try:
+            source(emit)
+        except Exception as e:
+            self.metrics.increment('source_errors_total', source=name)
+            logger.error(f"    - {name} source error: {str(e)}")
+
+    def _stage_worker(self, stage, in_queue, out_queue, remaining, next_workers):
+        """Process items from in_queue until the upstream stage has finished."""
+        while True:
+            if stage.batch_size:
+                items, done = self._next_batch(stage, in_queue)
+            else:
+                item = in_queue.get()
+                done = item is _DONE
+                items = [] if done else [item]
+
+            if items:
+                self._process(stage, items, out_queue)
+
+            if done:
+                with stage._lock:
+                    remaining['workers'] -= 1
+                    last_worker = remaining['workers'] == 0
+                if last_worker:
+                    # Only the last worker to finish signals the next stage
+                    for _ in range(next_workers):
+                        out_queue.put(_DONE)
+                return
+
+    def _next_batch(self, stage, in_queue):
+        """
+        Collect up to stage.batch_size items, waiting at most batch_timeout for more.
+
+        Returns:
+            tuple: (items, done) where done is True once the upstream stage has finished
+        """
+        item = in_queue.get()
+        if item is _DONE:
+            return [], True
+
+        batch = [item]
+        deadline = None if stage.batch_timeout is None else time.time() + stage.batch_timeout
+        while len(batch) < stage.batch_size:
+            if deadline is None:
+                item = in_queue.get()
+            else:
+                wait = deadline - time.time()
+                if wait <= 0:
+                    break
+                try:
+                    item = in_queue.get(timeout=wait)
+                except queue.Empty:
+                    break
+            if item is _DONE:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _process(self, stage, items, out_queue):
+        """Apply the stage function to one item (or one batch) and forward the results."""
+        started = time.time()
+        try:
+            if stage.batch_size:
+                results = stage.func(items)
+            else:
+                results = [stage.func(items[0])]
+        except Exception as e:
+            logger.error(f"    - Error in {stage.name} stage: {str(e)}")
+            self._record(stage, time.time() - started, processed=len(items), dropped=len(items), errors=len(items))
+            return
+
+        forwarded = [result for result in results if result is not None]
+        self._record(stage, time.time() - started, processed=len(items), dropped=len(items) - len(forwarded))
+        for result in forwarded:
+            out_queue.put(result)
+
+    def _record(self, stage, elapsed, processed, dropped=0, errors=0):
+        """Update a stage's counters and the run metrics for one call of its function."""
+        stage._record(elapsed, processed=processed, dropped=dropped, errors=errors)
+        self.metrics.observe('stage_call_seconds', elapsed, stage=stage.name)
+        self.metrics.increment('stage_items_total', processed, stage=stage.name, outcome='processed')
+        if dropped:
+            self.metrics.increment('stage_items_total', dropped, stage=stage.name, outcome='dropped')
+        if errors:
+            self.metrics.increment('stage_items_total', errors, stage=stage.name, outcome='error')
+
+    def summary(self):
+        """
+        Summarise per-stage throughput for the completed run.
+
+        Returns:
+            list: One dict per stage with processed, dropped, errors and busy time
+        """
+        return [
+            {
+                'stage': stage.name,
+                'workers': stage.workers,
+                'processed': stage.processed,
+                'dropped': stage.dropped,
+                'errors': stage.errors,
+                'busy_time': stage.busy_time,
+            }
+            for stage in self.stages
+        ]
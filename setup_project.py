@@ -12,7 +12,10 @@ def create_project_structure():
     directories = [
         "fetch_jobs",
         "match_resume",
-        "enrich_data"
+        "enrich_data",
+        "common",
+        "pipeline",
+        "benchmarks"
     ]
     
     # Create each directory and its __init__.py file